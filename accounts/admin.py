@@ -1,7 +1,7 @@
 # auth/admin.py
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from .models import StudentProfile
+from .models import StudentProfile, OutboundEmail
 
 User = get_user_model()
 
@@ -15,4 +15,11 @@ class UserAdmin(admin.ModelAdmin):
 class StudentProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'proficiency_level', 'study_frequency')
     search_fields = ('user__username', 'user__email')
-    list_filter = ('proficiency_level', 'created_at')
\ No newline at end of file
+    list_filter = ('proficiency_level', 'created_at')
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'send_after', 'sent_at')
+    search_fields = ('to_email', 'subject')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('dedupe_key', 'provider_id', 'last_error', 'claimed_at', 'sent_at', 'created_at')
@@ -0,0 +1,279 @@
+"""
+Email delivery pipeline.
+
+Request handlers and cron jobs only queue emails (enqueue_email) as
+OutboundEmail rows. A worker (deliver_queued_emails, run by the
+send_queued_emails command) claims due rows and sends them through a
+transport in batches, several batches at once. Failed sends are retried
+with exponential backoff. The same email is queued once per recipient,
+so retried cron runs and double submits don't mail anyone twice.
+
+The transport is pluggable: EMAIL_TRANSPORT names its class, and
+EMAIL_API_BASE_URL lets a local fake server stand in for Resend.
+"""
+import hashlib
+import logging
+import random
+import threading
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import requests
+from decouple import config
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TRANSPORT = getattr(settings, 'EMAIL_TRANSPORT', 'accounts.email_delivery.ResendTransport')
+EMAIL_API_BASE_URL = getattr(settings, 'EMAIL_API_BASE_URL', 'https://api.resend.com')
+# The provider accepts at most 100 emails per batch call
+EMAIL_BATCH_SIZE = min(getattr(settings, 'EMAIL_BATCH_SIZE', 100), 100)
+EMAIL_DELIVERY_CONCURRENCY = getattr(settings, 'EMAIL_DELIVERY_CONCURRENCY', 4)
+EMAIL_MAX_ATTEMPTS = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5)
+EMAIL_RETRY_BASE_DELAY = getattr(settings, 'EMAIL_RETRY_BASE_DELAY', 30)
+EMAIL_RETRY_MAX_DELAY = getattr(settings, 'EMAIL_RETRY_MAX_DELAY', 60 * 60)
+# Claims older than this belong to a worker that died mid-send
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+DeliveryResult = namedtuple('DeliveryResult', 'ok provider_id error retryable retry_after')
+
+
+def _failure(error, retryable, retry_after=None):
+    return DeliveryResult(False, '', error, retryable, retry_after)
+
+
+class ResendTransport:
+    """
+    Sends through the Resend HTTP API over keep-alive connections.
+    Each worker thread gets its own requests.Session, so connections are
+    reused without sharing a session between threads.
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=10):
+        self.api_key = api_key if api_key is not None else config('RESEND_API_KEY', default='')
+        self.base_url = (base_url or EMAIL_API_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            })
+            self._local.session = session
+        return session
+
+    def _post(self, path, data):
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=data, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return None, _failure(f"{type(e).__name__}: {e}", retryable=True)
+        if response.status_code == 200:
+            try:
+                return response.json(), None
+            except ValueError:
+                return None, _failure(f"Unreadable response: {response.text[:500]}", retryable=True)
+        retry_after = response.headers.get('Retry-After')
+        return None, _failure(
+            f"Status {response.status_code}: {response.text[:500]}",
+            retryable=response.status_code == 429 or response.status_code >= 500,
+            retry_after=int(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+
+    def send(self, payload):
+        body, failure = self._post('/emails', payload)
+        if failure:
+            return failure
+        return DeliveryResult(True, body.get('id', ''), '', False, None)
+
+    def send_batch(self, payloads):
+        """One result per payload, in order"""
+        if len(payloads) == 1:
+            return [self.send(payloads[0])]
+
+        body, failure = self._post('/emails/batch', payloads)
+        if failure is None:
+            ids = [item.get('id', '') for item in body.get('data', [])]
+            if len(ids) == len(payloads):
+                return [DeliveryResult(True, provider_id, '', False, None) for provider_id in ids]
+            failure = _failure('Batch response did not match the request', retryable=True)
+        if failure.retryable:
+            return [failure] * len(payloads)
+        # A rejected batch fails as a whole - send one by one so only the bad emails fail
+        return [self.send(payload) for payload in payloads]
+
+
+_transport = None
+
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        _transport = import_string(EMAIL_TRANSPORT)()
+    return _transport
+
+
+def make_dedupe_key(subject, html, text=''):
+    """Identifies an email's content for the day; enqueue_email adds the recipient"""
+    digest = hashlib.sha256(f"{subject}\n{html}\n{text}".encode()).hexdigest()
+    return f"{timezone.now().date()}:{digest}"
+
+
+def _outbound_email(to_email, subject, html, text=None, from_email=None, dedupe_key=None, send_after=None):
+    key = dedupe_key or make_dedupe_key(subject, html, text or '')
+    return OutboundEmail(
+        to_email=to_email,
+        from_email=from_email or config('FROM_EMAIL', default='onboarding@resend.dev'),
+        subject=subject[:255],
+        html=html,
+        text=text or '',
+        dedupe_key=hashlib.sha256(f"{to_email.lower()}\n{key}".encode()).hexdigest(),
+        send_after=send_after or timezone.now()
+    )
+
+
+def enqueue_email(to_email, subject, html, text=None, from_email=None, dedupe_key=None, send_after=None):
+    """
+    Queue an email for the delivery worker. dedupe_key names the email for
+    its recipient (by default its content and the date); an email whose key
+    is already queued is dropped. Returns the OutboundEmail, or None if dropped.
+    """
+    email = _outbound_email(to_email, subject, html, text, from_email, dedupe_key, send_after)
+    try:
+        # Savepoint, so a duplicate doesn't break the caller's transaction
+        with transaction.atomic():
+            email.save()
+            return email
+    except IntegrityError:
+        logger.debug("Dropped duplicate email %r to %s", subject, to_email)
+        return None
+
+
+def enqueue_emails(messages):
+    """
+    Queue many emails with one lookup and bulk inserts. messages are dicts
+    of enqueue_email's arguments. Returns how many were queued.
+    """
+    emails = {}
+    for message in messages:
+        email = _outbound_email(**message)
+        emails.setdefault(email.dedupe_key, email)
+    existing = set(OutboundEmail.objects.filter(
+        dedupe_key__in=list(emails)).values_list('dedupe_key', flat=True))
+    new = [email for key, email in emails.items() if key not in existing]
+    # A concurrent insert of the same email is still dropped by the unique key
+    OutboundEmail.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+    return len(new)
+
+
+def retry_delay(attempts, retry_after=None):
+    """Seconds to wait before the next attempt: exponential with jitter, capped"""
+    delay = min(EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1), EMAIL_RETRY_MAX_DELAY)
+    delay *= random.uniform(1, 1.25)
+    return max(delay, retry_after or 0)
+
+
+def claim_due_emails(limit):
+    """Mark up to limit due emails as sending and return them"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+                Q(status='pending', send_after__lte=now) |
+                Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+            ).order_by('send_after')[:limit]
+        )
+
+        # A stale claim means a worker died mid-send, which counts as an attempt,
+        # so an email that keeps killing its worker still runs out of attempts
+        stale = [email for email in emails if email.status == 'sending']
+        for email in stale:
+            email.attempts += 1
+            email.claimed_at = None
+            if email.attempts >= EMAIL_MAX_ATTEMPTS:
+                email.status = 'failed'
+                email.last_error = 'Delivery was interrupted too many times'
+                logger.error("Giving up on email %s to %s: %s", email.pk, email.to_email, email.last_error)
+        OutboundEmail.objects.bulk_update(stale, ['status', 'attempts', 'claimed_at', 'last_error'])
+
+        emails = [email for email in emails if email.status != 'failed']
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status='sending', claimed_at=now)
+    return emails
+
+
+def send_batch(transport, batch):
+    """Send a batch of emails; an unexpected error fails the whole batch as retryable"""
+    try:
+        return transport.send_batch([email.payload() for email in batch])
+    except Exception as e:
+        logger.exception("Sending a batch of %s emails failed", len(batch))
+        return [_failure(f"{type(e).__name__}: {e}", retryable=True)] * len(batch)
+
+
+def record_results(emails, results):
+    """Store delivery results, rescheduling retryable failures"""
+    now = timezone.now()
+    outcome = Counter()
+    for email, result in zip(emails, results):
+        email.attempts += 1
+        email.claimed_at = None
+        if result.ok:
+            email.status = 'sent'
+            email.sent_at = now
+            email.provider_id = result.provider_id
+            email.last_error = ''
+            outcome['sent'] += 1
+        elif result.retryable and email.attempts < EMAIL_MAX_ATTEMPTS:
+            email.status = 'pending'
+            email.send_after = now + timedelta(seconds=retry_delay(email.attempts, result.retry_after))
+            email.last_error = result.error
+            outcome['retried'] += 1
+        else:
+            email.status = 'failed'
+            email.last_error = result.error
+            outcome['failed'] += 1
+            logger.error("Giving up on email %s to %s: %s", email.pk, email.to_email, result.error)
+    OutboundEmail.objects.bulk_update(emails, [
+        'status', 'attempts', 'claimed_at', 'sent_at', 'provider_id', 'send_after', 'last_error'
+    ])
+    return outcome
+
+
+def deliver_queued_emails(transport=None, batch_size=None, concurrency=None, limit=None):
+    """
+    Send due emails until none are left (or limit were claimed). Up to
+    concurrency batches are in flight at once; only the sending happens on
+    the pool threads, database work stays on the calling thread.
+    Returns a Counter of sent, retried and failed emails.
+    """
+    transport = transport or get_transport()
+    batch_size = min(batch_size or EMAIL_BATCH_SIZE, 100)
+    concurrency = concurrency or EMAIL_DELIVERY_CONCURRENCY
+    totals = Counter()
+    claimed = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while limit is None or claimed < limit:
+            wanted = batch_size * concurrency
+            if limit is not None:
+                wanted = min(wanted, limit - claimed)
+            emails = claim_due_emails(wanted)
+            if not emails:
+                break
+            claimed += len(emails)
+
+            batches = [emails[start:start + batch_size] for start in range(0, len(emails), batch_size)]
+            sends = pool.map(lambda batch: send_batch(transport, batch), batches)
+            results = [result for batch_results in sends for result in batch_results]
+            totals.update(record_results(emails, results))
+    return totals
@@ -0,0 +1,118 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.email_delivery import ResendTransport, deliver_queued_emails, enqueue_email
+
+
+class Rollback(Exception):
+    pass
+
+
+class FakeEmailAPI(BaseHTTPRequestHandler):
+    """Answers like the Resend emails and batch endpoints, after server.latency seconds"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.connections.add(self.client_address)
+
+        if random.random() < self.server.failure_rate:
+            status, data = 503, {'message': 'Service unavailable'}
+        elif self.path == '/emails/batch':
+            status, data = 200, {'data': [{'id': uuid.uuid4().hex} for _ in body]}
+        else:
+            status, data = 200, {'id': uuid.uuid4().hex}
+
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark email delivery against a local fake API: one requests.post per email vs the queue worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=200, help='Emails to send')
+        parser.add_argument('--latency', type=float, default=20, help='Fake API latency in ms')
+        parser.add_argument('--failure-rate', type=float, default=0, help='Share of API calls answered with 503')
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails per batch call')
+        parser.add_argument('--concurrency', type=int, default=4, help='Batch calls in flight at once')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeEmailAPI)
+        server.daemon_threads = True
+        server.latency = options['latency'] / 1000
+        server.failure_rate = options['failure_rate']
+        server.lock = threading.Lock()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        count = options['emails']
+        messages = [
+            (f'learner{index}@example.com', f'Benchmark email {index}', f'<p>Hello learner {index}</p>')
+            for index in range(count)
+        ]
+        self.stdout.write(f'Sending {count} emails, {options["latency"]:.0f} ms API latency')
+
+        try:
+            self.reset(server)
+            started = time.perf_counter()
+            sent = 0
+            for to_email, subject, html in messages:
+                response = requests.post(
+                    f'{base_url}/emails',
+                    headers={'Authorization': 'Bearer benchmark', 'Content-Type': 'application/json'},
+                    json={'from': 'benchmark@example.com', 'to': to_email, 'subject': subject, 'html': html},
+                    timeout=30
+                )
+                sent += response.status_code == 200
+            self.report('requests.post per email', sent, time.perf_counter() - started, server)
+
+            # Queued rows only live for the duration of the run
+            try:
+                with transaction.atomic():
+                    self.reset(server)
+                    started = time.perf_counter()
+                    for to_email, subject, html in messages:
+                        enqueue_email(to_email, subject, html, from_email='benchmark@example.com')
+                    queued = time.perf_counter()
+                    totals = deliver_queued_emails(
+                        transport=ResendTransport(api_key='benchmark', base_url=base_url),
+                        batch_size=options['batch_size'],
+                        concurrency=options['concurrency']
+                    )
+                    finished = time.perf_counter()
+                    self.stdout.write(f'{"Enqueue (request handler cost)":<32} {(queued - started) * 1000:8.1f} ms')
+                    self.report('Queue worker', totals['sent'], finished - queued, server)
+                    if totals['retried'] or totals['failed']:
+                        self.stdout.write(f"  {totals['retried']} scheduled for retry, {totals['failed']} failed")
+                    raise Rollback()
+            except Rollback:
+                pass
+        finally:
+            server.shutdown()
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
+
+    def reset(self, server):
+        server.requests = 0
+        server.connections = set()
+
+    def report(self, label, sent, elapsed, server):
+        self.stdout.write(
+            f'{label:<32} {elapsed * 1000:8.1f} ms  {sent / elapsed:8,.0f} emails/s  '
+            f'{server.requests} API calls  {len(server.connections)} connections'
+        )
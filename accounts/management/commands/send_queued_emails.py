@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from accounts.email_delivery import deliver_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails (run from cron, or keep running with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Emails per API call (at most 100)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='API calls in flight at once',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Stop after this many emails',
+        )
+        parser.add_argument(
+            '--loop',
+            type=float,
+            metavar='SECONDS',
+            help='Keep polling the queue, sleeping this long when it is empty',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            totals = deliver_queued_emails(
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                limit=options['limit']
+            )
+            elapsed = time.monotonic() - started
+            if totals or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent {totals['sent']} emails in {elapsed:.1f}s "
+                    f"({totals['retried']} to retry, {totals['failed']} failed)"
+                ))
+            if not options['loop']:
+                return
+            if not totals:
+                time.sleep(options['loop'])
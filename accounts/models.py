@@ -295,4 +295,52 @@ class EmailVerification(models.Model):
         return timezone.now() - self.created_at > timedelta(minutes=10)
 
     def __str__(self):
-        return f"Verification code for {self.user.email}"
\ No newline at end of file
+        return f"Verification code for {self.user.email}"
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting for, or done with, delivery by the email worker
+    (see accounts.email_delivery).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    html = models.TextField()
+    text = models.TextField(blank=True)
+    # Hash of the recipient and message, so the same email is only queued once
+    dedupe_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    send_after = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    provider_id = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
+
+    def payload(self):
+        """The message as the email API expects it"""
+        data = {
+            "from": self.from_email,
+            "to": self.to_email,
+            "subject": self.subject,
+            "html": self.html,
+        }
+        if self.text:
+            data["text"] = self.text
+        return data
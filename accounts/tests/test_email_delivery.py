@@ -0,0 +1,41 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from accounts.email_delivery import (
+    CLAIM_TIMEOUT, EMAIL_MAX_ATTEMPTS, claim_due_emails, deliver_queued_emails, enqueue_email
+)
+from accounts.models import OutboundEmail
+
+
+class BrokenTransport:
+    """A transport whose every call blows up, like a non-JSON 200 from the API"""
+    def send_batch(self, payloads):
+        raise ValueError('Expecting value: line 1 column 1 (char 0)')
+
+
+class DeliveryFailureTests(TestCase):
+    def setUp(self):
+        enqueue_email('learner@example.com', 'Hello', '<p>Hello</p>')
+        self.email = OutboundEmail.objects.get()
+
+    def test_transport_errors_are_retried(self):
+        totals = deliver_queued_emails(transport=BrokenTransport())
+
+        self.assertEqual(totals['retried'], 1)
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, 'pending')
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIn('ValueError', self.email.last_error)
+
+    def test_stale_claims_run_out_of_attempts(self):
+        stale = timezone.now() - CLAIM_TIMEOUT - timedelta(minutes=1)
+        for attempt in range(1, EMAIL_MAX_ATTEMPTS):
+            OutboundEmail.objects.filter(pk=self.email.pk).update(status='sending', claimed_at=stale)
+            self.assertEqual(len(claim_due_emails(10)), 1)
+            self.email.refresh_from_db()
+            self.assertEqual(self.email.attempts, attempt)
+
+        OutboundEmail.objects.filter(pk=self.email.pk).update(status='sending', claimed_at=stale)
+        self.assertEqual(claim_due_emails(10), [])
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, 'failed')
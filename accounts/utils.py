@@ -3,7 +3,7 @@ from django.conf import settings
 from .models import EmailVerification
 from decouple import config
 import logging
-import requests
+from .email_delivery import enqueue_email, get_transport
 from django.template.loader import render_to_string
 from django.urls import reverse
 
@@ -36,12 +36,6 @@ def send_verification_email(user):
         
         logger.info(f"Attempting to send verification email to {to_email} from {FROM_EMAIL}")
         
-        # Use direct API call
-        headers = {
-            "Authorization": f"Bearer {RESEND_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         # Render the email template
         context = {
             'user_email': user.email,
@@ -73,23 +67,14 @@ def send_verification_email(user):
             "text": text_content
         }
         
-        logger.info(f"Sending email with template to: {to_email}")
-        
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
+        # Sent right away rather than queued - the user is waiting for the code
+        result = get_transport().send(data)
         
-        logger.info(f"Resend API Response Status: {response.status_code}")
-        logger.info(f"Resend API Response: {response.text}")
-        
-        if response.status_code == 200:
+        if result.ok:
             logger.info(f"Email sent successfully to {to_email}")
             return True
         else:
-            raise Exception(f"Failed to send email: Status {response.status_code}, Response: {response.text}")
+            raise Exception(f"Failed to send email: {result.error}")
             
     except Exception as e:
         logger.error(f"Failed to send verification email: {str(e)}")
@@ -97,63 +82,26 @@ def send_verification_email(user):
         verification.delete()
         raise e
 
-def send_resend_email(to_email, subject, html, text=None):
+def send_resend_email(to_email, subject, html, text=None, dedupe_key=None):
     """
-    Send an email using Resend API. Used for notifications and gamification emails.
+    Queue an email for delivery through the Resend API. Used for notifications and gamification emails.
+    Returns True once the email is queued, or if the same email is already queued for this recipient.
+    The send_queued_emails worker does the actual sending (see accounts.email_delivery).
     """
     try:
-        # Validate required environment variables
-        if not RESEND_API_KEY:
-            logger.error("RESEND_API_KEY is not configured")
-            return False
-            
         if not FROM_EMAIL:
             logger.error("FROM_EMAIL is not configured")
             return False
 
-        headers = {
-            "Authorization": f"Bearer {RESEND_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "from": FROM_EMAIL,
-            "to": to_email,
-            "subject": subject,
-            "html": html
-        }
-        
-        if text:
-            data["text"] = text
-            
-        logger.info(f"Sending Resend email to: {to_email}")
-        logger.info(f"Email subject: {subject}")
-        logger.info(f"From email: {FROM_EMAIL}")
-        logger.info(f"Test mode: {TEST_MODE}")
-        
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers=headers,
-            json=data,
-            timeout=30  # Add timeout
+        enqueue_email(
+            to_email,
+            subject,
+            html,
+            text=text,
+            from_email=FROM_EMAIL,
+            dedupe_key=dedupe_key
         )
-        
-        logger.info(f"Resend API Response Status: {response.status_code}")
-        logger.info(f"Resend API Response: {response.text}")
-        
-        if response.status_code == 200:
-            logger.info(f"Email sent successfully to {to_email}")
-            return True
-        else:
-            logger.error(f"Failed to send email to {to_email}. Status: {response.status_code}, Response: {response.text}")
-            return False
-            
-    except requests.exceptions.Timeout:
-        logger.error(f"Timeout while sending email to {to_email}")
-        return False
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error while sending email to {to_email}: {str(e)}")
-        return False
+        return True
     except Exception as e:
-        logger.error(f"Failed to send Resend email to {to_email}: {str(e)}")
-        return False 
\ No newline at end of file
+        logger.error(f"Failed to queue email to {to_email}: {str(e)}")
+        return False
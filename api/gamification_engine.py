@@ -1,4 +1,5 @@
-from .models import MomentumState, GamificationProgress, EnergyWallet, ActivityLog, Notification
+from .models import MomentumState, GamificationProgress, EnergyWallet, ActivityLog
+from courses.digest import buffer_notification
 from leagues.models import League, UserLeague
 import math
 from django.utils import timezone
@@ -109,11 +110,10 @@ class GamificationEngine:
 
         momentum.last_active_at = now
         
-        # 🛡️ Phase 11: Energy Full Notification
+        # 🛡️ Phase 11: Energy Full Notification (merged into the user's in-app digest)
         if energy_delta > 0 and wallet.energy_balance >= 10: # Assuming 10 is the soft max
-            Notification.objects.create(
-                user=user,
-                type='energy_full',
+            buffer_notification(
+                user, 'in_app', 'energy_full',
                 title='Tamartaada waa buuxdaa!',
                 message='Waxa aad haysataa tamar buuxda. Isticmaal hadda si aad u badbaadiso xariggaaga!',
                 data={'balance': wallet.energy_balance}
@@ -146,27 +146,24 @@ class GamificationEngine:
                 user_league.current_league = next_league
                 user_league.save()
                 
-                Notification.objects.create(
-                    user=user,
-                    type='league',
+                buffer_notification(
+                    user, 'in_app', 'league',
                     title='League Promotion!',
                     message=f'Waad ku mahadsantahay kor u kacista {next_league.somali_name}!',
                     data={'old_league': old_league_name, 'new_league': next_league.somali_name}
                 )
 
         if progress.level > old_level:
-            Notification.objects.create(
-                user=user,
-                type='achievement',
+            buffer_notification(
+                user, 'in_app', 'achievement',
                 title='Level Up!',
                 message=f'Hambalyo! Waxaad gaartay heerka {progress.level}!',
                 data={'level': progress.level}
             )
 
         if momentum.state == 'restored':
-             Notification.objects.create(
-                user=user,
-                type='streak',
+             buffer_notification(
+                user, 'in_app', 'streak',
                 title='Momentum Restored!',
                 message='Xariggaaga waa la soo celiyay! Aan sii wadno dadaalka.',
                 data={'streak_count': momentum.streak_count}
@@ -217,9 +214,8 @@ class GamificationEngine:
                 created_at=now
             )
             # 🛡️ Phase 11: Notification Mapping
-            Notification.objects.create(
-                user=state.user,
-                type='streak_decay_warning',
+            buffer_notification(
+                state.user, 'in_app', 'streak_decay_warning',
                 title='Xariggaagu waa jilicsanyahay!',
                 message='Xariggaagu wuxuu halis ugu jiraa inuu jabo. Xali hal dhibaato hadda si aad u badbaadiso!',
                 data={'streak_count': state.streak_count}
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_notification_inbox_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='api_notific_user_id_a7d1f5_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='api_notific_created_238c70_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='email',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='in_app',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='is_sent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='websocket',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('achievement', 'Achievement'), ('streak', 'Streak'), ('streak_decay_warning', 'Streak Decay Warning'), ('energy_full', 'Energy Full'), ('league', 'League Update'), ('system', 'System Notification'), ('streak_reminder', 'Streak Reminder'), ('achievement_earned', 'Achievement Earned'), ('daily_goal', 'Daily Goal Reminder'), ('league_update', 'League Update'), ('challenge_available', 'Challenge Available')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('email', True), ('is_sent', False)), fields=['scheduled_for'], name='api_notification_email_due'),
+        ),
+    ]
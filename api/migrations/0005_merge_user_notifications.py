@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:48
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 2000
+
+
+def merge_user_notifications(apps, schema_editor):
+    """
+    Move every courses.UserNotification row into api.Notification, a chunk
+    at a time. Each chunk is copied and deleted in its own transaction, so
+    an interrupted run picks up where it stopped.
+    """
+    Notification = apps.get_model('api', 'Notification')
+    UserNotification = apps.get_model('courses', 'UserNotification')
+    # Keep the original timestamps
+    Notification._meta.get_field('created_at').auto_now_add = False
+
+    while True:
+        with transaction.atomic():
+            chunk = list(UserNotification.objects.order_by('pk')[:CHUNK_SIZE])
+            if not chunk:
+                return
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=row.user_id,
+                    type=row.notification_type[:20],
+                    title=row.title,
+                    message=row.message,
+                    is_read=row.is_read,
+                    created_at=row.created_at,
+                    in_app=True,
+                    # Only scheduled rows were ever emailed
+                    email=row.scheduled_for is not None,
+                    is_sent=row.is_sent,
+                    scheduled_for=row.scheduled_for,
+                )
+                for row in chunk
+            ])
+            UserNotification.objects.filter(pk__in=[row.pk for row in chunk]).delete()
+
+
+class Migration(migrations.Migration):
+    # Chunks commit one by one
+    atomic = False
+
+    dependencies = [
+        ('api', '0004_unified_notifications'),
+        ('courses', '0011_notification_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_user_notifications, migrations.RunPython.noop),
+    ]
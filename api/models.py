@@ -130,6 +130,12 @@ class DailyActivity(models.Model):
         ordering = ['-date']
 
 class Notification(models.Model):
+    """
+    Every notification a user gets, whichever way it is delivered. The
+    channel flags say where it goes: the in-app inbox, an email (sent by
+    NotificationService.process_scheduled_notifications once scheduled_for
+    is due) and a live websocket push.
+    """
     TYPE_CHOICES = [
         ('achievement', _('Achievement')),
         ('streak', _('Streak')),
@@ -137,6 +143,11 @@ class Notification(models.Model):
         ('energy_full', _('Energy Full')),
         ('league', _('League Update')),
         ('system', _('System Notification')),
+        ('streak_reminder', _('Streak Reminder')),
+        ('achievement_earned', _('Achievement Earned')),
+        ('daily_goal', _('Daily Goal Reminder')),
+        ('league_update', _('League Update')),
+        ('challenge_available', _('Challenge Available')),
     ]
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_notifications')
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
@@ -144,15 +155,85 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     data = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Delivery channels
+    in_app = models.BooleanField(default=True)
+    email = models.BooleanField(default=False)
+    websocket = models.BooleanField(default=True)
+    is_sent = models.BooleanField(default=False)  # For email notifications
+    scheduled_for = models.DateTimeField(null=True, blank=True)  # For scheduled emails
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'type', 'is_read']),
-            models.Index(fields=['created_at']),
+            # The user's inbox, newest first; serves every read
+            models.Index(fields=['user', '-created_at']),
+            # Only emails waiting to go out, for the scheduled-email scan
+            models.Index(
+                fields=['scheduled_for'],
+                condition=models.Q(email=True, is_sent=False),
+                name='api_notification_email_due'
+            ),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored read state so the unread counter can follow changes
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+
     def __str__(self):
         return f"{self.user.username} - {self.type} - {self.created_at}"
+
+    @classmethod
+    def create_streak_reminder(cls, user, streak_count):
+        """Create a streak reminder notification, emailed ahead of the user's study time"""
+        # Calculate user's local midnight
+        user_profile = user.student_profile
+        preferred_times = user_profile.get_preferred_study_time()
+        
+        # Default to evening if no preference set
+        reminder_hour = 20  # 8 PM default
+        if preferred_times:
+            # Use the last preferred time slot as reminder
+            reminder_hour = int(preferred_times[-1].split(':')[0])
+        
+        # Schedule notification 2 hours before preferred time
+        scheduled_time = timezone.now().replace(
+            hour=max(0, reminder_hour - 2),
+            minute=0,
+            second=0,
+            microsecond=0
+        )
+        
+        return cls.objects.create(
+            user=user,
+            type='streak_reminder',
+            title='Ilaaligaaga Waxbarashada!',
+            message=f'Waxaa kuu hadhay {streak_count} maalmood oo aad ilaalisid. Soo gal maanta oo dhammaystir casharkaaga!',
+            email=True,
+            scheduled_for=scheduled_time
+        )
+
+    @classmethod
+    def create_achievement_notification(cls, user, achievement):
+        """Create an achievement earned notification"""
+        return cls.objects.create(
+            user=user,
+            type='achievement_earned',
+            title=f'Hambalyo! {achievement.name}',
+            message=f'Waad dhammaystirtay "{achievement.description}". Waad heshay {achievement.points_reward} dhibcood!',
+        )
+
+    @classmethod
+    def create_league_update(cls, user, league_position, league_name):
+        """Create a league update notification"""
+        return cls.objects.create(
+            user=user,
+            type='league_update',
+            title='Warbixin Tartanka!',
+            message=f'Waad ku guulaysatay booska {league_position} tartanka {league_name}!',
+        )
  
\ No newline at end of file
@@ -6,6 +6,7 @@ from django.db import models, transaction
 import logging
 from .models import Streak, DailyActivity, Notification, GamificationProgress, MomentumState, EnergyWallet, ActivityLog
 from django.utils import timezone
+from core.sparse import SparseFieldsMixin
 
 logger = logging.getLogger(__name__)
 
@@ -277,7 +278,7 @@ class StreakUpdateSerializer(serializers.Serializer):
     request_id = serializers.CharField(required=False, allow_null=True, allow_blank=True)
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'type', 'title', 'message', 'data', 'is_read', 'created_at']
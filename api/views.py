@@ -17,6 +17,8 @@ from .serializers import (
 )
 from .models import Streak, DailyActivity, Notification, MomentumState, GamificationProgress, EnergyWallet, ActivityLog
 from .gamification_engine import GamificationEngine
+from core.sparse import SparseFieldsViewSetMixin
+from courses.inbox import NotificationInboxMixin
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from django.db.models import F
@@ -351,29 +353,9 @@ class GamificationViewSet(viewsets.ViewSet):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(NotificationInboxMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
-    
-    def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
-    
-    @action(detail=False, methods=['post'])
-    def mark_all_read(self, request):
-        self.get_queryset().update(is_read=True)
-        return Response({'message': 'All notifications marked as read'})
-    
-    @action(detail=True, methods=['post'])
-    def mark_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
-        return Response({'message': 'Notification marked as read'})
-    
-    @action(detail=False, methods=['get'])
-    def unread_count(self, request):
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'unread_count': count})
 
 
 @api_view(['GET'])
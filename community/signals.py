@@ -1,11 +1,21 @@
 # Simplified signals for refactored community models
 # The old complex signals have been removed to match the new simple Post/Reply/Reaction structure
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from courses.counters import adjust_posts_count
+from .models import Post
 
 User = get_user_model()
 
-# Signals can be added here as needed for the simplified structure
-# For now, keeping this minimal to avoid import errors
\ No newline at end of file
+
+@receiver(post_save, sender=Post)
+def count_created_post(sender, instance, created, **kwargs):
+    if created:
+        adjust_posts_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    adjust_posts_count(instance.category_id, -1)
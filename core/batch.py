@@ -0,0 +1,78 @@
+"""
+Multi-get for viewsets: GET <resource>/batch/?ids=1,2,3 resolves every id
+with one IN query instead of one request per object.
+"""
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+MAX_BATCH_IDS = getattr(settings, 'MAX_BATCH_IDS', 100)
+
+
+class BatchRetrieveMixin:
+    """
+    ViewSet mixin adding a batch action. Results are keyed by id; ids that
+    are malformed, missing or not permitted get an entry in errors instead.
+    """
+    max_batch_ids = MAX_BATCH_IDS
+    # Nested relations serialized by default in batch responses (see SparseFieldsMixin)
+    batch_expand = ()
+
+    def get_sparse_fields(self):
+        fields, expand = super().get_sparse_fields()
+        if self.action == 'batch' and fields is None and expand is None:
+            expand = list(self.batch_expand)
+        return fields, expand
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Retrieve up to max_batch_ids objects by ?ids=1,2,3.
+        """
+        raw_ids = request.query_params.get('ids')
+        if not raw_ids:
+            return Response(
+                {'error': 'ids is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        values = [value.strip() for value in raw_ids.split(',')]
+        values = [value for value in values if value]
+        # Duplicates count towards the cap, so it bounds the work below
+        if len(values) > self.max_batch_ids:
+            return Response(
+                {'error': f'At most {self.max_batch_ids} ids can be requested at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parsed = []
+        errors = {}
+        for value in values:
+            try:
+                parsed.append(int(value))
+            except ValueError:
+                errors[value] = 'Invalid id'
+        ids = list(dict.fromkeys(parsed))
+
+        found = {
+            obj.pk: obj
+            for obj in self.filter_queryset(self.get_queryset()).filter(pk__in=ids)
+        }
+        permitted = []
+        for pk in ids:
+            obj = found.get(pk)
+            if obj is None:
+                errors[str(pk)] = 'Not found'
+                continue
+            try:
+                self.check_object_permissions(request, obj)
+            except PermissionDenied:
+                errors[str(pk)] = 'Permission denied'
+                continue
+            permitted.append(obj)
+
+        serializer = self.get_serializer(permitted, many=True)
+        results = {str(obj.pk): data for obj, data in zip(permitted, serializer.data)}
+        return Response({'results': results, 'errors': errors})
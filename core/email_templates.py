@@ -0,0 +1,206 @@
+"""
+Precompiled email templates.
+
+render_email() is a drop-in for render_to_string() on the templates in
+templates/emails. The first time a template is used, it works out which
+variables the template reads. Each combination of those variables being
+truthy or falsy is then rendered once with placeholders. From then on a
+render only substitutes the recipient's escaped values into that skeleton,
+and all the shared markup, styles and copy stay pre-rendered.
+
+Templates that use anything besides plain variables, the default filter
+and {% if %} with and/or/not fall back to render_to_string().
+Skeletons are kept for the life of the process, so template edits need a
+restart, as with the cached template loader.
+"""
+import html
+import re
+from django.conf import settings
+from django.template.base import TextNode, Variable, VariableNode, render_value_in_context
+from django.template.context import Context
+from django.template.defaultfilters import default as default_filter
+from django.template.defaulttags import CommentNode, IfNode, TemplateLiteral
+from django.template.loader import get_template, render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+MARKER = '@@{}@@'
+_MARKER_RE = re.compile(r'@@(\d+)@@')
+# {% if %} operators whose result depends only on the truthiness of their operands
+_TRUTHINESS_OPERATORS = {'and', 'or', 'not'}
+_BUILTINS = {'True': True, 'False': False, 'None': None}
+_MISSING = object()
+
+
+class Unsupported(Exception):
+    pass
+
+
+class _Placeholder(dict):
+    """
+    Stands in for a variable while a skeleton is rendered: it has the
+    variable's truthiness, prints as a marker, and holds the placeholders of
+    attributes read from it.
+    """
+
+    def __init__(self, index, truthy):
+        super().__init__()
+        self.index = index
+        self.truthy = truthy
+
+    def __bool__(self):
+        return self.truthy
+
+    def __str__(self):
+        return MARKER.format(self.index)
+
+
+class CompiledEmail:
+    """
+    One email template with its skeletons, keyed by the active language and
+    the truthiness of every variable the template reads.
+    """
+
+    def __init__(self, template_name):
+        self.template = get_template(template_name)
+        template = self.template.template
+        if '@@' in template.source:
+            raise Unsupported('Template text clashes with the placeholder markers')
+        self.string_if_invalid = template.engine.string_if_invalid
+        self.value_context = Context(autoescape=template.engine.autoescape)
+        self.variables = []
+        self._collect(template.nodelist)
+        self.skeletons = {}
+
+    def _collect(self, nodelist):
+        for node in nodelist:
+            if isinstance(node, (TextNode, CommentNode)):
+                continue
+            if isinstance(node, VariableNode):
+                self._add_variable(node.filter_expression)
+            elif isinstance(node, IfNode):
+                for condition, branch in node.conditions_nodelists:
+                    if condition is not None:
+                        self._add_condition(condition)
+                    self._collect(branch)
+            else:
+                raise Unsupported(f'{type(node).__name__} is not supported')
+
+    def _add_condition(self, condition):
+        if isinstance(condition, TemplateLiteral):
+            self._add_variable(condition.value)
+        elif getattr(condition, 'id', None) in _TRUTHINESS_OPERATORS:
+            self._add_condition(condition.first)
+            if condition.second is not None:
+                self._add_condition(condition.second)
+        else:
+            raise Unsupported(f'{{% if %}} operator {getattr(condition, "id", condition)!r} is not supported')
+
+    def _add_variable(self, filter_expression):
+        for func, _ in filter_expression.filters:
+            if func is not default_filter:
+                raise Unsupported(f'Filter {func.__name__} is not supported')
+        variable = filter_expression.var
+        if not isinstance(variable, Variable) or variable.lookups is None:
+            # A literal renders the same for everyone
+            return
+        if variable.translate or any(bit.isdigit() or bit.startswith('_') for bit in variable.lookups):
+            raise Unsupported(f'Variable {variable.var} is not supported')
+        if variable.lookups not in self.variables:
+            self.variables.append(variable.lookups)
+
+    @staticmethod
+    def _resolve(context, lookups):
+        """Variable lookup as the template engine does it, _MISSING if it fails"""
+        current = context
+        for position, bit in enumerate(lookups):
+            try:
+                current = current[bit]
+            except (TypeError, AttributeError, KeyError, ValueError, IndexError):
+                if position == 0 and bit in _BUILTINS:
+                    current = _BUILTINS[bit]
+                    continue
+                try:
+                    current = getattr(current, bit)
+                except (TypeError, AttributeError):
+                    return _MISSING
+            if callable(current):
+                if getattr(current, 'do_not_call_in_templates', False):
+                    pass
+                elif getattr(current, 'alters_data', False):
+                    return _MISSING
+                else:
+                    try:
+                        current = current()
+                    except TypeError:
+                        return _MISSING
+        return current
+
+    def _skeleton(self, shape):
+        """Render the template with placeholders for one shape and split it at the markers"""
+        truthy = shape[1:]
+        root = {}
+        nodes = {}
+        # Shorter lookups first, so user exists before user.username hangs off it
+        for index in sorted(range(len(self.variables)), key=lambda i: len(self.variables[i])):
+            lookups = self.variables[index]
+            parent = root
+            for depth in range(1, len(lookups)):
+                node = nodes.get(lookups[:depth])
+                if node is None:
+                    node = nodes[lookups[:depth]] = _Placeholder(None, True)
+                    parent[lookups[depth - 1]] = node
+                parent = node
+            node = nodes[lookups] = _Placeholder(index, truthy[index])
+            parent[lookups[-1]] = node
+
+        parts = _MARKER_RE.split(self.template.render(root))
+        # split() alternates text and captured marker indexes
+        return [int(part) if position % 2 else part for position, part in enumerate(parts)]
+
+    def _render_value(self, value):
+        """Print a value as a VariableNode would, skipping the localisation machinery for str and int"""
+        if value is _MISSING:
+            return self.string_if_invalid
+        if value.__class__ is str and self.value_context.autoescape:
+            return html.escape(value)
+        if value.__class__ is int and not settings.USE_THOUSAND_SEPARATOR:
+            return str(value)
+        return render_value_in_context(value, self.value_context)
+
+    def render(self, context):
+        values = [self._resolve(context, lookups) for lookups in self.variables]
+        shape = (translation.get_language(),) + tuple(
+            value is not _MISSING and bool(value) for value in values)
+        parts = self.skeletons.get(shape)
+        if parts is None:
+            parts = self.skeletons[shape] = self._skeleton(shape)
+
+        output = []
+        for part in parts:
+            if part.__class__ is int:
+                output.append(self._render_value(values[part]))
+            else:
+                output.append(part)
+        return mark_safe(''.join(output))
+
+
+_compiled = {}
+
+
+def get_compiled_email(template_name):
+    """The CompiledEmail for a template, or None if it can't be precompiled"""
+    if template_name not in _compiled:
+        try:
+            _compiled[template_name] = CompiledEmail(template_name)
+        except Unsupported:
+            _compiled[template_name] = None
+    return _compiled[template_name]
+
+
+def render_email(template_name, context=None):
+    """Render an email template like render_to_string(), from its precompiled skeleton"""
+    compiled = get_compiled_email(template_name)
+    if compiled is None:
+        return render_to_string(template_name, context)
+    return compiled.render(context or {})
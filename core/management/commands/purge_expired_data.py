@@ -0,0 +1,75 @@
+import time
+from django.core.management.base import BaseCommand
+from core.retention import purge, retention_policies
+
+
+class Command(BaseCommand):
+    help = 'Delete notifications, verification codes, sent emails and payment webhooks past their retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policy',
+            action='append',
+            help='Only purge this policy (repeatable)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows deleted per transaction',
+        )
+        parser.add_argument(
+            '--throttle',
+            type=float,
+            metavar='SECONDS',
+            help='Pause between batches',
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            help='Stop after this long; the next run carries on',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count expired rows',
+        )
+
+    def handle(self, *args, **options):
+        policies = retention_policies()
+        if options['policy']:
+            unknown = set(options['policy']) - {policy.name for policy in policies}
+            if unknown:
+                self.stdout.write(self.style.ERROR(f"Unknown policies: {', '.join(sorted(unknown))}"))
+                return
+            policies = [policy for policy in policies if policy.name in options['policy']]
+
+        if options['dry_run']:
+            for policy in policies:
+                self.stdout.write(f'{policy.name}: {policy.expired.count()} rows expired')
+            self.stdout.write(self.style.WARNING('Dry run: nothing deleted'))
+            return
+
+        started = time.monotonic()
+        total = 0
+        stopped = False
+        for policy in policies:
+            policy_started = time.monotonic()
+            deleted = 0
+            for count in purge(policy, batch_size=options['batch_size'], throttle=options['throttle']):
+                deleted += count
+                if options['max_seconds'] and time.monotonic() - started >= options['max_seconds']:
+                    stopped = True
+                    break
+
+            elapsed = time.monotonic() - policy_started
+            rate = deleted / elapsed if elapsed else 0
+            self.stdout.write(f'{policy.name}: {deleted} rows deleted in {elapsed:.1f}s ({rate:.0f} rows/s)')
+            total += deleted
+            if stopped:
+                break
+
+        elapsed = time.monotonic() - started
+        message = f'Deleted {total} expired rows in {elapsed:.1f}s'
+        if stopped:
+            message += ' (time limit reached, the rest is purged next run)'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,124 @@
+"""
+Data retention.
+
+Rows past their retention period are purged table by table, following
+retention_policies(). A purge walks a policy's expired rows in primary key
+order, a batch at a time: it reads the next batch of primary keys, deletes
+them with one DELETE ... WHERE pk IN (...) in its own transaction, then
+sleeps for the throttle so other queries keep up. Nothing is loaded through
+the ORM's cascade collector and no transaction outlives its batch.
+
+A stopped purge loses nothing. Every finished batch is committed, and the
+next run picks up whatever is still expired.
+"""
+import time
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+# Days each policy keeps rows for
+DATA_RETENTION_DAYS = getattr(settings, 'DATA_RETENTION_DAYS', {
+    'sent_email_notifications': 30,
+    'notifications': 180,
+    'email_verifications': 1,
+    'outbound_emails': 30,
+    'payment_webhooks': 365,
+})
+RETENTION_BATCH_SIZE = getattr(settings, 'RETENTION_BATCH_SIZE', 1000)
+# Seconds to sleep between batches
+RETENTION_THROTTLE = getattr(settings, 'RETENTION_THROTTLE', 0.1)
+
+# expired is a queryset of the rows to purge. before_delete, if set, is
+# called with each batch's queryset inside its transaction, for the work
+# delete signals would otherwise have done.
+RetentionPolicy = namedtuple('RetentionPolicy', ['name', 'expired', 'before_delete'])
+
+
+def _release_unread(notifications):
+    """Take unread in-app notifications off their users' unread counts"""
+    from courses.inbox import adjust_unread_many
+    from courses.push import publish_unread_changed
+
+    unread = notifications.filter(in_app=True, is_read=False).order_by().values(
+        'user_id').annotate(total=Count('pk'))
+    deltas = {row['user_id']: -row['total'] for row in unread}
+    adjust_unread_many(deltas)
+    publish_unread_changed(list(deltas))
+
+
+def retention_policies(now=None):
+    from accounts.models import EmailVerification, OutboundEmail
+    from api.models import Notification
+    from payment.models import PaymentWebhook
+
+    now = now or timezone.now()
+
+    def cutoff(name):
+        return now - timedelta(days=DATA_RETENTION_DAYS[name])
+
+    return [
+        RetentionPolicy(
+            'sent_email_notifications',
+            Notification.objects.filter(
+                email=True, is_sent=True, created_at__lt=cutoff('sent_email_notifications')),
+            _release_unread
+        ),
+        RetentionPolicy(
+            'notifications',
+            # Emails still waiting to go out are kept
+            Notification.objects.filter(created_at__lt=cutoff('notifications')).exclude(
+                email=True, is_sent=False),
+            _release_unread
+        ),
+        RetentionPolicy(
+            'email_verifications',
+            EmailVerification.objects.filter(created_at__lt=cutoff('email_verifications')),
+            None
+        ),
+        RetentionPolicy(
+            'outbound_emails',
+            OutboundEmail.objects.filter(
+                status__in=['sent', 'failed'], created_at__lt=cutoff('outbound_emails')),
+            None
+        ),
+        RetentionPolicy(
+            'payment_webhooks',
+            # Webhooks that were never processed are kept for investigation
+            PaymentWebhook.objects.filter(created_at__lt=cutoff('payment_webhooks')).exclude(
+                status='received'),
+            None
+        ),
+    ]
+
+
+def purge(policy, batch_size=None, throttle=None):
+    """
+    Delete a policy's expired rows in primary key batches.
+    Yields the number of rows deleted per batch.
+    """
+    batch_size = batch_size or RETENTION_BATCH_SIZE
+    throttle = RETENTION_THROTTLE if throttle is None else throttle
+    expired = policy.expired.order_by('pk')
+    last_pk = None
+    while True:
+        remaining = expired if last_pk is None else expired.filter(pk__gt=last_pk)
+        pks = list(remaining.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        last_pk = pks[-1]
+
+        with transaction.atomic():
+            # Still expired: a row may have changed since its key was read
+            batch = policy.expired.order_by().filter(pk__in=pks)
+            if policy.before_delete:
+                policy.before_delete(batch)
+            # A plain DELETE, without the cascade collector or per-row signals;
+            # none of these tables has rows depending on it
+            deleted = batch._raw_delete(batch.db)
+        yield deleted
+
+        if throttle:
+            time.sleep(throttle)
@@ -0,0 +1,217 @@
+"""
+Sparse fieldsets for read endpoints.
+
+?fields=id,title limits a response to the named fields and ?expand=lessons
+adds nested relations on top of them. Nested fields can be narrowed with
+dotted names (?fields=id,lessons.title). The queryset is pruned with
+.only() to the columns the remaining fields read, and serialization runs
+through a per-field-set builder that reads plain model attributes directly
+instead of going through every DRF field.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
+
+# DRF fields whose representation of a native model value is the value itself
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.URLField, serializers.SlugField,
+    serializers.IntegerField, serializers.BooleanField, serializers.FloatField,
+    serializers.ChoiceField,
+)
+_GENERIC, _ATTRIBUTE, _CONVERT = range(3)
+
+
+def parse_field_list(value):
+    """Comma separated names from a query parameter, or None if it wasn't given"""
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def _split_nested(names):
+    top, nested = set(), {}
+    for name in names:
+        head, dot, rest = name.partition('.')
+        if dot:
+            nested.setdefault(head, []).append(rest)
+        else:
+            top.add(head)
+    return top, nested
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that drops the fields a request didn't ask for.
+
+    Meta.field_dependencies maps computed fields (method fields, extra keys)
+    to the model fields they read, so the queryset can still be pruned.
+    Meta.expandable_fields are left out unless named in expand or fields.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apply_sparse_fields(fields, expand)
+
+    def apply_sparse_fields(self, fields=None, expand=None):
+        top, nested = _split_nested(fields or [])
+        expand = set(expand or ())
+        for name in getattr(getattr(self, 'Meta', None), 'expandable_fields', ()):
+            if name not in expand and name not in top and name not in nested:
+                self.fields.pop(name, None)
+        if fields is None:
+            return
+
+        keep = top | set(nested) | expand
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+        for name, child_fields in nested.items():
+            field = self.fields.get(name)
+            child = getattr(field, 'child', field)
+            if isinstance(child, SparseFieldsMixin):
+                child.apply_sparse_fields(child_fields)
+
+    @classmethod
+    def field_dependencies(cls):
+        return getattr(getattr(cls, 'Meta', None), 'field_dependencies', {})
+
+    def prune_queryset(self, queryset, required=(), only=True):
+        """
+        Prefetch the nested relations that are still serialized and, with only,
+        restrict the queryset to the columns the kept fields read. If a field's
+        columns can't be worked out the columns are left alone.
+        """
+        model = queryset.model
+        dependencies = self.field_dependencies()
+        columns = {'pk', *required}
+        prunable = only
+
+        for name, field in self.fields.items():
+            child = getattr(field, 'child', field)
+            if isinstance(child, serializers.BaseSerializer):
+                queryset = queryset.prefetch_related(
+                    self._nested_prefetch(model, field.source, child, only))
+                continue
+            if name in dependencies:
+                columns.update(dependencies[name])
+                continue
+            if field.source == '*' or not self._is_column(model, field.source_attrs[0]):
+                prunable = False
+                continue
+            columns.add(field.source_attrs[0])
+
+        if prunable:
+            joined = queryset.query.select_related
+            if isinstance(joined, dict):
+                # A deferred foreign key can't be joined, and isn't needed anyway
+                queryset = queryset.select_related(None).select_related(
+                    *[name for name in joined if name in columns])
+            queryset = queryset.only(*columns)
+        return queryset
+
+    @staticmethod
+    def _is_column(model, name):
+        try:
+            return model._meta.get_field(name).concrete
+        except FieldDoesNotExist:
+            return False
+
+    @staticmethod
+    def _nested_prefetch(model, source, child, only):
+        relation = model._meta.get_field(source)
+        related_queryset = relation.related_model._default_manager.all()
+        if isinstance(child, SparseFieldsMixin) and relation.one_to_many:
+            # The reverse foreign key must stay loaded for the prefetch to match rows up
+            related_queryset = child.prune_queryset(
+                related_queryset, required=[relation.field.name], only=only)
+        return Prefetch(source, queryset=related_queryset)
+
+    def _plain_dict_builder(self):
+        """
+        (name, kind, attribute) per kept field. Cached on the class for
+        each field set, since the same few field sets are requested over and over.
+        """
+        cache = self.__class__.__dict__.get('_builder_cache')
+        if cache is None:
+            cache = {}
+            setattr(self.__class__, '_builder_cache', cache)
+
+        key = tuple(self.fields)
+        plan = cache.get(key)
+        if plan is None:
+            model = self.Meta.model
+            plan = []
+            for name, field in self.fields.items():
+                if field.write_only:
+                    continue
+                kind, attribute = _GENERIC, None
+                source = field.source_attrs[0] if len(field.source_attrs) == 1 else None
+                if source and self._is_column(model, source):
+                    model_field = model._meta.get_field(source)
+                    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                        kind, attribute = _ATTRIBUTE, model_field.attname
+                    elif type(field) in _PASSTHROUGH_FIELDS or (
+                            isinstance(field, serializers.JSONField) and not field.binary):
+                        kind, attribute = _ATTRIBUTE, source
+                    elif isinstance(field, (serializers.DateTimeField, serializers.DateField)):
+                        kind, attribute = _CONVERT, source
+                plan.append((name, kind, attribute))
+            cache[key] = plan
+        return plan
+
+    def to_representation(self, instance):
+        fields = self.fields
+        data = {}
+        for name, kind, attribute in self._plain_dict_builder():
+            if kind == _ATTRIBUTE:
+                data[name] = getattr(instance, attribute)
+            elif kind == _CONVERT:
+                value = getattr(instance, attribute)
+                data[name] = None if value is None else fields[name].to_representation(value)
+            else:
+                # Anything else goes through DRF exactly as ModelSerializer would
+                field = fields[name]
+                try:
+                    attribute_value = field.get_attribute(instance)
+                except serializers.SkipField:
+                    continue
+                check_for_none = attribute_value.pk if isinstance(attribute_value, PKOnlyObject) else attribute_value
+                data[name] = None if check_for_none is None else field.to_representation(attribute_value)
+        return data
+
+
+class SparseFieldsViewSetMixin:
+    """
+    ViewSet mixin that passes ?fields= / ?expand= to the serializer and prunes
+    the queryset to match on list, retrieve and batch.
+    """
+    sparse_actions = ('list', 'retrieve', 'batch')
+    # Model fields the view itself reads besides the serialized ones
+    sparse_required_fields = ()
+
+    def get_sparse_fields(self):
+        if self.action not in self.sparse_actions:
+            return None, None
+        params = self.request.query_params
+        return parse_field_list(params.get('fields')), parse_field_list(params.get('expand'))
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_sparse_fields()
+        if fields is not None or expand is not None:
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if self.action not in self.sparse_actions or not issubclass(serializer_class, SparseFieldsMixin):
+            return queryset
+        # Nested relations are prefetched on every read; columns only shrink for ?fields=
+        fields, expand = self.get_sparse_fields()
+        serializer = serializer_class(
+            context=self.get_serializer_context(), fields=fields, expand=expand)
+        return serializer.prune_queryset(
+            queryset, required=self.sparse_required_fields, only=fields is not None)
@@ -0,0 +1,69 @@
+import os
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+from django.utils import translation
+from core.email_templates import get_compiled_email, render_email
+
+# Leaf values covering escaping, numbers and every falsy kind
+SAMPLES = ['Ali <b>&"\'', 12000, 3.5, 0, '', None, [], True]
+# Leaves the variable out of the context altogether
+_SKIP = object()
+
+
+def email_templates():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        emails = os.path.join(directory, 'emails')
+        if os.path.isdir(emails):
+            for name in sorted(os.listdir(emails)):
+                if name.endswith('.html'):
+                    yield f'emails/{name}'
+
+
+def build_context(variables, pick):
+    """Nested dicts providing every variable, with leaves chosen by pick(index)"""
+    context = {}
+    for index, lookups in enumerate(variables):
+        value = pick(index)
+        parent = context
+        for bit in lookups[:-1]:
+            child = parent.get(bit)
+            if not isinstance(child, dict):
+                child = parent[bit] = {}
+            parent = child
+        if value is not _SKIP and not isinstance(parent.get(lookups[-1]), dict):
+            parent[lookups[-1]] = value
+    return context
+
+
+class RenderEmailTests(SimpleTestCase):
+    def assertRendersLikeDjango(self, template_name, context):
+        self.assertEqual(render_email(template_name, context), render_to_string(template_name, context))
+
+    def test_templates_match_render_to_string(self):
+        templates = list(email_templates())
+        self.assertTrue(templates)
+        for template_name in templates:
+            compiled = get_compiled_email(template_name)
+            variables = compiled.variables if compiled else []
+            for offset in range(len(SAMPLES) + 1):
+                pickers = [
+                    lambda index: (SAMPLES + [_SKIP])[(index + offset) % (len(SAMPLES) + 1)],
+                    lambda index: SAMPLES[offset % len(SAMPLES)],
+                ]
+                for pick in pickers:
+                    context = build_context(variables, pick)
+                    with self.subTest(template=template_name, context=context):
+                        self.assertRendersLikeDjango(template_name, context)
+
+    def test_missing_context(self):
+        for template_name in email_templates():
+            with self.subTest(template=template_name):
+                self.assertEqual(render_email(template_name), render_to_string(template_name))
+
+    def test_skeletons_are_kept_per_language(self):
+        template_name = next(name for name in email_templates() if get_compiled_email(name))
+        context = build_context(get_compiled_email(template_name).variables, lambda index: 'Ali')
+        for language in ('en', 'so'):
+            with translation.override(language), self.subTest(language=language):
+                self.assertRendersLikeDjango(template_name, context)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import EmailVerification, OutboundEmail
+from api.models import Notification
+from courses.inbox import get_unread_count
+from core.retention import purge, retention_policies
+from payment.models import PaymentWebhook
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.old = timezone.now() - timedelta(days=400)
+
+    def policy(self, name):
+        return next(policy for policy in retention_policies() if policy.name == name)
+
+    def notify(self, **fields):
+        fields.setdefault('websocket', False)
+        return Notification.objects.create(user=self.user, type='system', title='Hello', message='Hello', **fields)
+
+    def age(self, model):
+        model.objects.update(created_at=self.old)
+
+    def purge_command(self, *args):
+        out = StringIO()
+        call_command('purge_expired_data', *args, stdout=out)
+        return out.getvalue()
+
+    def test_notifications_are_purged_in_batches(self):
+        for n in range(5):
+            self.notify(is_read=n % 2 == 0)
+        pending = self.notify(in_app=False, email=True)
+        self.age(Notification)
+        recent = self.notify()
+
+        self.assertEqual(list(purge(self.policy('notifications'), batch_size=2, throttle=0)), [2, 2, 1])
+        self.assertCountEqual(Notification.objects.values_list('pk', flat=True), [pending.pk, recent.pk])
+
+    def test_purged_unread_rows_release_the_counter(self):
+        for n in range(4):
+            self.notify(is_read=n == 0)
+        self.notify(in_app=False, email=True, is_sent=True)
+        self.age(Notification)
+        self.notify()
+        self.assertEqual(get_unread_count(self.user.pk), 4)
+
+        for name in ('sent_email_notifications', 'notifications'):
+            list(purge(self.policy(name), batch_size=2, throttle=0))
+
+        self.assertEqual(get_unread_count(self.user.pk), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_other_policies_keep_live_rows(self):
+        EmailVerification.objects.create(user=self.user, code='123456')
+        for status in ('sent', 'failed', 'pending', 'sending'):
+            OutboundEmail.objects.create(
+                to_email='learner@example.com', from_email='team@example.com', subject=status, html='Hi', status=status)
+        for status in ('processed', 'received'):
+            PaymentWebhook.objects.create(provider='waafi', event_type='payment', status=status, raw_data={})
+        for model in (EmailVerification, OutboundEmail, PaymentWebhook):
+            self.age(model)
+        EmailVerification.objects.create(user=self.user, code='654321')
+
+        self.purge_command('--batch-size', '1', '--throttle', '0')
+
+        self.assertEqual(list(EmailVerification.objects.values_list('code', flat=True)), ['654321'])
+        self.assertCountEqual(OutboundEmail.objects.values_list('subject', flat=True), ['pending', 'sending'])
+        self.assertEqual(list(PaymentWebhook.objects.values_list('status', flat=True)), ['received'])
+
+    def test_command_options(self):
+        self.notify()
+        self.age(Notification)
+        EmailVerification.objects.create(user=self.user, code='123456')
+        self.age(EmailVerification)
+
+        output = self.purge_command('--dry-run')
+        self.assertIn('notifications: 1 rows expired', output)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        self.assertIn('Unknown policies: nope', self.purge_command('--policy', 'nope'))
+        self.assertEqual(EmailVerification.objects.count(), 1)
+
+        self.purge_command('--policy', 'email_verifications')
+        self.assertFalse(EmailVerification.objects.exists())
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,185 @@
+"""
+Rule-driven achievement evaluation.
+
+Each rule compares one learner stat against a threshold. Stats for a batch
+of users come from a single annotated query, the Achievement catalogue is
+cached, and new awards are written with one bulk insert.
+"""
+import logging
+from collections import namedtuple
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from api.models import Streak
+from .cache import ACHIEVEMENT_CATALOGUE_CACHE_KEY, ACHIEVEMENT_CATALOGUE_CACHE_TIMEOUT
+from .models import (
+    Achievement, UserAchievement, UserProgress, CourseEnrollment,
+    UserChallengeProgress, UserLevel
+)
+
+logger = logging.getLogger(__name__)
+
+Rule = namedtuple('Rule', ['stat', 'threshold'])
+
+# Rules for catalogue entries, keyed by Achievement.icon (see create_achievements)
+ACHIEVEMENT_RULES = {
+    'first-challenge': Rule('challenges_completed', 1),
+    'weekly-master': Rule('challenges_completed', 7),
+    'monthly-master': Rule('challenges_completed', 30),
+    'perfect-score': Rule('perfect_scores', 1),
+    'course-master': Rule('courses_completed', 1),
+    'streak-master': Rule('max_streak', 7),
+}
+
+# Rules shared by every achievement of a type; the threshold comes from the row
+TYPE_RULES = {
+    'level_milestone': 'level',
+}
+
+# Which stats an event can change, so unrelated rules are skipped
+EVENT_STATS = {
+    'lesson_completed': {'lessons_completed', 'perfect_scores', 'courses_completed', 'level', 'max_streak'},
+    'problem_solved': {'perfect_scores', 'courses_completed', 'level'},
+    'challenge_completed': {'challenges_completed', 'level'},
+}
+
+CatalogueEntry = namedtuple('CatalogueEntry', ['id', 'name', 'rule'])
+
+
+def _count(model, **filters):
+    """Correlated COUNT(*) subquery on a user-owned model"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(user=OuterRef('pk'), **filters)
+            .order_by()
+            .values('user')
+            .annotate(total=Count('pk'))
+            .values('total')[:1],
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+STAT_EXPRESSIONS = {
+    'lessons_completed': lambda: _count(UserProgress, status='completed'),
+    'perfect_scores': lambda: _count(UserProgress, status='completed', score=100),
+    'courses_completed': lambda: _count(CourseEnrollment, progress_percent__gte=100),
+    'challenges_completed': lambda: _count(UserChallengeProgress, completed=True),
+    'level': lambda: Coalesce(
+        Subquery(UserLevel.objects.filter(user=OuterRef('pk')).values('level')[:1]),
+        Value(1)
+    ),
+    'max_streak': lambda: Coalesce(
+        Subquery(Streak.objects.filter(user=OuterRef('pk')).values('max_streak')[:1]),
+        Value(0)
+    ),
+}
+
+
+class AchievementEngine:
+    """
+    Evaluates achievement rules against per-user stats snapshots.
+    """
+
+    @staticmethod
+    def catalogue():
+        """Achievements that have a rule, cached until the catalogue changes"""
+        entries = cache.get(ACHIEVEMENT_CATALOGUE_CACHE_KEY)
+        if entries is None:
+            entries = []
+            for achievement in Achievement.objects.only(
+                'id', 'name', 'icon', 'achievement_type', 'level_required'
+            ):
+                rule = ACHIEVEMENT_RULES.get(achievement.icon)
+                if rule is None and achievement.achievement_type in TYPE_RULES:
+                    rule = Rule(TYPE_RULES[achievement.achievement_type], achievement.level_required)
+                if rule is not None:
+                    entries.append(CatalogueEntry(achievement.id, achievement.name, rule))
+            cache.set(ACHIEVEMENT_CATALOGUE_CACHE_KEY, entries, ACHIEVEMENT_CATALOGUE_CACHE_TIMEOUT)
+        return entries
+
+    @staticmethod
+    def build_stats(user_ids, stats=None):
+        """
+        Return {user_id: {stat: value}} for the given users in one query.
+        """
+        stats = list(stats or STAT_EXPRESSIONS)
+        # Prefixed so stat names can't clash with user fields or relations (e.g. "level")
+        aliases = {f'stat_{name}': name for name in stats}
+        rows = get_user_model().objects.filter(pk__in=user_ids).annotate(
+            **{alias: STAT_EXPRESSIONS[name]() for alias, name in aliases.items()}
+        ).values_list('pk', *aliases)
+        return {row[0]: dict(zip(stats, row[1:])) for row in rows}
+
+    @staticmethod
+    def evaluate_users(user_ids, event=None):
+        """
+        Award every achievement the given users now qualify for.
+        With an event only the rules that event can affect are checked.
+        Returns {user_id: [achievement ids awarded]}.
+        """
+        user_ids = list(user_ids)
+        relevant = EVENT_STATS.get(event) if event else None
+        rules = [
+            entry for entry in AchievementEngine.catalogue()
+            if relevant is None or entry.rule.stat in relevant
+        ]
+        if not rules or not user_ids:
+            return {}
+
+        earned = set(UserAchievement.objects.filter(
+            user_id__in=user_ids,
+            achievement_id__in=[entry.id for entry in rules]
+        ).values_list('user_id', 'achievement_id'))
+
+        snapshots = AchievementEngine.build_stats(
+            user_ids, {entry.rule.stat for entry in rules})
+
+        awarded = {}
+        for user_id, stats in snapshots.items():
+            for entry in rules:
+                if (user_id, entry.id) in earned:
+                    continue
+                if stats[entry.rule.stat] >= entry.rule.threshold:
+                    awarded.setdefault(user_id, []).append(entry.id)
+
+        if awarded:
+            UserAchievement.objects.bulk_create([
+                UserAchievement(user_id=user_id, achievement_id=achievement_id)
+                for user_id, achievement_ids in awarded.items()
+                for achievement_id in achievement_ids
+            ], ignore_conflicts=True)
+        return awarded
+
+    @staticmethod
+    def evaluate(user, event=None):
+        """
+        Evaluate one user after an event. Never raises, so callers on the
+        request path are not broken by a bad catalogue entry.
+        """
+        try:
+            # Savepoint, so a failure can't poison the caller's transaction
+            with transaction.atomic():
+                return AchievementEngine.evaluate_users([user.pk], event).get(user.pk, [])
+        except Exception:
+            logger.exception('Achievement evaluation failed for user %s', user.pk)
+            return []
+
+    @staticmethod
+    def backfill(chunk_size=1000, event=None):
+        """
+        Evaluate every user in primary-key chunks.
+        Yields (users evaluated, achievements awarded) per chunk.
+        """
+        users = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        while True:
+            chunk = list(users.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                return
+            last_pk = chunk[-1]
+            awarded = AchievementEngine.evaluate_users(chunk, event)
+            yield len(chunk), sum(len(ids) for ids in awarded.values())
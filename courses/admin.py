@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     Category, Course, Lesson, LessonContentBlock,
     Problem, Hint, SolutionStep,
-    UserProgress, CourseEnrollment, UserReward, LeaderboardEntry
+    UserProgress, CourseEnrollment, UserReward, LeaderboardEntry, ProblemStats
 )
 from django.core.exceptions import ValidationError
 
@@ -193,6 +193,16 @@ class LeaderboardEntryAdmin(admin.ModelAdmin):
     ordering = ['-points']
 
 
+class ProblemStatsAdmin(admin.ModelAdmin):
+    list_display = ['problem', 'learner_count', 'solve_rate',
+                    'attempts_mean', 'time_mean', 'updated_at']
+    list_filter = ['problem__lesson__course']
+    search_fields = ['problem__question_text']
+    ordering = ['solve_rate']
+    raw_id_fields = ['problem']
+    readonly_fields = ['updated_at']
+
+
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Course, CourseAdmin)
 admin.site.register(Lesson, LessonAdmin)
@@ -204,3 +214,4 @@ admin.site.register(UserProgress, UserProgressAdmin)
 admin.site.register(CourseEnrollment, CourseEnrollmentAdmin)
 admin.site.register(UserReward, UserRewardAdmin)
 admin.site.register(LeaderboardEntry, LeaderboardEntryAdmin)
+admin.site.register(ProblemStats, ProblemStatsAdmin)
@@ -0,0 +1,77 @@
+"""
+Cache keys and invalidation helpers for course content.
+"""
+from django.core.cache import cache
+
+LESSON_CONTENT_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+
+def lesson_content_cache_key(lesson_id):
+    return f'lesson_content_{lesson_id}'
+
+
+def invalidate_lesson_content(*lesson_ids):
+    """
+    Drop the cached content bundle for the given lessons.
+    """
+    keys = [lesson_content_cache_key(lesson_id) for lesson_id in lesson_ids if lesson_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+LESSON_SEQUENCE_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def lesson_sequence_cache_key(course_id):
+    return f'lesson_sequence_{course_id}'
+
+
+def invalidate_lesson_sequence(*course_ids):
+    """
+    Drop the cached lesson ordering for the given courses.
+    """
+    keys = [lesson_sequence_cache_key(course_id) for course_id in course_ids if course_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+PROBLEM_CHECKER_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def problem_checker_cache_key(problem_id, version):
+    # Versioned by Problem.updated_at, so edits never need an explicit delete
+    return f'problem_checker_{problem_id}_{version}'
+
+
+ACHIEVEMENT_CATALOGUE_CACHE_KEY = 'achievement_catalogue'
+ACHIEVEMENT_CATALOGUE_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+
+def invalidate_achievement_catalogue():
+    cache.delete(ACHIEVEMENT_CATALOGUE_CACHE_KEY)
+
+
+CATALOG_SNAPSHOT_CACHE_KEY = 'catalog_snapshot'
+CATALOG_SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+# (content digest, when it was first built); outlives the snapshot itself
+CATALOG_CHANGED_CACHE_KEY = 'catalog_changed'
+
+
+def invalidate_catalog_snapshot():
+    cache.delete(CATALOG_SNAPSHOT_CACHE_KEY)
+
+
+LEARNING_CONTEXT_CACHE_TIMEOUT = 60  # 1 minute
+
+
+def learning_context_cache_key(user_id):
+    return f'learning_context_{user_id}'
+
+
+def invalidate_learning_context(*user_ids):
+    """
+    Drop the cached email learning context for the given users.
+    """
+    keys = [learning_context_cache_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,101 @@
+"""
+Pre-rendered catalog snapshot: categories -> courses -> lesson headers.
+
+The snapshot is rendered to JSON and gzip-compressed once, then cached until
+a category, course or lesson changes. Its version is a digest of the
+content, and Last-Modified is when that digest was first built, so both
+validators move together on any edit, including category edits and deletes
+that leave no updated_at behind.
+"""
+import gzip
+import hashlib
+import json
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from .cache import CATALOG_CHANGED_CACHE_KEY, CATALOG_SNAPSHOT_CACHE_KEY, CATALOG_SNAPSHOT_CACHE_TIMEOUT
+from .models import Category, Course, Lesson
+
+# posts_count is left out on purpose: new community posts shouldn't invalidate the catalog
+CATEGORY_FIELDS = [
+    'id', 'title', 'description', 'image', 'in_progress',
+    'is_community_enabled', 'community_description'
+]
+COURSE_FIELDS = [
+    'id', 'category_id', 'title', 'slug', 'description', 'thumbnail', 'is_new',
+    'author_id', 'is_published', 'lesson_count', 'problem_count',
+    'created_at', 'updated_at'
+]
+LESSON_FIELDS = [
+    'id', 'course_id', 'title', 'slug', 'lesson_number',
+    'estimated_time', 'is_published', 'problem_count'
+]
+
+
+class CatalogSnapshot:
+    """
+    A rendered catalog document and its validators.
+    """
+    def __init__(self, version, last_modified, body):
+        self.version = version
+        self.last_modified = last_modified
+        self.gzipped = gzip.compress(body, compresslevel=9)
+        self.size = len(body)
+
+    def etag(self, gzipped):
+        """Strong validator of one encoding; the gzip and identity bodies differ byte for byte"""
+        return f'"catalog-{self.version}{"-gzip" if gzipped else ""}"'
+
+    @property
+    def body(self):
+        return gzip.decompress(self.gzipped)
+
+
+def _changed_at(digest):
+    """When the catalog content with this digest was first built"""
+    changed = cache.get(CATALOG_CHANGED_CACHE_KEY)
+    if changed is not None and changed[0] == digest:
+        return changed[1]
+    # New content, or the record was evicted: either way clients refetch once.
+    # HTTP dates have whole seconds, so a change always moves them forward by one.
+    changed_at = timezone.now().replace(microsecond=0)
+    if changed is not None:
+        changed_at = max(changed_at, changed[1] + timedelta(seconds=1))
+    cache.set(CATALOG_CHANGED_CACHE_KEY, (digest, changed_at), None)
+    return changed_at
+
+
+def build_catalog_snapshot():
+    lessons_by_course = {}
+    for lesson in Lesson.objects.order_by('lesson_number', 'id').values(*LESSON_FIELDS):
+        lessons_by_course.setdefault(lesson.pop('course_id'), []).append(lesson)
+
+    courses_by_category = {}
+    for course in Course.objects.order_by('-created_at').values(*COURSE_FIELDS):
+        course['lessons'] = lessons_by_course.get(course['id'], [])
+        courses_by_category.setdefault(course.pop('category_id'), []).append(course)
+
+    categories = []
+    for category in Category.objects.order_by('title').values(*CATEGORY_FIELDS):
+        category['courses'] = courses_by_category.get(category['id'], [])
+        categories.append(category)
+
+    content = json.dumps(categories, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    digest = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+    last_modified = _changed_at(digest)
+
+    body = json.dumps(
+        {'generated_at': last_modified, 'categories': categories},
+        cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+    version = f'{int(last_modified.timestamp())}-{digest}'
+    return CatalogSnapshot(version, last_modified, body)
+
+
+def get_catalog_snapshot():
+    snapshot = cache.get(CATALOG_SNAPSHOT_CACHE_KEY)
+    if snapshot is None:
+        snapshot = build_catalog_snapshot()
+        cache.set(CATALOG_SNAPSHOT_CACHE_KEY, snapshot, CATALOG_SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
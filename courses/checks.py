@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries live inside one process
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cached lesson content, lesson sequences and the catalog snapshot are
+    invalidated by deleting their keys. With a per-process cache, a delete
+    from one worker or a management command never reaches the others, which
+    keep serving stale content until the entries expire.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        'The default cache is per process, so course content invalidations '
+        'do not reach other workers.',
+        hint='Set REDIS_URL (or CACHES) to a cache shared by every process.',
+        id='courses.W001',
+    )]
@@ -0,0 +1,70 @@
+import asyncio
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from .inbox import get_unread_count
+from .push import notification_group
+
+# Seconds to gather notifications before pushing them as one message
+NOTIFICATION_PUSH_WINDOW = getattr(settings, 'NOTIFICATION_PUSH_WINDOW', 0.5)
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    A user's live notifications at ws/notifications/?token=<access token>.
+
+    Sends {"type": "notifications", "notifications": [...], "unread_count": n}
+    on connect and whenever notifications arrive or the unread count changes,
+    so connected clients don't need to poll. Whatever arrives within
+    NOTIFICATION_PUSH_WINDOW goes out together.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.group_name = None
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group_name = notification_group(self.user.id)
+        self.pending = []
+        self.flush_task = None
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.flush()
+
+    async def disconnect(self, close_code):
+        if self.group_name is None:
+            return
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content):
+        # Clients can ask for a fresh count, e.g. after waking from sleep
+        if content.get('type') == 'unread_count':
+            await self.flush()
+
+    async def notification_created(self, event):
+        self.pending.extend(event['notifications'])
+        self.schedule_flush()
+
+    async def unread_changed(self, event):
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(NOTIFICATION_PUSH_WINDOW)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        notifications, self.pending = self.pending, []
+        await self.send_json({
+            'type': 'notifications',
+            'notifications': notifications,
+            'unread_count': await database_sync_to_async(get_unread_count)(self.user.id),
+        })
@@ -0,0 +1,89 @@
+"""
+Denormalized content counters.
+
+Course.lesson_count, Course.problem_count, Lesson.problem_count and
+Category.posts_count are kept current with single-row F() updates from
+signals, as is the unread count on NotificationCounter (see courses.inbox).
+reconcile_counters() recomputes them from scratch to repair drift.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from .cache import invalidate_catalog_snapshot
+from .models import Category, Course, Lesson, NotificationCounter, Problem
+
+
+def _bump(queryset, field, delta):
+    if delta:
+        queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def adjust_lesson_count(course_id, delta):
+    if course_id:
+        _bump(Course.objects.filter(pk=course_id), 'lesson_count', delta)
+
+
+def adjust_course_problem_count(course_id, delta):
+    if course_id:
+        _bump(Course.objects.filter(pk=course_id), 'problem_count', delta)
+
+
+def adjust_problem_count(lesson_id, delta):
+    """Problems count towards both their lesson and the lesson's course"""
+    if lesson_id:
+        _bump(Lesson.objects.filter(pk=lesson_id), 'problem_count', delta)
+        _bump(Course.objects.filter(lessons__id=lesson_id), 'problem_count', delta)
+
+
+def adjust_posts_count(category_id, delta):
+    if category_id:
+        _bump(Category.objects.filter(pk=category_id), 'posts_count', delta)
+
+
+def _count_subquery(queryset, outer_field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{outer_field: OuterRef('pk')})
+            .order_by()
+            .values(outer_field)
+            .annotate(total=Count('pk'))
+            .values('total')[:1],
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def counter_definitions():
+    """(model, counter field, expression computing the true value)"""
+    from api.models import Notification
+    from community.models import Post
+    return [
+        (Course, 'lesson_count', _count_subquery(Lesson.objects.all(), 'course')),
+        (Course, 'problem_count', _count_subquery(Problem.objects.all(), 'lesson__course')),
+        (Lesson, 'problem_count', _count_subquery(Problem.objects.all(), 'lesson')),
+        (Category, 'posts_count', _count_subquery(Post.objects.all(), 'category')),
+        (NotificationCounter, 'notification_unread',
+         _count_subquery(Notification.objects.filter(in_app=True, is_read=False), 'user')),
+    ]
+
+
+def reconcile_counters(dry_run=False):
+    """
+    Fix every counter that drifted from its true value.
+    Returns {'Model.field': rows corrected}.
+    """
+    report = {}
+    for model, field, expression in counter_definitions():
+        drifted = model.objects.annotate(
+            actual=expression
+        ).exclude(**{field: F('actual')})
+        count = drifted.count()
+        if count and not dry_run:
+            model.objects.filter(
+                pk__in=drifted.values('pk')
+            ).update(**{field: expression})
+        report[f'{model.__name__}.{field}'] = count
+    if any(report.values()) and not dry_run:
+        # Queryset updates skip the signals that normally do this
+        invalidate_catalog_snapshot()
+    return report
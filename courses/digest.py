@@ -0,0 +1,194 @@
+"""
+Notification digests.
+
+Notifications that would otherwise go out one at a time (completion and
+reminder emails, in-app gamification events) are buffered per user and
+channel as NotificationEvent rows. The user's first event opens a digest
+window. When it closes, flush_digests() merges everything buffered into
+one email or one in-app Notification:
+
+- events of a type with the same key are deduplicated by the type's rule,
+  keeping the first or the latest one
+- the rest are ordered by their type's priority, and the top event names
+  the digest
+
+A window of 0 seconds delivers every event on its own right away.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from accounts.email_delivery import enqueue_emails
+from api.models import Notification
+from core.email_templates import render_email
+from .inbox import adjust_unread_many
+from .models import NotificationEvent
+from .push import publish_notifications
+
+logger = logging.getLogger(__name__)
+
+# Seconds events are buffered for, per channel
+NOTIFICATION_DIGEST_WINDOWS = getattr(settings, 'NOTIFICATION_DIGEST_WINDOWS', {
+    'email': 60 * 60,
+    'in_app': 10 * 60,
+})
+DIGEST_TEMPLATE = 'emails/notification_digest.html'
+
+# type: (priority, keep). Lower priorities lead the digest; keep is which
+# event of a key survives, 'first' or 'latest'.
+DIGEST_RULES = {
+    # In-app
+    'league': (0, 'latest'),
+    'achievement': (1, 'latest'),
+    'streak': (2, 'latest'),
+    'streak_decay_warning': (3, 'latest'),
+    'energy_full': (4, 'latest'),
+    # Email
+    'lesson_completion': (0, 'first'),
+    'problem_completion': (1, 'latest'),
+    'daily_reminder': (2, 'latest'),
+}
+DEFAULT_RULE = (5, 'latest')
+
+
+def buffer_notification(user, channel, type, title, message, data=None, key=None):
+    """Add a notification to the user's digest for the channel"""
+    window = NOTIFICATION_DIGEST_WINDOWS.get(channel, 0)
+    event = NotificationEvent(
+        user=user,
+        channel=channel,
+        type=type,
+        key=key or type,
+        title=title,
+        message=message,
+        data=data or {},
+        digest_after=timezone.now() + timedelta(seconds=window)
+    )
+    if window > 0:
+        event.save()
+    else:
+        deliver_digests({(user.pk, channel): [event]})
+    return event
+
+
+def merge_events(events):
+    """Deduplicate events (oldest first) by their rules and order them by priority"""
+    kept = {}
+    for event in events:
+        _, keep = DIGEST_RULES.get(event.type, DEFAULT_RULE)
+        if keep == 'first':
+            kept.setdefault((event.type, event.key), event)
+        else:
+            kept[(event.type, event.key)] = event
+    # sorted() is stable, so events of equal priority stay in arrival order
+    return sorted(kept.values(), key=lambda event: DIGEST_RULES.get(event.type, DEFAULT_RULE)[0])
+
+
+def _in_app_digest(user_id, events):
+    top = events[0]
+    if len(events) == 1:
+        return Notification(user_id=user_id, type=top.type, title=top.title, message=top.message, data=top.data)
+    return Notification(
+        user_id=user_id,
+        type=top.type,
+        title=top.title,
+        message='\n'.join(event.message for event in events),
+        data=dict(top.data, digest=[
+            {'type': event.type, 'title': event.title, 'message': event.message, 'data': event.data}
+            for event in events
+        ])
+    )
+
+
+def _email_digest(user, context, events):
+    """(subject, html) of a digest email"""
+    context = dict(context or {})
+    context.setdefault('user', user)
+    context.setdefault('site_url', 'https://garaad.org')
+    top = events[0]
+    # A lone event keeps its own email where it has one
+    template = top.data.get('template') if len(events) == 1 else None
+    if template:
+        context.update(top.data)
+        return top.title, render_email(template, context)
+
+    context['items'] = [{'title': event.title, 'message': event.message} for event in events]
+    subject = top.title if len(events) == 1 else f'{top.title} (+{len(events) - 1})'
+    return subject, render_email(DIGEST_TEMPLATE, context)
+
+
+def deliver_digests(groups):
+    """
+    Merge and deliver digests. groups maps (user_id, channel) to its events,
+    oldest first. Returns how many digests were delivered.
+    """
+    # Imported here because courses.services buffers through this module
+    from .services import get_user_learning_contexts
+
+    notifications = []
+    emails = {}
+    for (user_id, channel), events in groups.items():
+        events = merge_events(events)
+        if channel == 'email':
+            emails[user_id] = events
+        else:
+            notifications.append(_in_app_digest(user_id, events))
+    Notification.objects.bulk_create(notifications)
+    # bulk_create skips the signals that count and push new notifications
+    adjust_unread_many({notification.user_id: 1 for notification in notifications})
+    publish_notifications(notifications)
+
+    messages = []
+    if emails:
+        users = get_user_model().objects.in_bulk(list(emails))
+        contexts = get_user_learning_contexts(list(emails))
+        for user_id, events in emails.items():
+            user = users.get(user_id)
+            if user is None or not user.email:
+                continue
+            try:
+                subject, html = _email_digest(user, contexts.get(user_id), events)
+            except Exception:
+                logger.exception('Rendering the notification digest failed for user %s', user_id)
+                continue
+            messages.append({
+                'to_email': user.email,
+                'subject': subject,
+                'html': html,
+                'dedupe_key': f'digest:{min(event.digest_after for event in events).isoformat()}',
+            })
+        enqueue_emails(messages)
+    return len(notifications) + len(messages)
+
+
+def flush_digests(now=None, chunk_size=500):
+    """
+    Deliver every digest whose window has closed, a chunk of users at a time.
+    Delivered events are deleted. Yields the number of digests per chunk.
+    """
+    now = now or timezone.now()
+    due_users = NotificationEvent.objects.filter(digest_after__lte=now).order_by(
+        'user_id').values_list('user_id', flat=True).distinct()
+    last_id = 0
+    while True:
+        chunk = list(due_users.filter(user_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]
+
+        with transaction.atomic():
+            # Another flusher holding these rows delivers them instead
+            events = NotificationEvent.objects.select_for_update(skip_locked=True).filter(user_id__in=chunk)
+            groups = {}
+            for event in events:
+                groups.setdefault((event.user_id, event.channel), []).append(event)
+            groups = {
+                group: events for group, events in groups.items()
+                if min(event.digest_after for event in events) <= now
+            }
+            delivered = deliver_digests(groups)
+            NotificationEvent.objects.filter(
+                pk__in=[event.pk for events in groups.values() for event in events]).delete()
+        yield delivered
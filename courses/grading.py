@@ -0,0 +1,185 @@
+"""
+Precompiled answer checkers for problems.
+
+A checker holds the correct answer already normalised for its question
+type, so grading a submission is a set lookup or a string compare.
+Math expressions are also compared by canonical form (see mathexpr).
+Checkers are cached per problem and keyed by Problem.updated_at, so
+editing a problem automatically retires the old checker.
+"""
+import json
+import re
+from django.core.cache import cache
+from .cache import PROBLEM_CHECKER_CACHE_TIMEOUT, problem_checker_cache_key
+from .mathexpr import canonical_form, equivalent
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Bump when AnswerChecker's stored layout or the canonical forms it holds change,
+# so stale cached checkers are ignored
+CHECKER_FORMAT = 3
+
+# Unicode operators people paste in from word processors
+_MATH_REPLACEMENTS = (
+    ('×', '*'), ('·', '*'), ('÷', '/'), ('−', '-'), ('**', '^'),
+)
+
+
+def normalize_text(value):
+    """Lowercase, strip and collapse inner whitespace"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return _WHITESPACE.sub(' ', str(value)).strip().lower()
+
+
+def normalize_math(value):
+    """Whitespace- and case-insensitive form of a math expression"""
+    text = str(value).lower()
+    for old, new in _MATH_REPLACEMENTS:
+        text = text.replace(old, new)
+    return _WHITESPACE.sub('', text)
+
+
+def answer_key(value):
+    """
+    Reduce one answer entry to a hashable key.
+    Option dicts are identified by id (or text), everything else by its normalised text.
+    """
+    if isinstance(value, dict):
+        if 'id' in value:
+            return normalize_text(value['id'])
+        if 'text' in value:
+            return normalize_text(value['text'])
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, (list, tuple)):
+        return json.dumps([answer_key(item) for item in value])
+    return normalize_text(value)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _answer_texts(value):
+    """Text alternatives from a string, a list of strings or a list of option dicts"""
+    texts = []
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            item = item.get('text', item.get('id'))
+        text = normalize_text(item)
+        if text:
+            texts.append(text)
+    return texts
+
+
+class AnswerChecker:
+    """
+    Grades submissions for a single problem version.
+    """
+    def __init__(self, problem_id, version, question_type, accepted):
+        self.problem_id = problem_id
+        self.version = version
+        self.question_type = question_type
+        self.accepted = accepted
+
+    def check(self, answer):
+        """Return True if the submitted answer is correct"""
+        question_type = self.question_type
+        if question_type == 'multiple_choice':
+            # One correct option, or the exact set of correct options
+            if isinstance(answer, (list, tuple)):
+                return bool(answer) and {answer_key(item) for item in answer} == self.accepted
+            return answer_key(answer) in self.accepted
+        if question_type in ('single_choice', 'true_false'):
+            if isinstance(answer, (list, tuple)) and len(answer) == 1:
+                answer = answer[0]
+            return answer_key(answer) in self.accepted
+        if question_type == 'fill_blank':
+            return normalize_text(answer) in self.accepted
+        if question_type == 'matching':
+            if not isinstance(answer, (list, tuple)):
+                return False
+            return frozenset(answer_key(item) for item in answer) == self.accepted
+        if question_type == 'open_ended':
+            answer = normalize_text(answer)
+            return bool(answer) and any(answer in text for text in self.accepted)
+        if question_type == 'math_expression':
+            texts, forms = self.accepted
+            if normalize_math(answer) in texts:
+                return True
+            form = canonical_form(normalize_math(answer))
+            return form is not None and any(equivalent(form, key) for key in forms)
+        if question_type == 'code':
+            return str(answer).strip() in self.accepted
+        return False
+
+
+def compile_checker(problem):
+    """
+    Build the checker for a problem from its raw correct_answer JSON.
+    """
+    question_type = problem.question_type
+    correct = problem.correct_answer
+
+    if question_type == 'matching':
+        accepted = frozenset(answer_key(item) for item in _as_list(correct))
+    elif question_type == 'fill_blank':
+        accepted = frozenset(_answer_texts(correct))
+    elif question_type == 'open_ended':
+        accepted = _answer_texts(correct)
+    elif question_type == 'math_expression':
+        texts = frozenset(normalize_math(text) for text in _answer_texts(correct))
+        forms = [form for form in map(canonical_form, texts) if form is not None]
+        accepted = (texts, forms)
+    elif question_type == 'code':
+        accepted = frozenset(str(item).strip() for item in _as_list(correct))
+    elif question_type in ('multiple_choice', 'single_choice', 'true_false'):
+        accepted = frozenset(answer_key(item) for item in _as_list(correct))
+    else:
+        accepted = frozenset()
+
+    return AnswerChecker(
+        problem_id=problem.pk,
+        version=_version(problem),
+        question_type=question_type,
+        accepted=accepted
+    )
+
+
+def _version(problem):
+    return problem.updated_at.timestamp() if problem.updated_at else 0
+
+
+def get_checkers(problems):
+    """
+    Return {problem_id: AnswerChecker} for the given problems.
+    Fetches every cached checker in one round trip and compiles the misses.
+    """
+    keys = {
+        problem_checker_cache_key(problem.pk, f'{CHECKER_FORMAT}.{_version(problem)}'): problem
+        for problem in problems
+    }
+    cached = cache.get_many(list(keys))
+
+    checkers = {}
+    missing = {}
+    for key, problem in keys.items():
+        checker = cached.get(key)
+        if checker is None:
+            checker = compile_checker(problem)
+            missing[key] = checker
+        checkers[problem.pk] = checker
+
+    if missing:
+        cache.set_many(missing, PROBLEM_CHECKER_CACHE_TIMEOUT)
+    return checkers
+
+
+def get_checker(problem):
+    return get_checkers([problem])[problem.pk]
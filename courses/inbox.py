@@ -0,0 +1,115 @@
+"""
+The notification inbox.
+
+Each user's unread count of in-app notifications is kept on a
+NotificationCounter row. Signals adjust it on single-row saves and
+deletes. Bulk writes adjust it themselves. An unread poll reads that one
+row instead of counting, and a user's row is created from a real count
+the first time it's read. Lists are cursor-paginated, newest first, off
+the (user, -created_at) index.
+"""
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from api.models import Notification
+from core.batch import MAX_BATCH_IDS
+from .models import NotificationCounter
+from .push import publish_unread_changed
+
+
+def inbox_notifications(user):
+    """The notifications shown in the user's inbox"""
+    return Notification.objects.filter(user=user, in_app=True)
+
+
+def adjust_unread(user_id, delta):
+    """Move one user's unread count; users whose counter isn't set up yet are skipped"""
+    if delta:
+        NotificationCounter.objects.filter(pk=user_id).update(
+            notification_unread=Greatest(F('notification_unread') + delta, Value(0)))
+
+
+def adjust_unread_many(deltas):
+    """adjust_unread for {user_id: delta}, one UPDATE per distinct delta"""
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        NotificationCounter.objects.filter(pk__in=user_ids).update(
+            notification_unread=Greatest(F('notification_unread') + delta, Value(0)))
+
+
+def get_unread_count(user_id):
+    count = NotificationCounter.objects.filter(pk=user_id).values_list('notification_unread', flat=True).first()
+    if count is None:
+        counter, _ = NotificationCounter.objects.get_or_create(user_id=user_id, defaults={
+            'notification_unread': inbox_notifications(user_id).filter(is_read=False).count()
+        })
+        count = counter.notification_unread
+    return count
+
+
+class InboxPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class NotificationInboxMixin:
+    """
+    ViewSet mixin for the requesting user's inbox: a paginated list, the
+    unread count and marking notifications read.
+    """
+    pagination_class = InboxPagination
+
+    def get_queryset(self):
+        return inbox_notifications(self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        marked = self.get_queryset().filter(is_read=False).update(is_read=True)
+        adjust_unread(request.user.id, -marked)
+        if marked:
+            publish_unread_changed([request.user.id])
+        return Response({'message': 'All notifications marked as read'})
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        notification = self.get_object()
+        notification.is_read = True
+        notification.save()
+        return Response({'message': 'Notification marked as read'})
+
+    @action(detail=False, methods=['post'])
+    def mark_read_bulk(self, request):
+        """Mark up to MAX_BATCH_IDS notifications read by {"ids": [1, 2, 3]}"""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_BATCH_IDS:
+            return Response(
+                {'error': f'At most {MAX_BATCH_IDS} ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = [int(pk) for pk in ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        marked = self.get_queryset().filter(pk__in=ids, is_read=False).update(is_read=True)
+        adjust_unread(request.user.id, -marked)
+        if marked:
+            publish_unread_changed([request.user.id])
+        return Response({
+            'marked_read': marked,
+            'unread_count': get_unread_count(request.user.id)
+        })
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': get_unread_count(request.user.id)})
@@ -0,0 +1,216 @@
+"""
+Per-problem item statistics.
+
+Each graded answer updates the learner's UserProblem row and folds one
+sample into the problem's ProblemStats row with a single UPDATE: counters
+are incremented and the Welford (mean, M2) pairs for attempts-to-solve and
+time-to-solve are advanced with F() expressions, so concurrent submissions
+never read-modify-write the stats in Python. The same pass advances the
+learner's practice schedule (see courses.practice). recompute_item_stats()
+rebuilds every row exactly from UserProblem, with NumPy when it is installed.
+"""
+import logging
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+from .models import ProblemStats, UserProblem
+from .practice import reschedule_practice, schedule_review
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Client-reported solve times above this are treated as an abandoned tab
+MAX_TIME_TO_SOLVE = 60 * 60
+
+
+def _clean_time(time_spent):
+    try:
+        time_spent = float(time_spent)
+    except (TypeError, ValueError):
+        return None
+    if 0 <= time_spent <= MAX_TIME_TO_SOLVE:
+        return time_spent
+    return None
+
+
+def _welford(prefix, count_field, sample):
+    """
+    F() expressions adding one sample to a running mean/M2 pair. They only
+    read the row's old values, which is what an UPDATE sees on PostgreSQL and SQLite.
+    """
+    count = F(count_field)
+    mean = F(f'{prefix}_mean')
+    delta = Value(float(sample), output_field=FloatField()) - mean
+    return {
+        f'{prefix}_mean': mean + delta / (count + 1),
+        f'{prefix}_m2': F(f'{prefix}_m2') + delta * delta * count / (count + 1),
+    }
+
+
+def record_submissions(user_id, submissions):
+    """
+    Fold graded answers into UserProblem, ProblemStats and the practice queue.
+    submissions is [(problem_id, is_correct, time_spent or None)] in the order
+    they were answered. Never raises, so grading can't fail because of stats.
+    """
+    if not submissions:
+        return
+    try:
+        # Savepoint, so a failure can't poison the caller's transaction
+        with transaction.atomic():
+            _record_submissions(user_id, submissions)
+    except Exception:
+        logger.exception('Recording item statistics failed for user %s', user_id)
+
+
+def _record_submissions(user_id, submissions):
+    problem_ids = {problem_id for problem_id, _, _ in submissions}
+    UserProblem.objects.bulk_create(
+        [UserProblem(user_id=user_id, problem_id=problem_id) for problem_id in problem_ids],
+        ignore_conflicts=True
+    )
+    ProblemStats.objects.bulk_create(
+        [ProblemStats(problem_id=problem_id) for problem_id in problem_ids],
+        ignore_conflicts=True
+    )
+    rows = {
+        row.problem_id: row
+        for row in UserProblem.objects.select_for_update().filter(
+            user_id=user_id, problem_id__in=problem_ids)
+    }
+
+    now = timezone.now()
+    changes = {}
+    for problem_id, is_correct, time_spent in submissions:
+        row = rows[problem_id]
+        change = changes.setdefault(problem_id, {
+            'attempts': 0, 'correct': 0, 'learner': 0, 'solved': False,
+            'attempts_to_solve': None, 'time_to_solve': None,
+        })
+        if row.attempts == 0:
+            change['learner'] = 1
+        row.attempts += 1
+        change['attempts'] += 1
+        schedule_review(row, is_correct, now)
+        if is_correct:
+            row.correct_attempts += 1
+            change['correct'] += 1
+            if not row.solved:
+                row.solved = True
+                row.solved_at = now
+                row.attempts_to_solve = row.attempts
+                row.time_to_solve = _clean_time(time_spent)
+                change.update(
+                    solved=True,
+                    attempts_to_solve=row.attempts_to_solve,
+                    time_to_solve=row.time_to_solve
+                )
+
+    UserProblem.objects.bulk_update(rows.values(), [
+        'attempts', 'correct_attempts', 'solved', 'solved_at',
+        'attempts_to_solve', 'time_to_solve',
+        'ease', 'review_interval', 'review_streak', 'due_at'
+    ])
+    reschedule_practice(user_id, {problem_id: row.due_at for problem_id, row in rows.items()})
+
+    for problem_id, change in changes.items():
+        solved = int(change['solved'])
+        updates = {
+            'attempt_count': F('attempt_count') + change['attempts'],
+            'correct_count': F('correct_count') + change['correct'],
+            'learner_count': F('learner_count') + change['learner'],
+            'solver_count': F('solver_count') + solved,
+            'solve_rate': Cast(F('solver_count') + solved, FloatField()) / (
+                F('learner_count') + change['learner']),
+            'updated_at': now,
+        }
+        if solved:
+            updates.update(_welford('attempts', 'solver_count', change['attempts_to_solve']))
+            if change['time_to_solve'] is not None:
+                updates.update(_welford('time', 'time_count', change['time_to_solve']))
+                updates['time_count'] = F('time_count') + 1
+        ProblemStats.objects.filter(pk=problem_id).update(**updates)
+
+
+def _mean_m2(samples):
+    """Exact mean and sum of squared deviations"""
+    if not samples:
+        return 0.0, 0.0
+    if np is not None:
+        values = np.asarray(samples, dtype=float)
+        mean = values.mean()
+        return float(mean), float(((values - mean) ** 2).sum())
+    mean = sum(samples) / len(samples)
+    return mean, sum((value - mean) ** 2 for value in samples)
+
+
+def recompute_item_stats(chunk_size=500):
+    """
+    Rebuild ProblemStats exactly from UserProblem, a chunk of problems at a time.
+    Yields the number of problems written per chunk.
+    """
+    problem_ids = UserProblem.objects.order_by('problem_id').values_list(
+        'problem_id', flat=True).distinct()
+    last_id = 0
+    while True:
+        chunk = list(problem_ids.filter(problem_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]
+
+        totals = {
+            row['problem_id']: row
+            for row in UserProblem.objects.filter(problem_id__in=chunk).values('problem_id').annotate(
+                attempt_total=Sum('attempts'),
+                correct_total=Sum('correct_attempts'),
+                learners=Count('id', filter=Q(attempts__gt=0)),
+                solvers=Count('id', filter=Q(solved=True))
+            ).order_by()
+        }
+        attempts_samples = {}
+        time_samples = {}
+        for problem_id, attempts_to_solve, time_to_solve in UserProblem.objects.filter(
+            problem_id__in=chunk, solved=True
+        ).values_list('problem_id', 'attempts_to_solve', 'time_to_solve').iterator():
+            if attempts_to_solve is not None:
+                attempts_samples.setdefault(problem_id, []).append(attempts_to_solve)
+            if time_to_solve is not None:
+                time_samples.setdefault(problem_id, []).append(time_to_solve)
+
+        now = timezone.now()
+        stats = []
+        for problem_id in chunk:
+            total = totals.get(problem_id)
+            if total is None:
+                continue
+            attempts_mean, attempts_m2 = _mean_m2(attempts_samples.get(problem_id, []))
+            time_mean, time_m2 = _mean_m2(time_samples.get(problem_id, []))
+            stats.append(ProblemStats(
+                problem_id=problem_id,
+                attempt_count=total['attempt_total'] or 0,
+                correct_count=total['correct_total'] or 0,
+                learner_count=total['learners'],
+                solver_count=total['solvers'],
+                solve_rate=total['solvers'] / total['learners'] if total['learners'] else 0,
+                attempts_mean=attempts_mean,
+                attempts_m2=attempts_m2,
+                time_count=len(time_samples.get(problem_id, [])),
+                time_mean=time_mean,
+                time_m2=time_m2,
+                updated_at=now
+            ))
+
+        with transaction.atomic():
+            ProblemStats.objects.bulk_create(
+                [ProblemStats(problem_id=row.problem_id) for row in stats], ignore_conflicts=True)
+            ProblemStats.objects.bulk_update(stats, [
+                'attempt_count', 'correct_count', 'learner_count', 'solver_count',
+                'solve_rate', 'attempts_mean', 'attempts_m2', 'time_count',
+                'time_mean', 'time_m2', 'updated_at'
+            ])
+        yield len(stats)
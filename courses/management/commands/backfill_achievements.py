@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from courses.achievements import AchievementEngine
+
+
+class Command(BaseCommand):
+    help = 'Evaluate achievement rules for every user and award anything missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users evaluated per query',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users = 0
+        awarded = 0
+        for chunk_users, chunk_awarded in AchievementEngine.backfill(chunk_size=options['chunk_size']):
+            users += chunk_users
+            awarded += chunk_awarded
+            self.stdout.write(f'Evaluated {users} users, awarded {awarded} achievements')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfill finished: {awarded} achievements awarded to {users} users in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,79 @@
+import time
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from core.email_templates import get_compiled_email, render_email
+
+
+class Command(BaseCommand):
+    help = 'Benchmark email rendering: render_to_string vs precompiled skeletons'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template',
+            default='emails/daily_reminder.html',
+            help='Email template to render',
+        )
+        parser.add_argument(
+            '--renders',
+            type=int,
+            default=100000,
+            help='Emails rendered with each method',
+        )
+        parser.add_argument(
+            '--recipients',
+            type=int,
+            default=1000,
+            help='Distinct recipient contexts cycled through',
+        )
+
+    def handle(self, *args, **options):
+        template = options['template']
+        if get_compiled_email(template) is None:
+            raise CommandError(f'{template} can not be precompiled')
+        renders = options['renders']
+        contexts = [self.context(i) for i in range(max(options['recipients'], 1))]
+
+        mismatches = sum(
+            render_to_string(template, context) != render_email(template, context)
+            for context in contexts
+        )
+        if mismatches:
+            raise CommandError(f'{mismatches} of {len(contexts)} renders differ from render_to_string')
+
+        timings = {}
+        for name, render in (('render_to_string', render_to_string), ('precompiled', render_email)):
+            started = time.perf_counter()
+            for i in range(renders):
+                render(template, contexts[i % len(contexts)])
+            timings[name] = time.perf_counter() - started
+            self.stdout.write(
+                f'{name:<18} {timings[name]:.2f}s  {renders / timings[name]:,.0f} renders/s')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Precompiled rendering is {timings["render_to_string"] / timings["precompiled"]:.1f}x faster '
+            f'({len(contexts)} identical outputs checked)'))
+
+    @staticmethod
+    def context(i):
+        """A recipient context shaped like get_user_learning_context's, with gaps"""
+        user = SimpleNamespace(
+            username=f'learner{i}',
+            first_name=f'Ardey <{i}>' if i % 3 else '',
+            email=f'learner{i}@example.com',
+        )
+        context = {
+            'user': user,
+            'streak_days': i % 12,
+            'daily_motivation': True,
+            'site_url': 'https://garaad.org',
+        }
+        if i % 5:
+            context.update({
+                'course_name': f'Xisaabta & Saynis {i % 40}',
+                'next_lesson_title': f'Casharka {i % 25}' if i % 7 else None,
+                'progress_percent': (i * 13) % 101,
+                'next_lesson_url': f'https://garaad.org/courses/{i % 40}/lessons/{i % 25}',
+                'course_thumbnail': f'https://cdn.garaad.org/{i % 40}.png' if i % 2 else '',
+            })
+        return context
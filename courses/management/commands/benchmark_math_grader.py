@@ -0,0 +1,99 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from courses.grading import normalize_math
+from courses.mathexpr import canonical_form, equivalent
+from courses.models import Problem
+
+# Used when there is no corpus file and no math_expression problems in the database
+SAMPLE_CORPUS = [
+    ('2x+1', '1+2x'), ('2x+1', '2*x + 1'), ('2x+1', 'x+x+1'), ('2x+1', '2x+2'),
+    ('(x+1)^2', 'x^2+2x+1'), ('(x+1)^2', 'x**2 + 2*x + 1'), ('(x+1)^2', 'x^2+1'),
+    ('x/(x+1)', '1-1/(x+1)'), ('3/4', '0.75'), ('3/4', '6/8'), ('3/4', '0.7'),
+    ('y=2x+1', '2y=4x+2'), ('y=2x+1', 'y-2x=1'), ('sqrt(x)', 'x^(1/2)'),
+    ('πr²', 'pi*r^2'), ('2(a+b)', '2a+2b'), ('a*b', 'ba'), ('x^3-x', 'x(x-1)(x+1)'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark math_expression grading throughput over a corpus of submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            help='File with one "answer key<TAB>submission" pair per line',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='How many times to grade the whole corpus',
+        )
+
+    def handle(self, *args, **options):
+        corpus = self.load_corpus(options.get('corpus'))
+        if not corpus:
+            raise CommandError('Corpus is empty')
+
+        iterations = options['iterations']
+        self.stdout.write(f'Grading {len(corpus)} submissions x {iterations} iterations')
+
+        canonical_form.cache_clear()
+        started = time.perf_counter()
+        accepted = sum(self.grade(key, answer) for key, answer in corpus)
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for key, answer in corpus:
+                self.grade(key, answer)
+        warm = time.perf_counter() - started
+
+        exact = sum(normalize_math(key) == normalize_math(answer) for key, answer in corpus)
+        info = canonical_form.cache_info()
+
+        self.stdout.write(f'Cold: {len(corpus) / cold:,.0f} submissions/s')
+        self.stdout.write(f'Warm: {len(corpus) * iterations / warm:,.0f} submissions/s')
+        self.stdout.write(f'LRU: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries')
+        self.stdout.write(self.style.SUCCESS(
+            f'Accepted {accepted}/{len(corpus)} (string equality would accept {exact})'
+        ))
+
+    def grade(self, key, answer):
+        return equivalent(
+            canonical_form(normalize_math(key)),
+            canonical_form(normalize_math(answer))
+        )
+
+    def load_corpus(self, path):
+        if path:
+            corpus = []
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if '\t' in line:
+                        key, answer = line.rstrip('\n').split('\t', 1)
+                        corpus.append((key, answer))
+            return corpus
+
+        keys = []
+        for correct in Problem.objects.filter(
+            question_type='math_expression'
+        ).values_list('correct_answer', flat=True).iterator():
+            for item in correct if isinstance(correct, list) else [correct]:
+                if isinstance(item, dict):
+                    item = item.get('text')
+                if item:
+                    keys.append(str(item))
+        if not keys:
+            return SAMPLE_CORPUS
+
+        # No stored submissions yet: grade each key against typical rewrites of itself
+        rng = random.Random(0)
+        corpus = []
+        for key in keys:
+            for answer in (key, key.replace('*', ''), key.replace('^', '**'), ' '.join(key)):
+                corpus.append((key, answer))
+            terms = key.split('+')
+            rng.shuffle(terms)
+            corpus.append((key, '+'.join(terms)))
+        return corpus
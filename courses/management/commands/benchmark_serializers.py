@@ -0,0 +1,124 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from courses.models import Category, Course, Lesson, Problem
+from courses.serializers import ProblemSerializer
+
+SPARSE_FIELDS = ['id', 'question_text', 'question_type', 'xp_value']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark problem serialization: DRF ModelSerializer vs plain-dict builder vs ?fields='
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            help='Benchmark an existing course instead of a generated one',
+        )
+        parser.add_argument(
+            '--problems',
+            type=int,
+            default=500,
+            help='Problems in the generated course',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10,
+            help='How many times to serialize every problem',
+        )
+
+    def handle(self, *args, **options):
+        if options['course']:
+            if not Course.objects.filter(pk=options['course']).exists():
+                raise CommandError(f"Course {options['course']} does not exist")
+            self.run(options['course'], options['iterations'])
+            return
+
+        # The generated course only lives for the duration of the run
+        try:
+            with transaction.atomic():
+                course = self.generate_course(options['problems'])
+                self.run(course.id, options['iterations'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, course_id, iterations):
+        problems = Problem.objects.filter(lesson__course_id=course_id).order_by('lesson_id', 'order')
+        count = problems.count()
+        if not count:
+            raise CommandError('Course has no problems')
+        self.stdout.write(f'Serializing {count} problems x {iterations} iterations')
+
+        class FullProblemSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Problem
+                fields = [name for name in ProblemSerializer.Meta.fields if name != 'xp_value']
+
+        sparse = ProblemSerializer(fields=SPARSE_FIELDS)
+        cases = [
+            ('ModelSerializer', problems, lambda rows: FullProblemSerializer(rows, many=True).data),
+            ('Plain-dict builder', problems, lambda rows: ProblemSerializer(rows, many=True).data),
+            (f"?fields={','.join(SPARSE_FIELDS)}", sparse.prune_queryset(problems),
+             lambda rows: ProblemSerializer(rows, many=True, fields=SPARSE_FIELDS).data),
+        ]
+
+        for label, queryset, serialize in cases:
+            loading = serializing = 0.0
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    # A fresh queryset each time, so loading the rows is measured too
+                    rows = list(queryset.all())
+                    loaded = time.perf_counter()
+                    data = serialize(rows)
+                    finished = time.perf_counter()
+                loading += loaded - started
+                serializing += finished - loaded
+            self.stdout.write(
+                f'{label:<50} load {loading / iterations * 1000:6.1f} ms  '
+                f'serialize {serializing / iterations * 1000:6.1f} ms  '
+                f'{count * iterations / (loading + serializing):8,.0f} problems/s  '
+                f'{len(queries)} queries  ~{len(str(data)):,} chars'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
+
+    def generate_course(self, total):
+        category = Category.objects.create(
+            id='benchmark-serializers', title='Benchmark', description='Benchmark')
+        course = Course.objects.create(
+            category=category, title='Serializer benchmark',
+            slug='serializer-benchmark', description='Generated course', author_id='benchmark')
+        per_lesson = 25
+        lessons = Lesson.objects.bulk_create([
+            Lesson(course=course, title=f'Lesson {number}', slug=f'lesson-{number}', lesson_number=number)
+            for number in range(1, (total + per_lesson - 1) // per_lesson + 1)
+        ])
+
+        problems = []
+        for index in range(total):
+            diagram = index % 5 == 0
+            problems.append(Problem(
+                lesson=lessons[index // per_lesson],
+                question_text=f'Question {index}: which option is correct?',
+                question_type='diagram' if diagram else 'multiple_choice',
+                options=[{'id': letter, 'text': f'Option {letter}'} for letter in 'abcd'],
+                correct_answer=[{'id': 'a', 'text': 'Option a'}],
+                explanation='Because option a is correct. ' * 5,
+                order=index % per_lesson,
+                content={'points': 15, 'format': 'markdown'},
+                diagram_config={
+                    'diagram_id': index, 'diagram_type': 'scale', 'scale_weight': 1, 'objects': []
+                } if diagram else {},
+                xp=10
+            ))
+        Problem.objects.bulk_create(problems)
+        return course
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from courses.packages import build_course_packages
+
+
+class Command(BaseCommand):
+    help = 'Build or refresh the offline package of every published course (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            help='Only build the given course id (repeatable)',
+        )
+        parser.add_argument(
+            '--include-unpublished',
+            action='store_true',
+            help='Also package unpublished courses',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild every lesson even if its content is unchanged',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        built = 0
+        for course, package, rebuilt, written in build_course_packages(
+            course_ids=options['course'],
+            include_unpublished=options['include_unpublished'],
+            force=options['force']
+        ):
+            if not written:
+                self.stdout.write(f'{course.title}: up to date ({package.version})')
+                continue
+            built += 1
+            self.stdout.write(
+                f'{course.title}: built {package.file_name} '
+                f'({package.size} bytes, {rebuilt}/{package.lesson_count} lessons rebuilt)'
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Built {built} packages in {elapsed:.1f}s'))
@@ -1,13 +1,12 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from courses.services import NotificationService
+from courses.reminders import ReminderRun
 from accounts.models import User
 import logging
 
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Check all users for real-time notifications and send them'
+    help = 'Check all users for real-time notifications and queue them'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -18,82 +17,70 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force-send',
             action='store_true',
-            help='Force send notifications even if recently sent',
+            help='Send notifications even if the same reminder was already sent today',
         )
         parser.add_argument(
             '--dry-run',
             action='store_true',
             help='Show what would be sent without actually sending',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Users classified and personalised per batch',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Threads rendering emails',
+        )
 
     def handle(self, *args, **options):
         user_id = options.get('user_id')
-        force_send = options.get('force_send')
         dry_run = options.get('dry_run')
         
         if dry_run:
             self.stdout.write("DRY RUN MODE - No emails will be sent")
         
+        users = User.objects.filter(is_active=True)
         if user_id:
-            # Check specific user
-            try:
-                user = User.objects.get(id=user_id)
-                self.stdout.write(f"Checking notifications for user: {user.username} ({user.email})")
-                self.check_user_notifications(user, force_send, dry_run)
-            except User.DoesNotExist:
-                self.stdout.write(self.style.ERROR(f"User with ID {user_id} not found"))
-        else:
-            # Check all users
-            users = User.objects.filter(is_active=True)
-            self.stdout.write(f"Checking notifications for {users.count()} active users...")
-            
-            processed_count = 0
-            for user in users:
-                try:
-                    if self.check_user_notifications(user, force_send, dry_run):
-                        processed_count += 1
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error processing user {user.id}: {e}"))
-            
-            self.stdout.write(
-                self.style.SUCCESS(f"Processed notifications for {processed_count} users")
-            )
+            users = users.filter(id=user_id)
+            if not users.exists():
+                self.stdout.write(self.style.ERROR(f"Active user with ID {user_id} not found"))
+                return
 
-    def check_user_notifications(self, user, force_send=False, dry_run=False):
-        """
-        Check and send real-time notifications for a specific user.
-        Uses last_active field for more accurate activity tracking.
-        """
-        try:
-            # Check for streak break
-            streak_broken, streak_count = NotificationService.is_streak_broken(user)
-            if streak_broken:
-                self.stdout.write(f"  ✓ Streak broken for user {user.username} (streak: {streak_count})")
-                if not dry_run:
-                    NotificationService.send_streak_break_reminder(user, streak_count)
-                return True
-            
-            # Check for inactivity
-            inactive_days = NotificationService.get_inactivity_days(user)
-            if inactive_days and inactive_days >= 1:
-                self.stdout.write(f"  ✓ User {user.username} inactive for {inactive_days} days")
-                if not dry_run:
-                    NotificationService.send_inactivity_reminder(user)
-                return True
-            
-            # Check for daily reminder (if user hasn't been active today)
-            if not NotificationService.is_user_active_today(user):
-                self.stdout.write(f"  ✓ Sending daily reminder to {user.username}")
-                if not dry_run:
-                    NotificationService.send_daily_reminder_notification(user)
-                return True
-            
-            # Run comprehensive check
-            if not dry_run:
-                NotificationService.check_and_send_real_time_reminders(user)
-            
-            return False
-            
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error checking notifications for user {user.username}: {e}"))
-            return False 
\ No newline at end of file
+        run = ReminderRun(
+            queryset=users,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=dry_run,
+            force=options.get('force_send')
+        )
+        stats = run.run()
+        timings = run.timings
+
+        for user_id, segment, error in run.errors[:10]:
+            self.stdout.write(self.style.ERROR(f"Error rendering {segment} reminder for user {user_id}: {error}"))
+        if len(run.errors) > 10:
+            self.stdout.write(self.style.ERROR(f"... and {len(run.errors) - 10} more errors"))
+
+        self.stdout.write(
+            f"Segments: {stats['streak_broken']} streak broken, {stats['inactive']} inactive, "
+            f"{stats['daily']} daily reminders"
+        )
+        self.stdout.write(
+            f"Rendered {stats['rendered']} emails, queued {stats['queued']} "
+            f"({stats['rendered'] - stats['queued'] if not dry_run else 0} already sent today), "
+            f"skipped {stats['skipped']} without a course, {stats['errors']} errors"
+        )
+        self.stdout.write(
+            f"Timings: segment {timings['segment']:.2f}s, contexts {timings['contexts']:.2f}s, "
+            f"waiting on renders {timings['render']:.2f}s, queue {timings['queue']:.2f}s"
+        )
+        total = timings['total'] or 1e-9
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed notifications for {stats['users']} users in {timings['total']:.2f}s "
+            f"({stats['users'] / total:,.0f} users/s, {stats['rendered'] / total:,.0f} emails/s)"
+        ))
@@ -5,6 +5,7 @@ class Command(BaseCommand):
     help = 'Creates initial achievements for the platform'
 
     def handle(self, *args, **kwargs):
+        # Icons double as rule keys in courses.achievements.ACHIEVEMENT_RULES
         achievements = [
             {
                 'name': 'Dhalasho Cusub',
@@ -129,4 +130,6 @@ class Command(BaseCommand):
                 self.style.SUCCESS(
                     f'Successfully created achievement "{achievement_data["name"]}"'
                 )
-            ) 
\ No newline at end of file
+            )
+
+        self.stdout.write('Run backfill_achievements to award these to existing users')
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from courses.models import UserNotification
+from api.models import Notification
 from courses.services import NotificationService
 from accounts.models import User
 import logging
@@ -33,14 +33,15 @@ class Command(BaseCommand):
         self.stdout.write(f"Current time: {now}")
         self.stdout.write(f"Current timezone: {timezone.get_current_timezone()}")
         
-        # Show notification statistics
-        total_notifications = UserNotification.objects.count()
-        unsent_notifications = UserNotification.objects.filter(is_sent=False).count()
-        due_notifications = UserNotification.objects.filter(
+        # Show email notification statistics
+        emails = Notification.objects.filter(email=True)
+        total_notifications = emails.count()
+        unsent_notifications = emails.filter(is_sent=False).count()
+        due_notifications = emails.filter(
             is_sent=False,
             scheduled_for__lte=now
         ).count()
-        past_notifications = UserNotification.objects.filter(
+        past_notifications = emails.filter(
             scheduled_for__lt=now
         ).count()
         
@@ -50,16 +51,16 @@ class Command(BaseCommand):
         self.stdout.write(f"Past scheduled notifications: {past_notifications}")
         
         # Show recent notifications
-        recent_notifications = UserNotification.objects.order_by('-created_at')[:10]
+        recent_notifications = emails.order_by('-created_at')[:10]
         self.stdout.write("\nRecent notifications:")
         for notification in recent_notifications:
             status = "SENT" if notification.is_sent else "PENDING"
             scheduled_info = f" (scheduled for {notification.scheduled_for})" if notification.scheduled_for else ""
-            self.stdout.write(f"  - {notification.user.username}: {notification.notification_type} - {status}{scheduled_info}")
+            self.stdout.write(f"  - {notification.user.username}: {notification.type} - {status}{scheduled_info}")
         
         # Fix notifications scheduled in the past
         if options['fix_scheduled']:
-            past_notifications = UserNotification.objects.filter(
+            past_notifications = emails.filter(
                 is_sent=False,
                 scheduled_for__lt=now
             )
@@ -79,11 +80,12 @@ class Command(BaseCommand):
                     self.stdout.write(f"Testing email sending for user: {user.username} ({user.email})")
                     
                     # Create a test notification
-                    test_notification = UserNotification.objects.create(
+                    test_notification = Notification.objects.create(
                         user=user,
-                        notification_type='daily_goal',
+                        type='daily_goal',
                         title='Test Notification',
                         message='This is a test notification to verify email sending.',
+                        email=True,
                         scheduled_for=now
                     )
                     
@@ -103,8 +105,8 @@ class Command(BaseCommand):
         # Show due notifications details
         if due_notifications > 0:
             self.stdout.write(f"\nDue notifications details:")
-            for notification in UserNotification.objects.filter(
+            for notification in emails.filter(
                 is_sent=False,
                 scheduled_for__lte=now
             )[:5]:  # Show first 5
-                self.stdout.write(f"  - ID: {notification.id}, User: {notification.user.username}, Type: {notification.notification_type}, Scheduled: {notification.scheduled_for}") 
\ No newline at end of file
+                self.stdout.write(f"  - ID: {notification.id}, User: {notification.user.username}, Type: {notification.type}, Scheduled: {notification.scheduled_for}") 
\ No newline at end of file
@@ -0,0 +1,37 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from courses.models import Course
+from courses.transfer import export_course
+
+
+class Command(BaseCommand):
+    help = 'Export a course with its lessons, blocks, problems, hints and solution steps as NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course', help='Course ID or slug')
+        parser.add_argument(
+            '--output',
+            help='File to write to (defaults to stdout)',
+        )
+
+    def handle(self, *args, **options):
+        identifier = options['course']
+        lookup = {'pk': identifier} if identifier.isdigit() else {'slug': identifier}
+        try:
+            course = Course.objects.get(**lookup)
+        except Course.DoesNotExist:
+            raise CommandError(f'Course {identifier} not found')
+
+        output = options.get('output')
+        stream = open(output, 'w', encoding='utf-8') if output else sys.stdout
+        try:
+            lines = 0
+            for line in export_course(course):
+                stream.write(line)
+                lines += 1
+        finally:
+            if output:
+                stream.close()
+
+        if output:
+            self.stdout.write(self.style.SUCCESS(f'Exported {lines} records for "{course.title}" to {output}'))
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from courses.digest import flush_digests
+
+
+class Command(BaseCommand):
+    help = 'Deliver notification digests whose window has closed (run every few minutes from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Users flushed per transaction',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for delivered in flush_digests(chunk_size=options['chunk_size']):
+            total += delivered
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Delivered {total} notification digests in {elapsed:.1f}s'))
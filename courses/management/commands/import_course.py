@@ -0,0 +1,50 @@
+import time
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from courses.transfer import import_course
+
+
+class Command(BaseCommand):
+    help = 'Import a course from an NDJSON file produced by export_course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON file to import')
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help=(
+                'Replace an existing course with the same slug. The old course '
+                'is deleted together with its enrollments, lesson progress and '
+                'problem submissions, so courses with learners need --force'
+            ),
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='With --replace, also replace a course that learners have started',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                course, counts = import_course(
+                    f,
+                    replace=options['replace'],
+                    force=options['force'],
+                    batch_size=options['batch_size']
+                )
+        except ValidationError as e:
+            raise CommandError('Import failed:\n' + '\n'.join(e.messages))
+
+        elapsed = time.monotonic() - started
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported "{course.title}" ({summary}) in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from courses.models import CourseEnrollment, Lesson, LessonStatusBitset, UserProgress
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the packed per-lesson progress bits stored on course enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-id',
+            type=int,
+            help='Only rebuild enrollments for this course',
+        )
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            help='Only rebuild enrollments for this user',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of enrollments written per bulk update',
+        )
+
+    def handle(self, *args, **options):
+        enrollments = CourseEnrollment.objects.only('id', 'user_id', 'course_id').order_by('id')
+        if options.get('course_id'):
+            enrollments = enrollments.filter(course_id=options['course_id'])
+        if options.get('user_id'):
+            enrollments = enrollments.filter(user_id=options['user_id'])
+
+        batch_size = options['batch_size']
+        layouts = {}
+        batch = []
+        rebuilt = 0
+
+        for enrollment in enrollments.iterator(chunk_size=batch_size):
+            batch.append(enrollment)
+            if len(batch) >= batch_size:
+                rebuilt += self.rebuild_batch(batch, layouts)
+                batch = []
+        if batch:
+            rebuilt += self.rebuild_batch(batch, layouts)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt progress bits for {rebuilt} enrollments'))
+
+    def rebuild_batch(self, batch, layouts):
+        """Rebuild a batch of enrollments with one progress query and one bulk update"""
+        course_ids = {e.course_id for e in batch} - set(layouts)
+        if course_ids:
+            for course_id in course_ids:
+                layouts[course_id] = []
+            for lesson_id, course_id in Lesson.objects.filter(
+                course_id__in=course_ids
+            ).order_by('lesson_number', 'id').values_list('id', 'course_id'):
+                layouts[course_id].append(lesson_id)
+
+        statuses = defaultdict(dict)
+        for user_id, lesson_id, status in UserProgress.objects.filter(
+            user_id__in={e.user_id for e in batch},
+            lesson__course_id__in={e.course_id for e in batch}
+        ).values_list('user_id', 'lesson_id', 'status'):
+            statuses[user_id][lesson_id] = status
+
+        for enrollment in batch:
+            layout = layouts[enrollment.course_id]
+            user_statuses = statuses[enrollment.user_id]
+            bitset = LessonStatusBitset()
+            for position, lesson_id in enumerate(layout):
+                bitset.set_status(position, user_statuses.get(lesson_id, 'not_started'))
+            enrollment.progress_layout = layout
+            enrollment.progress_bits = bitset.to_bytes()
+
+        CourseEnrollment.objects.bulk_update(batch, ['progress_layout', 'progress_bits'])
+        return len(batch)
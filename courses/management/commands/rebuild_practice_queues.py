@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from courses.practice import rebuild_practice_queues
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every learner\'s spaced-repetition practice queue (run nightly from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Users rebuilt per transaction',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for written in rebuild_practice_queues(chunk_size=options['chunk_size']):
+            total += written
+            self.stdout.write(f'Rebuilt {total} queues')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} practice queues in {elapsed:.1f}s'))
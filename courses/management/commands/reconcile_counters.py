@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from courses.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized lesson, problem, post and unread notification counters and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drifted rows',
+        )
+
+    def handle(self, *args, **options):
+        report = reconcile_counters(dry_run=options['dry_run'])
+        for counter, drifted in report.items():
+            self.stdout.write(f'{counter}: {drifted} rows drifted')
+
+        total = sum(report.values())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {total} rows would be corrected'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Corrected {total} rows'))
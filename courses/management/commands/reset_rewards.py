@@ -41,6 +41,8 @@ class Command(BaseCommand):
             enrollments = CourseEnrollment.objects.filter(user=user)
             for enrollment in enrollments:
                 enrollment.progress_percent = 0
+                enrollment.progress_bits = b''
+                enrollment.progress_layout = []
                 enrollment.save()
             self.stdout.write(f"Reset progress for {enrollments.count()} course enrollments")
             
@@ -1,7 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db import connection
 from courses.services import NotificationService
-from courses.models import UserNotification
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,22 +9,33 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Sends scheduled notifications to users'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Process notifications on this many threads at once (each claims its own batches)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Notifications claimed per transaction',
+        )
+
     def handle(self, *args, **options):
         try:
             # Process all scheduled notifications
-            NotificationService.process_scheduled_notifications()
-            
-            # Clean up old notifications
-            one_month_ago = timezone.now() - timezone.timedelta(days=30)
-            old_notifications = UserNotification.objects.filter(
-                created_at__lt=one_month_ago,
-                is_sent=True
-            )
-            deleted_count = old_notifications.delete()[0]
+            workers = max(options['workers'], 1)
+            if workers == 1:
+                processed = NotificationService.process_scheduled_notifications(options['batch_size'])
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    processed = sum(pool.map(
+                        lambda _: self.process_in_thread(options['batch_size']), range(workers)))
             
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Successfully processed notifications and cleaned up {deleted_count} old notifications'
+                    f'Successfully processed {processed} notifications'
                 )
             )
             
@@ -32,4 +43,12 @@ class Command(BaseCommand):
             logger.error(f"Error processing notifications: {str(e)}")
             self.stdout.write(
                 self.style.ERROR(f'Error processing notifications: {str(e)}')
-            ) 
\ No newline at end of file
+            )
+
+    @staticmethod
+    def process_in_thread(batch_size):
+        try:
+            return NotificationService.process_scheduled_notifications(batch_size)
+        finally:
+            # Threads get their own database connection; don't leave it open
+            connection.close()
@@ -0,0 +1,371 @@
+"""
+Canonical forms for math_expression answers.
+
+Answers are parsed into a small AST and reduced to a polynomial normal form
+(sorted monomials with exact Fraction coefficients), so "2x+1" and "1 + 2*x"
+compare equal. Expressions that are not polynomials (functions, division by
+a variable, fractional powers) fall back to a numeric signature: the value
+of the expression at a few fixed sample points.
+
+canonical_form() is memoized in an LRU, so repeated answer keys and common
+learner answers are parsed once per process.
+"""
+import hashlib
+import math
+import re
+from fractions import Fraction
+from functools import lru_cache
+from django.conf import settings
+
+FUNCTIONS = {
+    'sqrt': math.sqrt,
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'ln': math.log,
+    'log': math.log10,
+    'exp': math.exp,
+    'abs': abs,
+}
+CONSTANTS = {
+    'pi': math.pi,
+    'π': math.pi,
+}
+
+# Larger powers are graded numerically instead of being expanded
+MAX_EXPANDED_POWER = 12
+
+# Monomial products one expansion may spend before falling back to the
+# numeric signature, so nested powers of long sums can't stall grading
+MAX_EXPANSION_PRODUCTS = getattr(settings, 'MATH_MAX_EXPANSION_PRODUCTS', 20000)
+
+# Longer answers only match an accepted answer exactly
+MAX_EXPRESSION_LENGTH = getattr(settings, 'MATH_MAX_EXPRESSION_LENGTH', 500)
+
+# Relative tolerance when comparing numeric signatures
+NUMERIC_TOLERANCE = 1e-9
+
+SAMPLE_POINTS = 4
+
+CANONICAL_CACHE_SIZE = getattr(settings, 'MATH_CANONICAL_CACHE_SIZE', 10000)
+
+_REPLACEMENTS = (
+    ('**', '^'), ('×', '*'), ('·', '*'), ('÷', '/'), ('−', '-'), ('–', '-'),
+    ('²', '^2'), ('³', '^3'), (':', '/'),
+)
+_TOKEN = re.compile(r'\s*(?:(\d+\.?\d*|\.\d+)|([a-zA-Zπ]+)|(.))')
+_IDENTIFIERS = sorted(list(FUNCTIONS) + list(CONSTANTS), key=len, reverse=True)
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+class NotPolynomial(Exception):
+    pass
+
+
+def tokenize(text):
+    for old, new in _REPLACEMENTS:
+        text = text.replace(old, new)
+    tokens = []
+    for number, name, symbol in _TOKEN.findall(text.lower()):
+        if number:
+            tokens.append(('num', Fraction(number)))
+        elif name:
+            # Split runs like "xy" or "sinx" into known names and single-letter variables
+            while name:
+                for identifier in _IDENTIFIERS:
+                    if name.startswith(identifier):
+                        kind = 'func' if identifier in FUNCTIONS else 'const'
+                        tokens.append((kind, identifier))
+                        name = name[len(identifier):]
+                        break
+                else:
+                    tokens.append(('var', name[0]))
+                    name = name[1:]
+        elif symbol.strip():
+            if symbol not in '+-*/^()=':
+                raise ExpressionError(f'Unexpected character {symbol!r}')
+            tokens.append(('op', symbol))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing nested tuples"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, symbol):
+        if self.take() != ('op', symbol):
+            raise ExpressionError(f'Expected {symbol!r}')
+
+    def parse(self):
+        node = self.expression()
+        if self.peek() == ('op', '='):
+            self.take()
+            node = ('eq', node, self.expression())
+        if self.pos != len(self.tokens):
+            raise ExpressionError('Unexpected trailing input')
+        return node
+
+    def expression(self):
+        terms = [self.term()]
+        while self.peek() in (('op', '+'), ('op', '-')):
+            _, symbol = self.take()
+            term = self.term()
+            terms.append(term if symbol == '+' else ('neg', term))
+        return terms[0] if len(terms) == 1 else ('add', terms)
+
+    def term(self):
+        node = self.unary()
+        while True:
+            kind, value = self.peek()
+            if (kind, value) in (('op', '*'), ('op', '/')):
+                self.take()
+                right = self.unary()
+                node = ('mul', [node, right]) if value == '*' else ('div', node, right)
+            elif kind in ('num', 'var', 'const', 'func') or (kind, value) == ('op', '('):
+                # Implicit multiplication: 2x, x(y+1), (a)(b)
+                node = ('mul', [node, self.power()])
+            else:
+                return node
+
+    def unary(self):
+        if self.peek() in (('op', '-'), ('op', '+')):
+            _, symbol = self.take()
+            operand = self.unary()
+            return ('neg', operand) if symbol == '-' else operand
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        if self.peek() == ('op', '^'):
+            self.take()
+            return ('pow', base, self.unary())
+        return base
+
+    def atom(self):
+        kind, value = self.take()
+        if kind in ('num', 'var', 'const'):
+            return (kind, value)
+        if kind == 'func':
+            # sin(x)^2 squares the call, sin x^2 squares the argument
+            argument = self.atom() if self.peek() == ('op', '(') else self.power()
+            return ('call', value, argument)
+        if (kind, value) == ('op', '('):
+            node = self.expression()
+            self.expect(')')
+            return node
+        raise ExpressionError('Unexpected end of expression' if kind is None else f'Unexpected {value!r}')
+
+
+def parse(text):
+    tokens = tokenize(str(text))
+    if not tokens:
+        raise ExpressionError('Empty expression')
+    return _Parser(tokens).parse()
+
+
+# Polynomials are {monomial: Fraction}, a monomial being a sorted tuple of (variable, exponent)
+
+def _poly_accumulate(result, poly):
+    """Add poly into result in place"""
+    for monomial, coeff in poly.items():
+        result[monomial] = result.get(monomial, 0) + coeff
+
+
+def _without_zeros(poly):
+    return {monomial: coeff for monomial, coeff in poly.items() if coeff}
+
+
+class _Budget:
+    """Monomial products left for one expansion"""
+    def __init__(self, products):
+        self.products = products
+
+    def spend(self, products):
+        self.products -= products
+        if self.products < 0:
+            raise NotPolynomial()
+
+
+def _poly_mul(a, b, budget):
+    budget.spend(len(a) * len(b))
+    result = {}
+    for mono_a, coeff_a in a.items():
+        for mono_b, coeff_b in b.items():
+            powers = dict(mono_a)
+            for var, exp in mono_b:
+                powers[var] = powers.get(var, 0) + exp
+            monomial = tuple(sorted(powers.items()))
+            result[monomial] = result.get(monomial, 0) + coeff_a * coeff_b
+    return _without_zeros(result)
+
+
+def _poly_constant(poly):
+    if not poly:
+        return Fraction(0)
+    if list(poly) == [()]:
+        return poly[()]
+    return None
+
+
+def to_polynomial(node, budget=None):
+    """
+    Expand node into a polynomial. Raises NotPolynomial for anything else,
+    including expansions that would take more than MAX_EXPANSION_PRODUCTS.
+    """
+    if budget is None:
+        budget = _Budget(MAX_EXPANSION_PRODUCTS)
+    kind = node[0]
+    if kind == 'num':
+        return {(): node[1]} if node[1] else {}
+    if kind == 'var':
+        return {((node[1], 1),): Fraction(1)}
+    if kind == 'neg':
+        return {monomial: -coeff for monomial, coeff in to_polynomial(node[1], budget).items()}
+    if kind == 'add':
+        result = {}
+        for child in node[1]:
+            _poly_accumulate(result, to_polynomial(child, budget))
+        return _without_zeros(result)
+    if kind == 'mul':
+        result = {(): Fraction(1)}
+        for child in node[1]:
+            result = _poly_mul(result, to_polynomial(child, budget), budget)
+        return result
+    if kind == 'div':
+        divisor = _poly_constant(to_polynomial(node[2], budget))
+        if not divisor:
+            raise NotPolynomial()
+        return {monomial: coeff / divisor for monomial, coeff in to_polynomial(node[1], budget).items()}
+    if kind == 'pow':
+        exponent = _poly_constant(to_polynomial(node[2], budget))
+        if exponent is None or exponent.denominator != 1 or not 0 <= exponent <= MAX_EXPANDED_POWER:
+            raise NotPolynomial()
+        base = to_polynomial(node[1], budget)
+        result = {(): Fraction(1)}
+        for _ in range(int(exponent)):
+            result = _poly_mul(result, base, budget)
+        return result
+    raise NotPolynomial()
+
+
+@lru_cache(maxsize=None)
+def _sample_value(var, point):
+    """
+    A deterministic value in [1.1, 3.1) for the variable at the sample point.
+    Every (variable, point) pair gets its own hashed value, so no two
+    variables move together across the points and sqrt(x) never passes for sqrt(c).
+    """
+    digest = hashlib.blake2b(f'{var}:{point}'.encode('utf-8'), digest_size=8).digest()
+    return 1.1 + 2 * int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def evaluate(node, point):
+    kind = node[0]
+    if kind == 'num':
+        return float(node[1])
+    if kind == 'var':
+        return _sample_value(node[1], point)
+    if kind == 'const':
+        return CONSTANTS[node[1]]
+    if kind == 'neg':
+        return -evaluate(node[1], point)
+    if kind == 'add':
+        return math.fsum(evaluate(child, point) for child in node[1])
+    if kind == 'mul':
+        return math.prod(evaluate(child, point) for child in node[1])
+    if kind == 'div':
+        return evaluate(node[1], point) / evaluate(node[2], point)
+    if kind == 'pow':
+        return evaluate(node[1], point) ** evaluate(node[2], point)
+    if kind == 'call':
+        return FUNCTIONS[node[1]](evaluate(node[2], point))
+    raise ExpressionError(f'Cannot evaluate {kind}')
+
+
+def _signature(node):
+    values = []
+    for point in range(SAMPLE_POINTS):
+        try:
+            value = evaluate(node, point)
+        except (ArithmeticError, ValueError, TypeError):
+            value = None
+        if isinstance(value, complex) or (value is not None and not math.isfinite(value)):
+            value = None
+        values.append(value)
+    return tuple(values)
+
+
+def _scaled(values):
+    """Divide by the first non-zero value, so equations that differ by a factor match"""
+    pivot = next((value for value in values if value), None)
+    if pivot is None:
+        return values
+    return tuple(value / pivot if value is not None else None for value in values)
+
+
+def _polynomial_key(poly, equation):
+    items = sorted(poly.items(), key=lambda item: (-sum(exp for _, exp in item[0]), item[0]))
+    if equation and items:
+        # Normalise so the leading coefficient is 1
+        leading = items[0][1]
+        items = [(monomial, coeff / leading) for monomial, coeff in items]
+    return tuple((monomial, coeff.numerator, coeff.denominator) for monomial, coeff in items)
+
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def canonical_form(text):
+    """
+    Return (is_equation, polynomial_key, numeric_signature) for an expression,
+    or None if it cannot be parsed. polynomial_key is None for non-polynomials.
+    """
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        return None
+    try:
+        node = parse(text)
+    except (ExpressionError, RecursionError):
+        return None
+
+    equation = node[0] == 'eq'
+    if equation:
+        node = ('add', [node[1], ('neg', node[2])])
+
+    try:
+        poly_key = _polynomial_key(to_polynomial(node), equation)
+    except (NotPolynomial, ArithmeticError, ValueError):
+        poly_key = None
+
+    signature = _signature(node)
+    if equation:
+        signature = _scaled(signature)
+    return equation, poly_key, signature
+
+
+def equivalent(form_a, form_b):
+    """Compare two canonical forms"""
+    if form_a is None or form_b is None or form_a[0] != form_b[0]:
+        return False
+    if form_a[1] is not None and form_b[1] is not None:
+        return form_a[1] == form_b[1]
+
+    compared = 0
+    for a, b in zip(form_a[2], form_b[2]):
+        if a is None or b is None:
+            continue
+        if not math.isclose(a, b, rel_tol=NUMERIC_TOLERANCE, abs_tol=NUMERIC_TOLERANCE):
+            return False
+        compared += 1
+    return compared >= 2
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_category_community_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='progress_bits',
+            field=models.BinaryField(blank=True, default=bytes),
+        ),
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='progress_layout',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
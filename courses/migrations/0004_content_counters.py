@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:10
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, outer_field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{outer_field: OuterRef('pk')})
+            .order_by()
+            .values(outer_field)
+            .annotate(total=Count('pk'))
+            .values('total')[:1],
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )
+
+
+def populate_counters(apps, schema_editor):
+    Category = apps.get_model('courses', 'Category')
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Problem = apps.get_model('courses', 'Problem')
+    Post = apps.get_model('community', 'Post')
+
+    Course.objects.update(
+        lesson_count=_count(Lesson.objects.all(), 'course'),
+        problem_count=_count(Problem.objects.all(), 'lesson__course'),
+    )
+    Lesson.objects.update(problem_count=_count(Problem.objects.all(), 'lesson'))
+    Category.objects.update(posts_count=_count(Post.objects.all(), 'category'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_courseenrollment_progress_bits'),
+        ('community', '0003_postimage_reaction_reply_remove_campus_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='problem_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='problem_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
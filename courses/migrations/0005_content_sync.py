@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_content_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessoncontentblock',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='lessoncontentblock',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='problem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='ContentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('course', 'Course'), ('lesson', 'Lesson'), ('block', 'Lesson Content Block'), ('problem', 'Problem')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('course_id', models.PositiveIntegerField(blank=True, help_text='Course the object belonged to, for per-course sync', null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='courses_con_deleted_badf4f_idx'), models.Index(fields=['course_id', 'deleted_at'], name='courses_con_course__7036b4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_packages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userproblem',
+            name='attempts_to_solve',
+            field=models.PositiveIntegerField(blank=True, help_text='Attempts it took to solve the problem the first time', null=True),
+        ),
+        migrations.AddField(
+            model_name='userproblem',
+            name='correct_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userproblem',
+            name='time_to_solve',
+            field=models.FloatField(blank=True, help_text='Seconds spent on the solving attempt, as reported by the client', null=True),
+        ),
+        migrations.CreateModel(
+            name='ProblemStats',
+            fields=[
+                ('problem', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.problem')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('learner_count', models.PositiveIntegerField(default=0)),
+                ('solver_count', models.PositiveIntegerField(default=0)),
+                ('solve_rate', models.FloatField(default=0, help_text='Share of learners who solved the problem')),
+                ('attempts_mean', models.FloatField(default=0, help_text='Mean attempts needed by solvers')),
+                ('attempts_m2', models.FloatField(default=0)),
+                ('time_count', models.PositiveIntegerField(default=0)),
+                ('time_mean', models.FloatField(default=0, help_text='Mean seconds on the solving attempt')),
+                ('time_m2', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Problem stats',
+                'indexes': [models.Index(fields=['solve_rate'], name='courses_pro_solve_r_418155_idx')],
+            },
+        ),
+    ]
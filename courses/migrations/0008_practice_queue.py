@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('courses', '0007_item_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeQueue',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='practice_queue', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('entries', models.BinaryField(blank=True, default=bytes)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userproblem',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userproblem',
+            name='ease',
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name='userproblem',
+            name='review_interval',
+            field=models.FloatField(default=0, help_text='Days until the next review'),
+        ),
+        migrations.AddField(
+            model_name='userproblem',
+            name='review_streak',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
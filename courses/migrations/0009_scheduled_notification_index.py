@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_practice_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['is_sent', 'scheduled_for'], name='courses_use_is_sent_868f71_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:47
+
+from django.db import migrations
+from django.db.models import F
+
+
+def fold_unread_counts(apps, schema_editor):
+    # The merged rows are in-app notifications now
+    NotificationCounter = apps.get_model('courses', 'NotificationCounter')
+    NotificationCounter.objects.update(
+        notification_unread=F('notification_unread') + F('user_notification_unread'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_notification_counter'),
+        ('api', '0005_merge_user_notifications'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_unread_counts, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notificationcounter',
+            name='user_notification_unread',
+        ),
+        migrations.DeleteModel(
+            name='UserNotification',
+        ),
+    ]
@@ -1,11 +1,36 @@
-from django.db import models
+import bisect
+import struct
+from datetime import datetime, timezone as dt_timezone
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 
-class Category(models.Model):
+class CounterFieldsMixin:
+    """
+    Keeps counter columns maintained with F() updates (see courses.counters)
+    out of ordinary saves. Updating an existing row writes every other field,
+    so a stale in-memory count can't overwrite the increments made since the
+    row was loaded. Pass update_fields explicitly to write a counter.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not args and not self._state.adding and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class Category(CounterFieldsMixin, models.Model):
     """
     Represents a category of courses.
     """
@@ -20,6 +45,10 @@ class Category(models.Model):
     is_community_enabled = models.BooleanField(default=False, help_text="Enable community posts for this category")
     community_description = models.TextField(blank=True, help_text="Description for community section")
 
+    # Maintained by community signals, repaired by reconcile_counters
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('posts_count',)
+
     def __str__(self):
         return self.title
 
@@ -27,7 +56,7 @@ class Category(models.Model):
         verbose_name_plural = "categories"
 
 
-class Course(models.Model):
+class Course(CounterFieldsMixin, models.Model):
     """
     Represents a course within a category.
     """
@@ -42,7 +71,12 @@ class Course(models.Model):
     author_id = models.CharField(max_length=255)
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Maintained by courses signals, repaired by reconcile_counters
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    problem_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('lesson_count', 'problem_count')
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -56,7 +90,7 @@ class Course(models.Model):
         ordering = ['-created_at']
 
 
-class Lesson(models.Model):
+class Lesson(CounterFieldsMixin, models.Model):
     """
     Represents a lesson within a course. Basic lesson info.
     """
@@ -69,7 +103,20 @@ class Lesson(models.Model):
         help_text="Estimated time in minutes", default=10)
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Maintained by courses signals, repaired by reconcile_counters
+    problem_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('problem_count',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored course so counters can follow a move
+        # (not when course_id was deferred, as the stored value is then unknown)
+        if 'course_id' in instance.__dict__:
+            instance._loaded_course_id = instance.course_id
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -82,15 +129,17 @@ class Lesson(models.Model):
     class Meta:
         ordering = ['course', 'lesson_number']
 
+    def get_next_lesson_entry(self):
+        """Next lesson as a cached (lesson_number, id, slug, title) entry, without a query"""
+        from .sequence import get_lesson_sequence
+        return get_lesson_sequence(self.course_id).next_after_number(self.lesson_number)
+
     def get_next_lesson(self):
         """Returns the next lesson in the course or None if this is the last lesson"""
-        try:
-            return Lesson.objects.filter(
-                course=self.course,
-                lesson_number__gt=self.lesson_number
-            ).order_by('lesson_number').first()
-        except Lesson.DoesNotExist:
+        entry = self.get_next_lesson_entry()
+        if entry is None:
             return None
+        return Lesson.objects.filter(pk=entry.id).first()
 
 
 class LessonContentBlock(models.Model):
@@ -121,6 +170,8 @@ class LessonContentBlock(models.Model):
         on_delete=models.SET_NULL, 
         help_text="Reference to a Problem for problem-type blocks"
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['lesson', 'order']
@@ -405,12 +456,21 @@ class Problem(models.Model):
     img = models.URLField(blank=True, null=True, help_text="URL of an image associated with the problem")
     xp = models.PositiveIntegerField(default=10, help_text="XP awarded for solving this problem")
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['lesson', 'order']
         unique_together = ['lesson', 'order']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored lesson so counters can follow a move
+        # (not when lesson_id was deferred, as the stored value is then unknown)
+        if 'lesson_id' in instance.__dict__:
+            instance._loaded_lesson_id = instance.lesson_id
+        return instance
+
     def clean(self):
         """
         Validate the problem data before saving
@@ -614,6 +674,50 @@ class SolutionStep(models.Model):
 
 # New User Progress and Rewards Models
 
+class ContentTombstone(models.Model):
+    """
+    Records deleted course content so the delta sync feed can report deletions.
+    """
+    CONTENT_TYPES = (
+        ('course', 'Course'),
+        ('lesson', 'Lesson'),
+        ('block', 'Lesson Content Block'),
+        ('problem', 'Problem'),
+    )
+
+    content_type = models.CharField(max_length=20, choices=CONTENT_TYPES)
+    object_id = models.PositiveIntegerField()
+    course_id = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Course the object belonged to, for per-course sync")
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+            models.Index(fields=['course_id', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} {self.object_id} deleted at {self.deleted_at}"
+
+
+class CoursePackage(models.Model):
+    """
+    The current offline archive of a course, built by build_course_packages.
+    """
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, related_name='package')
+    version = models.CharField(max_length=64)
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    lesson_count = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Package {self.version} for {self.course}"
+
+
 class UserProgress(models.Model):
     """
     Tracks a user's progress on each lesson.
@@ -645,6 +749,20 @@ class UserProgress(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.lesson.title} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() only syncs real transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        status_changed = self.status != getattr(self, '_loaded_status', None)
+        super().save(*args, **kwargs)
+        if status_changed:
+            CourseEnrollment.record_lesson_status(self.user_id, self.lesson, self.status)
+            self._loaded_status = self.status
+
     def mark_as_in_progress(self):
         """Mark lesson as in progress if not already completed"""
         if self.status != 'completed':
@@ -677,6 +795,55 @@ class UserProgress(models.Model):
         CourseEnrollment.update_progress(self.user, self.lesson.course)
 
 
+class LessonStatusBitset:
+    """
+    Packed lesson statuses for one enrollment.
+    Every lesson position takes two bits: in progress and completed.
+    """
+    BITS_PER_LESSON = 2
+    IN_PROGRESS = 0b01
+    COMPLETED = 0b10
+
+    STATUS_BITS = {
+        'not_started': 0,
+        'in_progress': IN_PROGRESS,
+        'completed': COMPLETED,
+    }
+
+    def __init__(self, data=b''):
+        self.data = bytearray(data or b'')
+
+    def _locate(self, position):
+        return divmod(position * self.BITS_PER_LESSON, 8)
+
+    def get(self, position):
+        byte_index, shift = self._locate(position)
+        if byte_index >= len(self.data):
+            return 0
+        return (self.data[byte_index] >> shift) & 0b11
+
+    def set(self, position, value):
+        byte_index, shift = self._locate(position)
+        if byte_index >= len(self.data):
+            self.data.extend(bytes(byte_index + 1 - len(self.data)))
+        cleared = self.data[byte_index] & ~(0b11 << shift) & 0xFF
+        self.data[byte_index] = cleared | (value << shift)
+
+    def status(self, position):
+        value = self.get(position)
+        if value & self.COMPLETED:
+            return 'completed'
+        if value & self.IN_PROGRESS:
+            return 'in_progress'
+        return 'not_started'
+
+    def set_status(self, position, status):
+        self.set(position, self.STATUS_BITS.get(status, 0))
+
+    def to_bytes(self):
+        return bytes(self.data)
+
+
 class CourseEnrollment(models.Model):
     """
     Tracks which course the user is enrolled in and their progress.
@@ -687,6 +854,10 @@ class CourseEnrollment(models.Model):
         Course, related_name='enrollments', on_delete=models.CASCADE)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     progress_percent = models.PositiveIntegerField(default=0)
+    # Per-lesson statuses packed by LessonStatusBitset. progress_layout maps
+    # each bit position to a lesson id, so the course reads from this row alone.
+    progress_bits = models.BinaryField(default=bytes, blank=True)
+    progress_layout = models.JSONField(default=list, blank=True)
 
     class Meta:
         unique_together = ['user', 'course']
@@ -694,6 +865,77 @@ class CourseEnrollment(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.course.title} ({self.progress_percent}%)"
 
+    def get_lesson_statuses(self):
+        """Return {lesson_id: status} for every lesson in the progress layout"""
+        bitset = LessonStatusBitset(self.progress_bits)
+        return {
+            lesson_id: bitset.status(position)
+            for position, lesson_id in enumerate(self.progress_layout)
+        }
+
+    def rebuild_progress_bits(self, save=True):
+        """Rebuild the packed statuses from the course lessons and UserProgress rows"""
+        lesson_ids = list(
+            Lesson.objects.filter(course_id=self.course_id)
+            .order_by('lesson_number', 'id')
+            .values_list('id', flat=True)
+        )
+        statuses = dict(
+            UserProgress.objects.filter(
+                user_id=self.user_id,
+                lesson__course_id=self.course_id
+            ).values_list('lesson_id', 'status')
+        )
+
+        bitset = LessonStatusBitset()
+        for position, lesson_id in enumerate(lesson_ids):
+            bitset.set_status(position, statuses.get(lesson_id, 'not_started'))
+
+        self.progress_layout = lesson_ids
+        self.progress_bits = bitset.to_bytes()
+        if save:
+            self.save(update_fields=['progress_layout', 'progress_bits'])
+
+    def layout_matches_course(self):
+        """Whether the progress layout still lists the course's lessons, in order"""
+        from .sequence import get_lesson_sequence
+        return self.progress_layout == [entry.id for entry in get_lesson_sequence(self.course_id)]
+
+    def ensure_current_layout(self):
+        """Rebuild the packed statuses if the course's lessons changed since they were built"""
+        if not self.layout_matches_course():
+            self.rebuild_progress_bits()
+
+    @classmethod
+    def record_lesson_status(cls, user_id, lesson, status):
+        """
+        Update a single lesson's bits on the user's enrollment.
+        The enrollment row is locked so concurrent lesson updates don't clobber each other.
+        """
+        with transaction.atomic():
+            enrollment = cls.objects.select_for_update().filter(
+                user_id=user_id,
+                course_id=lesson.course_id
+            ).first()
+            if enrollment is None:
+                return None
+
+            if not enrollment.layout_matches_course():
+                # Lessons were added, removed or renumbered since the layout was built;
+                # the rebuild picks up this lesson's status from its UserProgress row
+                enrollment.rebuild_progress_bits()
+                return enrollment
+
+            position = enrollment.progress_layout.index(lesson.id)
+            bitset = LessonStatusBitset(enrollment.progress_bits)
+            if bitset.status(position) == status:
+                return enrollment
+
+            bitset.set_status(position, status)
+            enrollment.progress_bits = bitset.to_bytes()
+            enrollment.save(update_fields=['progress_bits'])
+        return enrollment
+
     @classmethod
     def update_progress(cls, user, course):
         """Update progress percentage based on completed lessons"""
@@ -702,6 +944,8 @@ class CourseEnrollment(models.Model):
             user=user,
             course=course
         )
+        if created:
+            enrollment.rebuild_progress_bits()
 
         # Count total lessons in the course
         total_lessons = Lesson.objects.filter(course=course).count()
@@ -740,6 +984,8 @@ class CourseEnrollment(models.Model):
             user=user,
             course=course
         )
+        if created:
+            enrollment.rebuild_progress_bits()
         return enrollment
 
 
@@ -1125,83 +1371,52 @@ class UserAchievement(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.achievement.name}"
 
-class UserNotification(models.Model):
+class NotificationEvent(models.Model):
     """
-    Handles user notifications for streaks, achievements, and learning reminders
+    A notification waiting in its user's digest (see courses.digest).
+    Rows only live until the digest is delivered.
     """
-    NOTIFICATION_TYPES = (
-        ('streak_reminder', 'Streak Reminder'),
-        ('achievement_earned', 'Achievement Earned'),
-        ('daily_goal', 'Daily Goal Reminder'),
-        ('league_update', 'League Update'),
-        ('challenge_available', 'Challenge Available'),
+    CHANNELS = (
+        ('email', 'Email'),
+        ('in_app', 'In-app'),
     )
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='notifications', on_delete=models.CASCADE)
-    notification_type = models.CharField(max_length=50, choices=NOTIFICATION_TYPES)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='notification_events', on_delete=models.CASCADE)
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    type = models.CharField(max_length=50)
+    # Events of a type with the same key are deduplicated; defaults to the type
+    key = models.CharField(max_length=100)
     title = models.CharField(max_length=255)
     message = models.TextField()
-    is_read = models.BooleanField(default=False)
-    is_sent = models.BooleanField(default=False)  # For email notifications
+    data = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    scheduled_for = models.DateTimeField(null=True, blank=True)  # For scheduled notifications
+    digest_after = models.DateTimeField()
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['digest_after']),
+            models.Index(fields=['user', 'channel']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.notification_type} - {self.created_at}"
+        return f"{self.user_id} - {self.channel} - {self.type}"
 
-    @classmethod
-    def create_streak_reminder(cls, user, streak_count):
-        """Create a streak reminder notification"""
-        from django.utils import timezone
-        
-        # Calculate user's local midnight
-        user_profile = user.student_profile
-        preferred_times = user_profile.get_preferred_study_time()
-        
-        # Default to evening if no preference set
-        reminder_hour = 20  # 8 PM default
-        if preferred_times:
-            # Use the last preferred time slot as reminder
-            reminder_hour = int(preferred_times[-1].split(':')[0])
-        
-        # Schedule notification 2 hours before preferred time
-        scheduled_time = timezone.now().replace(
-            hour=max(0, reminder_hour - 2),
-            minute=0,
-            second=0,
-            microsecond=0
-        )
-        
-        return cls.objects.create(
-            user=user,
-            notification_type='streak_reminder',
-            title='Ilaaligaaga Waxbarashada!',
-            message=f'Waxaa kuu hadhay {streak_count} maalmood oo aad ilaalisid. Soo gal maanta oo dhammaystir casharkaaga!',
-            scheduled_for=scheduled_time
-        )
-
-    @classmethod
-    def create_achievement_notification(cls, user, achievement):
-        """Create an achievement earned notification"""
-        return cls.objects.create(
-            user=user,
-            notification_type='achievement_earned',
-            title=f'Hambalyo! {achievement.name}',
-            message=f'Waad dhammaystirtay "{achievement.description}". Waad heshay {achievement.points_reward} dhibcood!',
-        )
+class NotificationCounter(models.Model):
+    """
+    A user's unread in-app notification count, so inbox polls read one row.
+    Maintained by courses signals and courses.inbox, repaired by reconcile_counters.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    notification_unread = models.PositiveIntegerField(default=0)
 
-    @classmethod
-    def create_league_update(cls, user, league_position, league_name):
-        """Create a league update notification"""
-        return cls.objects.create(
-            user=user,
-            notification_type='league_update',
-            title='Warbixin Tartanka!',
-            message=f'Waad ku guulaysatay booska {league_position} tartanka {league_name}!',
-        )
+    def __str__(self):
+        return f"{self.user_id} - {self.notification_unread} unread"
 
 class UserProblem(models.Model):
     """
@@ -1220,7 +1435,17 @@ class UserProblem(models.Model):
     solved = models.BooleanField(default=False)
     solved_at = models.DateTimeField(null=True, blank=True)
     attempts = models.PositiveIntegerField(default=0)
+    correct_attempts = models.PositiveIntegerField(default=0)
+    attempts_to_solve = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Attempts it took to solve the problem the first time")
+    time_to_solve = models.FloatField(
+        null=True, blank=True, help_text="Seconds spent on the solving attempt, as reported by the client")
     xp_earned = models.PositiveIntegerField(default=0)
+    # Spaced-repetition schedule, advanced on every answer (see courses.practice)
+    ease = models.FloatField(default=2.5)
+    review_interval = models.FloatField(default=0, help_text="Days until the next review")
+    review_streak = models.PositiveSmallIntegerField(default=0)
+    due_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         unique_together = ['user', 'problem']
@@ -1269,3 +1494,144 @@ class UserProblem(models.Model):
             
             return True
         return False
+
+
+class ProblemStats(models.Model):
+    """
+    Running difficulty statistics for a problem. Updated on every submission
+    (see courses.item_stats) and recomputed exactly by recompute_item_stats.
+    Means and variances are kept as Welford (mean, M2) pairs.
+    """
+    problem = models.OneToOneField(
+        Problem, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempt_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    learner_count = models.PositiveIntegerField(default=0)
+    solver_count = models.PositiveIntegerField(default=0)
+    solve_rate = models.FloatField(default=0, help_text="Share of learners who solved the problem")
+    attempts_mean = models.FloatField(default=0, help_text="Mean attempts needed by solvers")
+    attempts_m2 = models.FloatField(default=0)
+    time_count = models.PositiveIntegerField(default=0)
+    time_mean = models.FloatField(default=0, help_text="Mean seconds on the solving attempt")
+    time_m2 = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Problem stats'
+        indexes = [
+            models.Index(fields=['solve_rate']),
+        ]
+
+    def __str__(self):
+        return f"Stats for problem {self.problem_id}"
+
+    @property
+    def accuracy(self):
+        return self.correct_count / self.attempt_count if self.attempt_count else 0
+
+    @property
+    def attempts_variance(self):
+        return self.attempts_m2 / (self.solver_count - 1) if self.solver_count > 1 else 0
+
+    @property
+    def time_variance(self):
+        return self.time_m2 / (self.time_count - 1) if self.time_count > 1 else 0
+
+
+class PracticeQueue(models.Model):
+    """
+    A learner's spaced-repetition review queue.
+    entries packs (due timestamp, problem id) pairs as little-endian uint32s,
+    latest due first, so the next problem to practice is always the last pair.
+    """
+    ENTRY = struct.Struct('<II')
+    # Due timestamps are clamped into what a uint32 holds
+    MAX_DUE = 2 ** 32 - 1
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        related_name='practice_queue',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    entries = models.BinaryField(default=bytes, blank=True)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Practice queue of user {self.user_id} ({self.size} problems)"
+
+    @property
+    def size(self):
+        return len(self.entries) // self.ENTRY.size
+
+    @classmethod
+    def pack(cls, entries, limit=None):
+        """Pack (due timestamp, problem id) pairs, keeping the limit soonest due"""
+        entries = sorted(entries, reverse=True)
+        if limit is not None:
+            entries = entries[-limit:] if limit else []
+        return b''.join(cls.ENTRY.pack(cls.clamp_due(due), problem_id) for due, problem_id in entries)
+
+    @classmethod
+    def clamp_due(cls, due):
+        return min(max(due, 0), cls.MAX_DUE)
+
+    def unpack(self):
+        """(due timestamp, problem id) pairs, latest due first"""
+        return list(self.ENTRY.iter_unpack(bytes(self.entries)))
+
+    def _due(self, index):
+        return self.ENTRY.unpack_from(self.entries, index * self.ENTRY.size)[0]
+
+    def peek(self):
+        """(problem id, due datetime) of the next problem, or None when the queue is empty"""
+        if not self.size:
+            return None
+        due, problem_id = self.ENTRY.unpack_from(self.entries, len(self.entries) - self.ENTRY.size)
+        return problem_id, datetime.fromtimestamp(due, tz=dt_timezone.utc)
+
+    def pop(self):
+        """Remove and return the next problem, like peek()"""
+        head = self.peek()
+        if head is not None:
+            self.entries = bytes(self.entries)[:-self.ENTRY.size]
+        return head
+
+    def due_count(self, now=None):
+        """Number of problems due by now, by binary search over the packed entries"""
+        now = int((now or timezone.now()).timestamp())
+        low, high = 0, self.size
+        # Entries are sorted latest due first: find the first one that is already due
+        while low < high:
+            middle = (low + high) // 2
+            if self._due(middle) > now:
+                low = middle + 1
+            else:
+                high = middle
+        return self.size - low
+
+    def reschedule(self, due_by_problem, limit=None):
+        """
+        Move problems to new due datetimes in place. A due of None removes
+        the problem. Problems past the limit are dropped from the far end.
+        """
+        keys = []
+        problem_ids = []
+        for due, problem_id in self.unpack():
+            if problem_id not in due_by_problem:
+                keys.append(-due)
+                problem_ids.append(problem_id)
+        for problem_id, due_at in due_by_problem.items():
+            if due_at is None:
+                continue
+            # Negated, so the list stays ascending for bisect
+            key = -self.clamp_due(int(due_at.timestamp()))
+            position = bisect.bisect_right(keys, key)
+            keys.insert(position, key)
+            problem_ids.insert(position, problem_id)
+        if limit is not None and len(keys) > limit:
+            keys = keys[len(keys) - limit:]
+            problem_ids = problem_ids[len(problem_ids) - limit:]
+        self.entries = b''.join(
+            self.ENTRY.pack(-key, problem_id) for key, problem_id in zip(keys, problem_ids))
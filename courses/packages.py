@@ -0,0 +1,306 @@
+"""
+Offline course packages.
+
+A package is a zip archive with a manifest, one JSON document per lesson
+(the lesson content bundle plus full problem data, hints and solution steps)
+and the images those lessons reference under MEDIA_ROOT/courses/.
+
+Every lesson document is written to disk as a fragment named after the
+lesson's version, so when one lesson changes only that fragment is rebuilt
+before the archive is reassembled. build_course_packages runs this from cron.
+"""
+import hashlib
+import json
+import os
+import re
+import zipfile
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Prefetch
+from django.utils import timezone
+from .cache import LESSON_CONTENT_CACHE_TIMEOUT, lesson_content_cache_key
+from .models import (
+    Course, Lesson, LessonContentBlock, Problem, Hint, SolutionStep, CoursePackage
+)
+
+# Bump when the archive layout changes, so every package is rebuilt
+PACKAGE_FORMAT = 1
+
+PACKAGE_ROOT = getattr(
+    settings, 'COURSE_PACKAGE_ROOT', os.path.join(settings.MEDIA_ROOT, 'packages'))
+COURSE_MEDIA_ROOT = os.path.join(settings.MEDIA_ROOT, 'courses')
+
+COURSE_FIELDS = [
+    'id', 'title', 'slug', 'description', 'thumbnail', 'author_id',
+    'lesson_count', 'problem_count', 'updated_at'
+]
+LESSON_FIELDS = ['id', 'title', 'slug', 'lesson_number', 'estimated_time', 'problem_count']
+PROBLEM_FIELDS = [
+    'id', 'which', 'question_text', 'question_type', 'options', 'correct_answer',
+    'explanation', 'order', 'content', 'diagram_config', 'diagrams', 'img', 'xp'
+]
+
+# Matches /media/courses/... and /api/media/courses/... URLs inside lesson JSON
+MEDIA_REFERENCE = re.compile(r'/media/(courses/[^"\'\s?#\\]+)')
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def build_lesson_content(lesson_id):
+    """
+    All blocks and problems of a lesson in order, as LessonViewSet.content returns them.
+    """
+    content = []
+    for block in LessonContentBlock.objects.filter(lesson_id=lesson_id).order_by('order'):
+        content.append({
+            'type': 'block',
+            'id': block.id,
+            'order': block.order,
+            'block_type': block.block_type,
+            'content': block.content
+        })
+
+    for problem in Problem.objects.filter(lesson_id=lesson_id).order_by('order'):
+        content.append({
+            'type': 'problem',
+            'id': problem.id,
+            'order': problem.order,
+            'question_type': problem.question_type,
+            'question_text': problem.question_text,
+            'content': problem.content,
+            'xp_value': problem.content.get('points', problem.xp)
+        })
+
+    content.sort(key=lambda x: x['order'])
+    return content
+
+
+def get_lesson_content(lesson_id):
+    content = cache.get(lesson_content_cache_key(lesson_id))
+    if content is None:
+        content = build_lesson_content(lesson_id)
+        cache.set(lesson_content_cache_key(lesson_id), content, LESSON_CONTENT_CACHE_TIMEOUT)
+    return content
+
+
+def lesson_versions(course_id):
+    """
+    Lesson headers of a course, in order, each with a version that changes
+    whenever the lesson, its blocks or its problems (hints included) change.
+    """
+    lessons = Lesson.objects.filter(course_id=course_id).annotate(
+        blocks_updated=Max('content_blocks__updated_at'),
+        problems_updated=Max('problems__updated_at'),
+        block_total=Count('content_blocks', distinct=True),
+        problem_total=Count('problems', distinct=True)
+    ).order_by('lesson_number', 'id').values(
+        *LESSON_FIELDS, 'updated_at', 'blocks_updated', 'problems_updated',
+        'block_total', 'problem_total'
+    )
+
+    result = []
+    for lesson in lessons:
+        stamp = repr((
+            PACKAGE_FORMAT, lesson.pop('updated_at'), lesson.pop('blocks_updated'),
+            lesson.pop('problems_updated'), lesson.pop('block_total'), lesson.pop('problem_total')
+        ))
+        lesson['version'] = hashlib.sha1(stamp.encode()).hexdigest()[:16]
+        result.append(lesson)
+    return result
+
+
+def build_lesson_document(lesson):
+    """One lesson of the package, serialized to JSON bytes"""
+    problems = []
+    for problem in Problem.objects.filter(lesson_id=lesson['id']).order_by('order').prefetch_related(
+        Prefetch('hints', queryset=Hint.objects.order_by('order')),
+        Prefetch('solution_steps', queryset=SolutionStep.objects.order_by('order'))
+    ):
+        data = {field: getattr(problem, field) for field in PROBLEM_FIELDS}
+        data['hints'] = [hint.content for hint in problem.hints.all()]
+        data['solution_steps'] = [step.explanation for step in problem.solution_steps.all()]
+        problems.append(data)
+
+    header = {field: lesson[field] for field in LESSON_FIELDS}
+    return json.dumps({
+        'lesson': header,
+        'content': build_lesson_content(lesson['id']),
+        'problems': problems,
+    }, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def referenced_images(document):
+    """Paths relative to MEDIA_ROOT of the course images a lesson document links to"""
+    images = set()
+    for path in MEDIA_REFERENCE.findall(document.decode('utf-8')):
+        full_path = os.path.normpath(os.path.join(settings.MEDIA_ROOT, path))
+        # Ignore anything that escapes MEDIA_ROOT/courses/
+        if full_path.startswith(COURSE_MEDIA_ROOT + os.sep) and os.path.isfile(full_path):
+            images.add(os.path.relpath(full_path, settings.MEDIA_ROOT))
+    return images
+
+
+def course_package_dir(course_id):
+    return os.path.join(PACKAGE_ROOT, str(course_id))
+
+
+def package_path(package):
+    return os.path.join(course_package_dir(package.course_id), package.file_name)
+
+
+def _write_atomic(path, data):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+
+
+def build_course_package(course, force=False):
+    """
+    Build the course's package unless the current one already matches its content.
+    Returns (package, lessons rebuilt, whether an archive was written).
+    """
+    lessons = lesson_versions(course.id)
+    course_data = {field: getattr(course, field) for field in COURSE_FIELDS}
+    version = hashlib.sha1(repr((
+        PACKAGE_FORMAT, course_data, [(lesson['id'], lesson['version']) for lesson in lessons]
+    )).encode()).hexdigest()[:16]
+
+    package = CoursePackage.objects.filter(course=course).first()
+    if (package and package.version == version and not force
+            and os.path.exists(package_path(package))):
+        return package, 0, False
+
+    course_dir = course_package_dir(course.id)
+    fragment_dir = os.path.join(course_dir, 'lessons')
+    os.makedirs(fragment_dir, exist_ok=True)
+
+    # Reuse the fragment of every lesson whose version is unchanged
+    fragments = []
+    rebuilt = 0
+    for lesson in lessons:
+        fragment = os.path.join(fragment_dir, f"{lesson['id']}-{lesson['version']}.json")
+        if force or not os.path.exists(fragment):
+            _write_atomic(fragment, build_lesson_document(lesson))
+            rebuilt += 1
+        fragments.append((lesson, fragment))
+
+    file_name = f'{course.slug or course.id}-{version}.zip'
+    archive = os.path.join(course_dir, file_name)
+    images = set()
+    with zipfile.ZipFile(f'{archive}.tmp', 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for lesson, fragment in fragments:
+            with open(fragment, 'rb') as handle:
+                document = handle.read()
+            bundle.writestr(f"lessons/{lesson['id']}.json", document)
+            images |= referenced_images(document)
+
+        # Images are already compressed, so they are stored as-is
+        for image in sorted(images):
+            bundle.write(
+                os.path.join(settings.MEDIA_ROOT, image),
+                f'media/{image}',
+                compress_type=zipfile.ZIP_STORED
+            )
+
+        bundle.writestr('manifest.json', json.dumps({
+            'format': PACKAGE_FORMAT,
+            'version': version,
+            'built_at': timezone.now(),
+            'course': course_data,
+            'lessons': [
+                {
+                    **{field: lesson[field] for field in LESSON_FIELDS},
+                    'version': lesson['version'],
+                    'file': f"lessons/{lesson['id']}.json"
+                }
+                for lesson, fragment in fragments
+            ],
+            'images': [f'media/{image}' for image in sorted(images)],
+        }, cls=DjangoJSONEncoder, ensure_ascii=False))
+    os.replace(f'{archive}.tmp', archive)
+
+    package, _ = CoursePackage.objects.update_or_create(course=course, defaults={
+        'version': version,
+        'file_name': file_name,
+        'size': os.path.getsize(archive),
+        'lesson_count': len(lessons),
+    })
+
+    # Old archives and fragments of lessons that changed or were removed.
+    # Downloads already streaming an old archive keep their open file.
+    keep = {file_name} | {os.path.basename(fragment) for lesson, fragment in fragments}
+    for directory in (course_dir, fragment_dir):
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name not in keep and os.path.isfile(path):
+                os.remove(path)
+
+    return package, rebuilt, True
+
+
+def build_course_packages(course_ids=None, include_unpublished=False, force=False):
+    """
+    Bring the packages of the given (or all published) courses up to date.
+    Yields (course, package, lessons rebuilt, whether an archive was written).
+    """
+    courses = Course.objects.order_by('id')
+    if course_ids:
+        courses = courses.filter(id__in=course_ids)
+    elif not include_unpublished:
+        courses = courses.filter(is_published=True)
+
+    for course in courses:
+        yield (course, *build_course_package(course, force=force))
+
+
+def parse_byte_range(header, size):
+    """
+    Parse a single-range "Range: bytes=..." header into inclusive (start, end).
+    Returns None when the whole file should be sent (no header, a syntax the
+    server ignores, or several ranges) and raises UnsatisfiableRange when the
+    range lies outside the file.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None
+    first, dash, last = spec.partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise UnsatisfiableRange()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise UnsatisfiableRange()
+    return start, min(end, size - 1)
+
+
+def iter_file_range(handle, start, length, chunk_size=RANGE_CHUNK_SIZE):
+    """Yield length bytes of an open file from start, closing it afterwards"""
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
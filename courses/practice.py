@@ -0,0 +1,112 @@
+"""
+Spaced-repetition practice.
+
+Every graded answer advances the problem's schedule on the learner's
+UserProblem row (SM-2 with a pass/fail grade) and moves the problem to its
+new slot in their PracticeQueue, so finding the next problem to practice
+reads one row instead of scanning every attempted problem.
+rebuild_practice_queues() rebuilds all queues from UserProblem nightly.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import PracticeQueue, Problem, UserProblem
+
+# Problems kept per learner, soonest due first
+PRACTICE_QUEUE_SIZE = getattr(settings, 'PRACTICE_QUEUE_SIZE', 500)
+# A missed problem comes back in the same session
+RETRY_DELAY = timedelta(minutes=10)
+MIN_EASE = 1.3
+MAX_EASE = 3.0
+# Days; the interval grows by the ease on every correct answer, so it needs a ceiling
+MAX_REVIEW_INTERVAL = getattr(settings, 'PRACTICE_MAX_REVIEW_INTERVAL', 365)
+
+
+def schedule_review(row, is_correct, now):
+    """Advance a UserProblem's review schedule by one answer"""
+    if is_correct:
+        row.review_streak += 1
+        if row.review_streak == 1:
+            row.review_interval = 1
+        elif row.review_streak == 2:
+            row.review_interval = 6
+        else:
+            row.review_interval = min(row.review_interval * row.ease, MAX_REVIEW_INTERVAL)
+        row.ease = min(row.ease + 0.1, MAX_EASE)
+        row.due_at = now + timedelta(days=row.review_interval)
+    else:
+        row.review_streak = 0
+        row.review_interval = 0
+        row.ease = max(row.ease - 0.2, MIN_EASE)
+        row.due_at = now + RETRY_DELAY
+
+
+def reschedule_practice(user_id, due_by_problem):
+    """Move problems in the user's queue; the queue row is locked for the update"""
+    with transaction.atomic():
+        queue, _ = PracticeQueue.objects.select_for_update().get_or_create(user_id=user_id)
+        queue.reschedule(due_by_problem, limit=PRACTICE_QUEUE_SIZE)
+        queue.save(update_fields=['entries', 'updated_at'])
+
+
+def next_practice_problem(user_id, now=None):
+    """
+    The problem at the head of the user's queue as (problem, due_at, due_count),
+    or None when there is nothing to practice. The head may not be due yet.
+    """
+    queue = PracticeQueue.objects.filter(user_id=user_id).first()
+    while queue is not None:
+        head = queue.peek()
+        if head is None:
+            return None
+        problem_id, due_at = head
+        problem = Problem.objects.filter(pk=problem_id).first()
+        if problem is not None:
+            return problem, due_at, queue.due_count(now)
+
+        # Deleted since the queue was built - drop it and look at the next one
+        with transaction.atomic():
+            queue = PracticeQueue.objects.select_for_update().get(pk=queue.pk)
+            if queue.peek() == head:
+                queue.pop()
+                queue.save(update_fields=['entries', 'updated_at'])
+    return None
+
+
+def rebuild_practice_queues(chunk_size=1000):
+    """
+    Rebuild every learner's queue from UserProblem, a chunk of users at a time.
+    Attempted problems that were never scheduled are due immediately.
+    Yields the number of queues written per chunk.
+    """
+    user_ids = UserProblem.objects.filter(attempts__gt=0).order_by(
+        'user_id').values_list('user_id', flat=True).distinct()
+    last_id = 0
+    while True:
+        chunk = list(user_ids.filter(user_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]
+
+        with transaction.atomic():
+            PracticeQueue.objects.bulk_create(
+                [PracticeQueue(user_id=user_id) for user_id in chunk], ignore_conflicts=True)
+            # Answers that land meanwhile wait for the lock and are applied on top
+            queues = list(PracticeQueue.objects.select_for_update().filter(user_id__in=chunk))
+
+            now = timezone.now()
+            fallback = int(now.timestamp())
+            entries = {}
+            for user_id, problem_id, due_at in UserProblem.objects.filter(
+                user_id__in=chunk, attempts__gt=0
+            ).values_list('user_id', 'problem_id', 'due_at').iterator():
+                due = int(due_at.timestamp()) if due_at else fallback
+                entries.setdefault(user_id, []).append((due, problem_id))
+
+            for queue in queues:
+                queue.entries = PracticeQueue.pack(entries.get(queue.user_id, ()), PRACTICE_QUEUE_SIZE)
+                queue.rebuilt_at = now
+                queue.updated_at = now
+            PracticeQueue.objects.bulk_update(queues, ['entries', 'rebuilt_at', 'updated_at'])
+        yield len(queues)
@@ -0,0 +1,59 @@
+"""
+Live notification push.
+
+Every connected client of a user (courses.consumers.NotificationConsumer)
+listens on the user's channel group. New notifications and unread count
+changes are published there once the transaction that made them commits,
+so a rolled back write is never announced. Consumers coalesce what
+arrives within a short window into one message.
+
+Publishing needs a channel layer shared with the ASGI server (Redis, see
+CHANNEL_LAYERS) to reach clients from cron jobs and other processes.
+Failures are logged and never break the write that triggered them.
+"""
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def notification_group(user_id):
+    return f'notifications_{user_id}'
+
+
+def serialize_notification(notification):
+    from api.serializers import NotificationSerializer
+    return dict(NotificationSerializer(notification).data)
+
+
+def _send(messages):
+    """Send {user_id: message} to the users' groups"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for user_id, message in messages.items():
+        try:
+            async_to_sync(channel_layer.group_send)(notification_group(user_id), message)
+        except Exception:
+            logger.exception('Publishing to the notification channel of user %s failed', user_id)
+
+
+def publish_notifications(notifications):
+    """Push new notifications to their users, one message per user, after commit"""
+    messages = {}
+    for notification in notifications:
+        if not notification.websocket:
+            continue
+        message = messages.setdefault(notification.user_id, {'type': 'notification.created', 'notifications': []})
+        message['notifications'].append(serialize_notification(notification))
+    if messages:
+        transaction.on_commit(lambda: _send(messages))
+
+
+def publish_unread_changed(user_ids):
+    """Tell the users' clients their unread count changed, after commit"""
+    messages = {user_id: {'type': 'unread.changed'} for user_id in set(user_ids)}
+    if messages:
+        transaction.on_commit(lambda: _send(messages))
@@ -0,0 +1,167 @@
+"""
+Real-time reminder scheduler.
+
+Users are sorted into reminder segments by one annotated query per chunk
+instead of a few queries per user, with the same priorities as
+NotificationService.check_and_send_real_time_reminders:
+
+- streak_broken: last activity more than a day ago with a running streak
+- inactive: last activity a day or more ago
+- daily: not active today
+
+Learning contexts are fetched for the whole chunk at once. Emails are
+rendered on a thread pool while the next chunk is loaded, then queued in
+bulk for the email worker.
+"""
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from accounts.email_delivery import enqueue_emails
+from core.email_templates import render_email
+from .services import get_user_learning_contexts
+
+REMINDERS = {
+    'streak_broken': ('emails/streak_reminder.html', 'Ha lumin dadaalkaaga! Xariggaaga halis ayuu ku jiraa.'),
+    'inactive': ('emails/streak_reminder.html', 'Waxbarashada waa ku sugayaa! Sii wad casharkaaga.'),
+    'daily': ('emails/daily_reminder.html', 'Maanta waa maalin wanaagsan oo aad ku baran karto!'),
+}
+# Segments whose email only makes sense with a course to continue
+CONTEXT_REQUIRED = {'streak_broken', 'inactive'}
+
+
+def segment_users(queryset=None, today=None):
+    """
+    Annotate users with their reminder segment (None if they need no reminder)
+    and the streak it was based on.
+    """
+    if queryset is None:
+        queryset = get_user_model().objects.filter(is_active=True)
+    today = today or timezone.now().date()
+    yesterday = today - timedelta(days=1)
+    return queryset.annotate(
+        last_active_date=TruncDate('last_active', tzinfo=dt_timezone.utc),
+        # last_active wins; the legacy streak date is only a fallback
+        activity_date=Coalesce(
+            TruncDate('last_active', tzinfo=dt_timezone.utc), 'streak__last_activity_date'),
+        streak_count=Coalesce('streak__current_streak', 0),
+    ).annotate(
+        segment=Case(
+            When(Q(activity_date__lt=yesterday, streak_count__gt=0), then=Value('streak_broken')),
+            When(activity_date__lte=yesterday, then=Value('inactive')),
+            When(Q(last_active__isnull=True) | ~Q(last_active_date=today), then=Value('daily')),
+            default=None,
+            output_field=CharField()
+        )
+    )
+
+
+def render_reminder(user, segment, context):
+    """(subject, html) of one reminder email, or None if it can't be personalised"""
+    template, subject = REMINDERS[segment]
+    if context is None:
+        if segment in CONTEXT_REQUIRED:
+            return None
+        context = {'user': user, 'site_url': 'https://garaad.org'}
+    context = dict(context)
+    if segment == 'streak_broken':
+        context['streak_count'] = user.streak_count
+        context['broke_streak'] = True
+    elif segment == 'daily':
+        context['daily_motivation'] = True
+        context['streak_days'] = user.streak_count
+    return subject, render_email(template, context)
+
+
+class ReminderRun:
+    """
+    One pass over all users. Counters and phase timings end up in stats
+    and timings for the throughput report.
+    """
+
+    def __init__(self, queryset=None, chunk_size=500, workers=4, dry_run=False, force=False):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.force = force
+        self.stats = Counter()
+        self.timings = Counter()
+        self.errors = []
+
+    def _timed(self, phase, started):
+        self.timings[phase] += time.perf_counter() - started
+
+    def chunks(self):
+        """Users that need a reminder with their learning contexts, a chunk at a time"""
+        users = segment_users(self.queryset).filter(segment__isnull=False).order_by('pk')
+        last_id = 0
+        while True:
+            started = time.perf_counter()
+            chunk = list(users.filter(pk__gt=last_id)[:self.chunk_size])
+            self._timed('segment', started)
+            if not chunk:
+                return
+            last_id = chunk[-1].pk
+
+            started = time.perf_counter()
+            contexts = get_user_learning_contexts([user.pk for user in chunk])
+            self._timed('contexts', started)
+            yield chunk, contexts
+
+    def run(self):
+        started = time.perf_counter()
+        now = timezone.now()
+        # The same reminder goes out once per segment and day unless forced
+        dedupe_suffix = now.isoformat() if self.force else now.date().isoformat()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = None
+            for chunk, contexts in self.chunks():
+                futures = [
+                    (user, pool.submit(render_reminder, user, user.segment, contexts.get(user.pk)))
+                    for user in chunk
+                ]
+                # Render this chunk while the next one is loaded
+                if pending:
+                    self._queue(pending, dedupe_suffix)
+                pending = futures
+            if pending:
+                self._queue(pending, dedupe_suffix)
+
+        self.timings['total'] = time.perf_counter() - started
+        return self.stats
+
+    def _queue(self, futures, dedupe_suffix):
+        messages = []
+        started = time.perf_counter()
+        for user, future in futures:
+            self.stats['users'] += 1
+            self.stats[user.segment] += 1
+            try:
+                rendered = future.result()
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.errors.append((user.pk, user.segment, e))
+                continue
+            if rendered is None:
+                self.stats['skipped'] += 1
+                continue
+            subject, html = rendered
+            messages.append({
+                'to_email': user.email,
+                'subject': subject,
+                'html': html,
+                'dedupe_key': f'reminder:{user.segment}:{dedupe_suffix}',
+            })
+        self._timed('render', started)
+
+        if messages and not self.dry_run:
+            started = time.perf_counter()
+            self.stats['queued'] += enqueue_emails(messages)
+            self._timed('queue', started)
+        self.stats['rendered'] += len(messages)
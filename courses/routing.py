@@ -0,0 +1,8 @@
+from django.urls import re_path
+from community.middleware import JwtAuthMiddleware
+from . import consumers
+
+websocket_urlpatterns = [
+    # Authenticated with ?token=<JWT access token>
+    re_path(r'ws/notifications/?$', JwtAuthMiddleware(consumers.NotificationConsumer.as_asgi())),
+]
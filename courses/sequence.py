@@ -0,0 +1,155 @@
+"""
+Cached per-course lesson sequences.
+
+A sequence is the course's lessons ordered by (lesson_number, id), stored as
+small tuples so next/previous/first-uncompleted lookups never touch the
+database. Sequences are invalidated whenever a lesson is saved or deleted.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from django.core.cache import cache
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
+from .cache import LESSON_SEQUENCE_CACHE_TIMEOUT, lesson_sequence_cache_key
+from .models import Lesson, CourseEnrollment, UserProgress
+
+LessonEntry = namedtuple('LessonEntry', ['lesson_number', 'id', 'slug', 'title'])
+
+
+class LessonSequence:
+    """
+    Ordered lessons of one course.
+    """
+    def __init__(self, course_id, entries):
+        self.course_id = course_id
+        self.entries = list(entries)
+        self._positions = {entry.id: index for index, entry in enumerate(self.entries)}
+        self._numbers = [entry.lesson_number for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def first(self):
+        return self.entries[0] if self.entries else None
+
+    def get(self, lesson_id):
+        position = self._positions.get(lesson_id)
+        return self.entries[position] if position is not None else None
+
+    def next_after(self, lesson_id):
+        """The lesson following lesson_id, or None if it is the last one"""
+        position = self._positions.get(lesson_id)
+        if position is None or position + 1 >= len(self.entries):
+            return None
+        return self.entries[position + 1]
+
+    def previous_before(self, lesson_id):
+        position = self._positions.get(lesson_id)
+        if not position:
+            return None
+        return self.entries[position - 1]
+
+    def next_after_number(self, lesson_number):
+        """First lesson with a lesson_number strictly greater than the given one"""
+        position = bisect_right(self._numbers, lesson_number)
+        return self.entries[position] if position < len(self.entries) else None
+
+    def first_uncompleted(self, completed_ids):
+        for entry in self.entries:
+            if entry.id not in completed_ids:
+                return entry
+        return None
+
+    def __getstate__(self):
+        # Only the entries are cached; lookup tables are rebuilt on load
+        return {'course_id': self.course_id, 'entries': self.entries}
+
+    def __setstate__(self, state):
+        self.__init__(state['course_id'], state['entries'])
+
+
+def get_lesson_sequences(course_ids):
+    """
+    Return {course_id: LessonSequence}, reading every cached sequence in one
+    round trip and loading the misses with a single query.
+    """
+    course_ids = set(course_ids)
+    keys = {lesson_sequence_cache_key(course_id): course_id for course_id in course_ids}
+    cached = cache.get_many(list(keys))
+    sequences = {keys[key]: sequence for key, sequence in cached.items()}
+
+    missing = course_ids - set(sequences)
+    if missing:
+        entries = {course_id: [] for course_id in missing}
+        for course_id, *entry in Lesson.objects.filter(
+            course_id__in=missing
+        ).order_by('lesson_number', 'id').values_list(
+            'course_id', 'lesson_number', 'id', 'slug', 'title'
+        ):
+            entries[course_id].append(LessonEntry(*entry))
+
+        loaded = {
+            course_id: LessonSequence(course_id, course_entries)
+            for course_id, course_entries in entries.items()
+        }
+        cache.set_many(
+            {lesson_sequence_cache_key(course_id): sequence for course_id, sequence in loaded.items()},
+            LESSON_SEQUENCE_CACHE_TIMEOUT
+        )
+        sequences.update(loaded)
+    return sequences
+
+
+def get_lesson_sequence(course_id):
+    return get_lesson_sequences([course_id])[course_id]
+
+
+def next_lessons_for_users(user_ids):
+    """
+    Resolve each user's current course and next lesson in bulk, for email jobs.
+    The current course is the most recent enrollment; the next lesson is the
+    one after the highest completed lesson, or the first lesson of the course.
+    Returns {user_id: (enrollment, LessonEntry or None)} using two queries
+    plus one for any uncached sequences, however many users are asked for.
+    """
+    # Only each user's latest enrollment comes back, not their whole history
+    latest = {
+        enrollment.user_id: enrollment
+        for enrollment in CourseEnrollment.objects.filter(
+            user_id__in=user_ids
+        ).annotate(
+            recency=Window(
+                RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=[F('enrolled_at').desc(), F('id').desc()]
+            )
+        ).filter(recency=1).select_related('course')
+    }
+    if not latest:
+        return {}
+
+    last_completed = {
+        (row['user_id'], row['lesson__course_id']): row['last_number']
+        for row in UserProgress.objects.filter(
+            user_id__in=latest,
+            lesson__course_id__in={e.course_id for e in latest.values()},
+            status='completed'
+        ).values('user_id', 'lesson__course_id').annotate(
+            last_number=Max('lesson__lesson_number')
+        ).order_by()
+    }
+
+    sequences = get_lesson_sequences(e.course_id for e in latest.values())
+    result = {}
+    for user_id, enrollment in latest.items():
+        sequence = sequences[enrollment.course_id]
+        last_number = last_completed.get((user_id, enrollment.course_id))
+        if last_number is None:
+            next_lesson = sequence.first()
+        else:
+            next_lesson = sequence.next_after_number(last_number)
+        result[user_id] = (enrollment, next_lesson)
+    return result
@@ -5,59 +5,77 @@ from .models import (
     UserProgress, CourseEnrollment, UserReward, LeaderboardEntry,
     DailyChallenge, UserChallengeProgress, UserLevel,
     Achievement, UserAchievement, CulturalEvent,
-    UserCulturalProgress, CommunityContribution, UserNotification
+    UserCulturalProgress, CommunityContribution, ProblemStats
 )
+from api.models import Notification
 from django.db import models
 from leagues.models import UserLeague, League  # Import from leagues app
+from core.sparse import SparseFieldsMixin
 
 
-class HintSerializer(serializers.ModelSerializer):
+class HintSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Hint
         fields = ['id', 'content', 'order']
 
 
-class SolutionStepSerializer(serializers.ModelSerializer):
+class SolutionStepSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SolutionStep
         fields = ['id', 'explanation', 'order']
 
 
-class ProblemSerializer(serializers.ModelSerializer):
+class ProblemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    xp_value = serializers.SerializerMethodField()
+    hints = HintSerializer(many=True, read_only=True)
+    solution_steps = SolutionStepSerializer(many=True, read_only=True)
+
     class Meta:
         model = Problem
         fields = [
             'id', 'which', 'question_text', 'question_type', 'options',
             'correct_answer', 'explanation', 'content',
-            'diagram_config', 'diagrams', 'img', 'xp', 'created_at', 'updated_at'
+            'diagram_config', 'diagrams', 'img', 'xp', 'created_at', 'updated_at',
+            'xp_value', 'hints', 'solution_steps'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        # Only serialized with ?expand=hints,solution_steps (batch expands them by default)
+        expandable_fields = ['hints', 'solution_steps']
+        field_dependencies = {
+            'xp_value': ['content', 'xp'],
+            'diagram_config': ['question_type', 'diagram_config', 'diagrams'],
+            'diagrams': ['question_type', 'diagram_config', 'diagrams'],
+        }
+
+    def get_xp_value(self, instance):
+        # Handle XP value - check if content is dict or list
+        if isinstance(instance.content, dict):
+            return instance.content.get('points', instance.xp)
+        return instance.xp
 
     def to_representation(self, instance):
         """
-        Add XP information to the response and handle diagram configuration visibility
+        Handle diagram configuration visibility
         """
         data = super().to_representation(instance)
-        
-        # Handle XP value - check if content is dict or list
-        if isinstance(instance.content, dict):
-            data['xp_value'] = instance.content.get('points', instance.xp)
-        else:
-            data['xp_value'] = instance.xp
-        
+        if 'diagram_config' not in data and 'diagrams' not in data:
+            return data
+
         # Handle diagram configuration for diagram type problems
         if instance.question_type == 'diagram':
             # Ensure mutual exclusivity in response
             if instance.diagrams and instance.diagrams != []:
                 # Multiple diagrams format
-                data['diagram_config'] = None
+                hidden = ['diagram_config']
             elif instance.diagram_config and instance.diagram_config != {}:
                 # Single diagram format
-                data['diagrams'] = None
+                hidden = ['diagrams']
             else:
                 # No diagrams configured
-                data['diagram_config'] = None
-                data['diagrams'] = None
+                hidden = ['diagram_config', 'diagrams']
+            for name in hidden:
+                if name in data:
+                    data[name] = None
         else:
             # Non-diagram problems should not include diagram fields
             data.pop('diagram_config', None)
@@ -209,7 +227,7 @@ class ProblemSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class LessonContentBlockSerializer(serializers.ModelSerializer):
+class LessonContentBlockSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = LessonContentBlock
         fields = ['id', 'lesson', 'block_type', 'content', 'order', 'problem']
@@ -264,7 +282,7 @@ class LessonContentBlockSerializer(serializers.ModelSerializer):
         return instance
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     content_blocks = LessonContentBlockSerializer(many=True, read_only=True)
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
 
@@ -278,7 +296,7 @@ class LessonSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
 
@@ -293,12 +311,12 @@ class CourseSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for listing courses without including all related lessons.
     """
     category = serializers.StringRelatedField()
-    lesson_count = serializers.SerializerMethodField()
+    lesson_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Course
@@ -309,11 +327,8 @@ class CourseListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_lesson_count(self, obj):
-        return obj.lessons.count()
 
-
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     courses = CourseSerializer(many=True, read_only=True)
     posts_count = serializers.SerializerMethodField()
 
@@ -325,11 +340,12 @@ class CategorySerializer(serializers.ModelSerializer):
             'is_community_enabled', 'community_description',
             'posts_count'
         ]
+        field_dependencies = {'posts_count': ['is_community_enabled', 'posts_count']}
     
     def get_posts_count(self, obj):
         """Get count of community posts if community is enabled"""
         if obj.is_community_enabled:
-            return obj.community_posts.count()
+            return obj.posts_count
         return 0
 
 
@@ -338,8 +354,9 @@ class CategorySerializer(serializers.ModelSerializer):
 class UserProgressSerializer(serializers.ModelSerializer):
     lesson_title = serializers.StringRelatedField(
         source='lesson.title', read_only=True)
+    # Lessons belong directly to courses; kept as module_title for existing clients
     module_title = serializers.StringRelatedField(
-        source='lesson.module.title', read_only=True)
+        source='lesson.course.title', read_only=True)
 
     class Meta:
         model = UserProgress
@@ -465,9 +482,13 @@ class LessonWithNextSerializer(LessonSerializer):
     class Meta(LessonSerializer.Meta):
         fields = LessonSerializer.Meta.fields + \
             ['next_lesson', 'user_progress']
+        field_dependencies = {
+            'next_lesson': ['course', 'lesson_number'],
+            'user_progress': [],
+        }
 
     def get_next_lesson(self, obj):
-        next_lesson = obj.get_next_lesson()
+        next_lesson = obj.get_next_lesson_entry()
         if next_lesson:
             return {
                 'id': next_lesson.id,
@@ -506,6 +527,7 @@ class CourseWithProgressSerializer(CourseSerializer):
 
     class Meta(CourseSerializer.Meta):
         fields = CourseSerializer.Meta.fields + ['user_progress']
+        field_dependencies = {'user_progress': []}
 
     def get_user_progress(self, obj):
         # Get user from context if provided
@@ -516,9 +538,11 @@ class CourseWithProgressSerializer(CourseSerializer):
         user = request.user
         try:
             enrollment = CourseEnrollment.objects.get(user=user, course=obj)
+            enrollment.ensure_current_layout()
             return {
                 'enrolled_at': enrollment.enrolled_at,
-                'progress_percent': enrollment.progress_percent
+                'progress_percent': enrollment.progress_percent,
+                'lesson_statuses': enrollment.get_lesson_statuses()
             }
         except CourseEnrollment.DoesNotExist:
             return None
@@ -640,7 +664,33 @@ class UserLeagueSerializer(serializers.ModelSerializer):
 
 
 class UserNotificationSerializer(serializers.ModelSerializer):
+    notification_type = serializers.CharField(source='type', read_only=True)
+
     class Meta:
-        model = UserNotification
+        model = Notification
         fields = ['id', 'notification_type', 'title', 'message', 'is_read', 'created_at', 'scheduled_for']
         read_only_fields = ['id', 'notification_type', 'title', 'message', 'created_at', 'scheduled_for']
+
+
+class ProblemStatsSerializer(serializers.ModelSerializer):
+    """Item statistics of a problem, with variances turned into standard deviations"""
+    question_text = serializers.CharField(source='problem.question_text', read_only=True)
+    lesson = serializers.IntegerField(source='problem.lesson_id', read_only=True)
+    accuracy = serializers.FloatField(read_only=True)
+    attempts_std = serializers.SerializerMethodField()
+    time_std = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProblemStats
+        fields = [
+            'problem', 'lesson', 'question_text', 'attempt_count', 'correct_count',
+            'learner_count', 'solver_count', 'solve_rate', 'accuracy',
+            'attempts_mean', 'attempts_std', 'time_count', 'time_mean', 'time_std',
+            'updated_at'
+        ]
+
+    def get_attempts_std(self, obj):
+        return obj.attempts_variance ** 0.5
+
+    def get_time_std(self, obj):
+        return obj.time_variance ** 0.5
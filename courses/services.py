@@ -1,10 +1,9 @@
 from django.conf import settings
 from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.utils import timezone
 from datetime import timedelta
 from .models import (
-    UserNotification, UserReward, UserLevel, UserProgress, 
+    UserReward, UserLevel, UserProgress, 
     LeaderboardEntry, Achievement, UserAchievement,
     CulturalEvent, UserCulturalProgress, CommunityContribution
 )
@@ -13,47 +12,48 @@ from django.db.models import F, Sum, OuterRef, Subquery
 from django.core.cache import cache
 import logging
 from leagues.models import UserLeague, League  # Import from leagues app
+from core.email_templates import render_email
 from accounts.utils import send_resend_email, TEST_MODE
+from accounts.email_delivery import enqueue_emails
 from courses.models import CourseEnrollment, Lesson, UserProgress
-from api.models import Streak
+from .sequence import next_lessons_for_users
+from .cache import LEARNING_CONTEXT_CACHE_TIMEOUT, learning_context_cache_key
+from .digest import buffer_notification
+from api.models import Notification, Streak
 
 logger = logging.getLogger(__name__)
 
-def get_user_learning_context(user):
+def get_user_learning_contexts(user_ids):
     """
-    Gathers the user's current learning context for personalized emails.
+    Learning contexts for many users at once, as {user_id: context}.
+    Users without an enrollment are left out. Takes the same few queries
+    for any number of users (see next_lessons_for_users).
     """
-    enrollment = CourseEnrollment.objects.filter(user=user).order_by('-enrolled_at').first()
-    if not enrollment:
-        return None
+    contexts = {}
+    for user_id, (enrollment, next_lesson) in next_lessons_for_users(user_ids).items():
+        course = enrollment.course
+        contexts[user_id] = {
+            "course_name": course.title,
+            "progress_percent": enrollment.progress_percent,
+            "next_lesson_title": next_lesson.title if next_lesson else "No more lessons",
+            "next_lesson_url": f"/courses/{course.slug}/{next_lesson.slug}/" if next_lesson else f"/courses/{course.slug}/",
+            "course_thumbnail": course.thumbnail if course.thumbnail else None
+        }
+    return contexts
 
-    course = enrollment.course
-    progress_percent = enrollment.progress_percent
 
-    # Find the last completed lesson to determine the next one
-    last_progress = UserProgress.objects.filter(
-        user=user, 
-        lesson__course=course, 
-        status='completed'
-    ).order_by('-lesson__lesson_number').first()
-
-    if last_progress:
-        # The next lesson is the one after the last completed lesson
-        next_lesson = Lesson.objects.filter(
-            course=course,
-            lesson_number__gt=last_progress.lesson.lesson_number
-        ).order_by('lesson_number').first()
-    else:
-        # If no lesson is completed, the first lesson is the next one
-        next_lesson = Lesson.objects.filter(course=course).order_by('lesson_number').first()
-
-    return {
-        "course_name": course.title,
-        "progress_percent": progress_percent,
-        "next_lesson_title": next_lesson.title if next_lesson else "No more lessons",
-        "next_lesson_url": f"/courses/{course.slug}/{next_lesson.slug}/" if next_lesson else f"/courses/{course.slug}/",
-        "course_thumbnail": course.thumbnail if course.thumbnail else None
-    }
+def get_user_learning_context(user):
+    """
+    Gathers the user's current learning context for personalized emails.
+    Cached briefly, since one request can send several emails.
+    """
+    key = learning_context_cache_key(user.id)
+    context = cache.get(key)
+    if context is None:
+        # Users without a context are cached as {} so they aren't looked up again
+        context = get_user_learning_contexts([user.id]).get(user.id, {})
+        cache.set(key, context, LEARNING_CONTEXT_CACHE_TIMEOUT)
+    return dict(context) if context else None
 
 class NotificationService:
     @staticmethod
@@ -86,81 +86,115 @@ class NotificationService:
         # --- 4. Send a general motivational reminder if no other conditions are met ---
         # (Implementation for this check would go here)
     
+    NOTIFICATION_TEMPLATES = {
+        'streak_reminder': 'emails/streak_reminder.html',
+        'daily_goal': 'emails/daily_goal.html',
+        'achievement_earned': 'emails/achievement_earned.html',
+        'league_update': 'emails/league_update.html',
+        'challenge_available': 'emails/challenge_available.html'
+    }
+    SCHEDULED_BATCH_SIZE = getattr(settings, 'SCHEDULED_NOTIFICATION_BATCH_SIZE', 200)
+
     @staticmethod
-    def process_scheduled_notifications():
+    def process_scheduled_notifications(batch_size=None, limit=None):
         """
-        Process all scheduled notifications that are due to be sent.
+        Process the scheduled notifications that are due to be sent.
+
+        Due rows are claimed a batch at a time with SELECT ... FOR UPDATE SKIP LOCKED,
+        so several workers (overlapping cron runs, --workers threads) can run at once
+        without sending anything twice. Each batch is rendered with one bulk context
+        lookup, queued for the email worker and marked sent in the same transaction.
         """
-        from courses.models import UserNotification
-        from django.utils import timezone
-        
+        batch_size = batch_size or NotificationService.SCHEDULED_BATCH_SIZE
         now = timezone.now()
-        
-        # Get all due notifications
-        due_notifications = UserNotification.objects.filter(
-            is_sent=False,
-            scheduled_for__lte=now
-        )
-        
         processed_count = 0
-        for notification in due_notifications:
-            try:
-                # Send the notification email
-                success = NotificationService.send_notification_email(notification)
-                if success:
-                    notification.is_sent = True
-                    notification.save()
-                    processed_count += 1
-                    print(f"Successfully processed notification {notification.id} for user {notification.user.username}")
-                else:
-                    print(f"Failed to process notification {notification.id} for user {notification.user.username}")
-            except Exception as e:
-                print(f"Error processing notification {notification.id}: {e}")
-        
-        print(f"Processed {processed_count} scheduled notifications")
+        failed_count = 0
+        last_id = 0
+
+        while limit is None or processed_count + failed_count < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed_count - failed_count)
+            with transaction.atomic():
+                batch = list(
+                    Notification.objects.select_for_update(skip_locked=True, of=('self',))
+                    .select_related('user')
+                    .filter(email=True, is_sent=False, scheduled_for__lte=now, id__gt=last_id)
+                    .order_by('id')[:size]
+                )
+                if not batch:
+                    break
+                # Failed rows stay unsent for the next run instead of being retried in this one
+                last_id = batch[-1].id
+
+                contexts = get_user_learning_contexts({notification.user_id for notification in batch})
+                messages = []
+                sent_ids = []
+                for notification in batch:
+                    try:
+                        subject, html = NotificationService.build_notification_email(
+                            notification, contexts.get(notification.user_id))
+                    except Exception as e:
+                        failed_count += 1
+                        print(f"Error processing notification {notification.id}: {e}")
+                        continue
+                    messages.append({
+                        'to_email': notification.user.email,
+                        'subject': subject,
+                        'html': html,
+                        'dedupe_key': f'notification:{notification.id}'
+                    })
+                    sent_ids.append(notification.id)
+
+                if messages:
+                    enqueue_emails(messages)
+                    Notification.objects.filter(id__in=sent_ids).update(is_sent=True)
+                processed_count += len(sent_ids)
+
+        print(f"Processed {processed_count} scheduled notifications ({failed_count} failed)")
         return processed_count
-    
+
+    @staticmethod
+    def build_notification_email(notification, context=None):
+        """
+        Render the (subject, html) of a notification's email.
+        context is the user's learning context, if they have one.
+        """
+        if context:
+            context = dict(context)
+        else:
+            context = {
+                'user': notification.user,
+                'site_url': 'https://garaad.org'
+            }
+
+        # Add notification-specific context
+        context['notification'] = notification
+        context['notification_type'] = notification.type
+
+        # Choose template based on notification type
+        template_name = NotificationService.NOTIFICATION_TEMPLATES.get(
+            notification.type, 'emails/general_notification.html')
+        return notification.title, render_email(template_name, context)
+
     @staticmethod
     def send_notification_email(notification):
         """
         Send an email for a specific notification.
         """
         try:
-            context = get_user_learning_context(notification.user)
-            if not context:
-                context = {
-                    'user': notification.user,
-                    'notification': notification,
-                    'site_url': 'https://garaad.org'
-                }
-            
-            # Add notification-specific context
-            context['notification'] = notification
-            context['notification_type'] = notification.notification_type
-            
-            # Choose template based on notification type
-            template_map = {
-                'streak_reminder': 'emails/streak_reminder.html',
-                'daily_goal': 'emails/daily_goal.html',
-                'achievement_earned': 'emails/achievement_earned.html',
-                'league_update': 'emails/league_update.html',
-                'challenge_available': 'emails/challenge_available.html'
-            }
-            
-            template_name = template_map.get(notification.notification_type, 'emails/general_notification.html')
-            
-            html = render_to_string(template_name, context)
+            subject, html = NotificationService.build_notification_email(
+                notification, get_user_learning_context(notification.user))
             success = send_resend_email(
                 to_email=notification.user.email,
-                subject=notification.title,
-                html=html
+                subject=subject,
+                html=html,
+                dedupe_key=f'notification:{notification.id}'
             )
             
             if success:
-                print(f"Successfully sent {notification.notification_type} email to {notification.user.email}")
+                print(f"Successfully sent {notification.type} email to {notification.user.email}")
                 return True
             else:
-                print(f"Failed to send {notification.notification_type} email to {notification.user.email}")
+                print(f"Failed to send {notification.type} email to {notification.user.email}")
                 return False
                 
         except Exception as e:
@@ -232,7 +266,7 @@ class NotificationService:
             return
 
         try:
-            html = render_to_string('emails/streak_reminder.html', context)
+            html = render_email('emails/streak_reminder.html', context)
             success = send_resend_email(
                 to_email=user.email,
                 subject='Waxbarashada waa ku sugayaa! Sii wad casharkaaga.',
@@ -260,7 +294,7 @@ class NotificationService:
         context['broke_streak'] = True
 
         try:
-            html = render_to_string('emails/streak_reminder.html', context)
+            html = render_email('emails/streak_reminder.html', context)
             success = send_resend_email(
                 to_email=user.email,
                 subject='Ha lumin dadaalkaaga! Xariggaaga halis ayuu ku jiraa.',
@@ -284,19 +318,13 @@ class NotificationService:
             
             # If this is the first lesson of the day, send a motivational notification
             if streak.last_activity_date != timezone.now().date():
-                context = get_user_learning_context(user)
-                if context:
-                    context['lesson_title'] = lesson.title
-                    context['course_name'] = lesson.course.title
-                    
-                    html = render_to_string('emails/lesson_completion.html', context)
-                    success = send_resend_email(
-                        to_email=user.email,
-                        subject='Hambalyo! Waad dhammaystirtay casharkaaga!',
-                        html=html
-                    )
-                    if success:
-                        print(f"Sent lesson completion notification to user {user.id}")
+                buffer_notification(
+                    user, 'email', 'lesson_completion',
+                    title='Hambalyo! Waad dhammaystirtay casharkaaga!',
+                    message=f'Waad dhammaystirtay casharka "{lesson.title}" ee {lesson.course.title}.',
+                    data={'lesson_title': lesson.title, 'course_name': lesson.course.title},
+                    key=f'lesson:{lesson.id}'
+                )
                         
         except Streak.DoesNotExist:
             pass  # User doesn't have a streak record yet
@@ -320,19 +348,14 @@ class NotificationService:
             ).count()
             
             if recent_problems >= 3:
-                context = get_user_learning_context(user)
-                if context:
-                    context['problems_solved'] = recent_problems
-                    context['problem_title'] = problem.question_text[:50] + "..." if len(problem.question_text) > 50 else problem.question_text
-                    
-                    html = render_to_string('emails/problem_completion.html', context)
-                    success = send_resend_email(
-                        to_email=user.email,
-                        subject='Waxaad ku mahadsantahay dadaalkaaga!',
-                        html=html
-                    )
-                    if success:
-                        print(f"Sent problem completion notification to user {user.id}")
+                problem_title = problem.question_text[:50] + "..." if len(problem.question_text) > 50 else problem.question_text
+                # Only the latest count survives the digest
+                buffer_notification(
+                    user, 'email', 'problem_completion',
+                    title='Waxaad ku mahadsantahay dadaalkaaga!',
+                    message=f'Waxaad dhammaystirtay {recent_problems} su\'aalood saacaddii u dambaysay.',
+                    data={'problems_solved': recent_problems, 'problem_title': problem_title}
+                )
                         
         except Streak.DoesNotExist:
             pass  # User doesn't have a streak record yet
@@ -345,36 +368,28 @@ class NotificationService:
         Send a daily reminder notification to encourage learning.
         """
         try:
-            context = get_user_learning_context(user)
-            if not context:
-                context = {
-                    'user': user,
-                    'site_url': 'https://garaad.org'
-                }
-            
-            # Add daily motivation context
-            context['daily_motivation'] = True
-            context['streak_days'] = 0
+            streak_days = 0
             
             # Get user's current streak
             try:
                 streak = Streak.objects.get(user=user)
-                context['streak_days'] = streak.current_streak
+                streak_days = streak.current_streak
             except Streak.DoesNotExist:
                 pass
             
-            html = render_to_string('emails/daily_reminder.html', context)
-            success = send_resend_email(
-                to_email=user.email,
-                subject='Maanta waa maalin wanaagsan oo aad ku baran karto!',
-                html=html
+            # The learning context is added when the digest is sent
+            buffer_notification(
+                user, 'email', 'daily_reminder',
+                title='Maanta waa maalin wanaagsan oo aad ku baran karto!',
+                message='Casharkaaga maanta waa ku sugayaa!',
+                data={
+                    'template': 'emails/daily_reminder.html',
+                    'daily_motivation': True,
+                    'streak_days': streak_days
+                }
             )
-            if success:
-                print(f"Sent daily reminder to user {user.id}")
-                return True
-            else:
-                print(f"Failed to send daily reminder to user {user.id}")
-                return False
+            print(f"Queued daily reminder for user {user.id}")
+            return True
                 
         except Exception as e:
             print(f"Error sending daily reminder: {e}")
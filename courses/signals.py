@@ -0,0 +1,202 @@
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import (
+    Category, Course, Lesson, LessonContentBlock, Problem, Hint, SolutionStep,
+    Achievement, ContentTombstone, UserProgress, CourseEnrollment
+)
+from api.models import Notification
+from .cache import (
+    invalidate_lesson_content, invalidate_lesson_sequence, invalidate_achievement_catalogue,
+    invalidate_catalog_snapshot, invalidate_learning_context
+)
+from .counters import adjust_lesson_count, adjust_course_problem_count, adjust_problem_count
+from .inbox import adjust_unread
+from .push import publish_notifications, publish_unread_changed
+
+
+@receiver(post_save, sender=LessonContentBlock)
+@receiver(post_delete, sender=LessonContentBlock)
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+def invalidate_lesson_content_on_change(sender, instance, **kwargs):
+    """Cached lesson content bundles include blocks and problems"""
+    invalidate_lesson_content(instance.lesson_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_sequence_on_change(sender, instance, **kwargs):
+    """Any lesson change can shift the course ordering"""
+    invalidate_lesson_sequence(instance.course_id)
+
+
+@receiver(post_save, sender=UserProgress)
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def invalidate_learning_context_on_change(sender, instance, **kwargs):
+    """A completed lesson or new enrollment changes what the user's emails point to next"""
+    invalidate_learning_context(instance.user_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_catalog_on_change(sender, instance, **kwargs):
+    invalidate_catalog_snapshot()
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def invalidate_achievement_catalogue_on_change(sender, instance, **kwargs):
+    invalidate_achievement_catalogue()
+
+
+@receiver(post_save, sender=Lesson)
+def count_saved_lesson(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_course_id', None)
+    if created:
+        adjust_lesson_count(instance.course_id, 1)
+    elif not hasattr(instance, '_loaded_course_id'):
+        # Loaded with course_id deferred, so a move can't be told apart; reconcile_counters catches it
+        pass
+    elif previous != instance.course_id:
+        adjust_lesson_count(previous, -1)
+        adjust_lesson_count(instance.course_id, 1)
+        # The lesson's problems moved course with it; the stored count, as the
+        # instance's may be stale
+        problem_count = Lesson.objects.filter(pk=instance.pk).values_list('problem_count', flat=True).first() or 0
+        adjust_course_problem_count(previous, -problem_count)
+        adjust_course_problem_count(instance.course_id, problem_count)
+        # The old course's sequence still lists the lesson
+        if previous:
+            invalidate_lesson_sequence(previous)
+    if 'course_id' not in instance.get_deferred_fields():
+        instance._loaded_course_id = instance.course_id
+
+
+def _deleted_with(origin, model):
+    """True if a delete cascaded from a row (or queryset) of the given model"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+@receiver(pre_delete, sender=Lesson)
+def remember_lesson_problem_count(sender, instance, **kwargs):
+    # Read before the cascade removes the problems
+    instance._deleted_problem_count = Lesson.objects.filter(
+        pk=instance.pk).values_list('problem_count', flat=True).first() or 0
+
+
+@receiver(post_delete, sender=Lesson)
+def count_deleted_lesson(sender, instance, **kwargs):
+    adjust_lesson_count(instance.course_id, -1)
+    # Cascaded problem deletes skip the course, so take them off here in one go
+    adjust_course_problem_count(instance.course_id, -getattr(instance, '_deleted_problem_count', 0))
+
+
+@receiver(post_save, sender=Problem)
+def count_saved_problem(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_lesson_id', None)
+    if created:
+        adjust_problem_count(instance.lesson_id, 1)
+    elif hasattr(instance, '_loaded_lesson_id') and previous != instance.lesson_id:
+        adjust_problem_count(previous, -1)
+        adjust_problem_count(instance.lesson_id, 1)
+    else:
+        # Unchanged, or loaded with lesson_id deferred so a move can't be told apart
+        if 'lesson_id' not in instance.get_deferred_fields():
+            instance._loaded_lesson_id = instance.lesson_id
+        return
+    instance._loaded_lesson_id = instance.lesson_id
+    # Lesson headers in the catalog carry problem counts
+    invalidate_catalog_snapshot()
+
+
+@receiver(post_delete, sender=Problem)
+def count_deleted_problem(sender, instance, origin=None, **kwargs):
+    # The lesson row may already be gone when the delete cascades from it
+    if _deleted_with(origin, Lesson) or _deleted_with(origin, Course):
+        return
+    adjust_problem_count(instance.lesson_id, -1)
+    invalidate_catalog_snapshot()
+
+
+def _course_of(lesson_id):
+    return Lesson.objects.filter(pk=lesson_id).values_list('course_id', flat=True).first()
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=LessonContentBlock)
+@receiver(post_delete, sender=Problem)
+def record_content_tombstone(sender, instance, origin=None, **kwargs):
+    """
+    Deletions for the sync feed. Rows removed by a cascade are covered by
+    their parent's tombstone, so clients drop a course's or lesson's children themselves.
+    """
+    if sender is Course:
+        content_type, course_id = 'course', instance.pk
+    elif _deleted_with(origin, Course):
+        return
+    elif sender is Lesson:
+        content_type, course_id = 'lesson', instance.course_id
+    elif _deleted_with(origin, Lesson):
+        return
+    elif sender is LessonContentBlock:
+        content_type, course_id = 'block', _course_of(instance.lesson_id)
+    else:
+        content_type, course_id = 'problem', _course_of(instance.lesson_id) if instance.lesson_id else None
+
+    ContentTombstone.objects.create(
+        content_type=content_type,
+        object_id=instance.pk,
+        course_id=course_id
+    )
+
+
+@receiver(post_save, sender=Hint)
+@receiver(post_delete, sender=Hint)
+@receiver(post_save, sender=SolutionStep)
+@receiver(post_delete, sender=SolutionStep)
+def touch_problem_on_hint_change(sender, instance, origin=None, **kwargs):
+    """
+    Hints and solution steps have no timestamp of their own, so bump the
+    problem's updated_at for offline packages to pick up the change.
+    """
+    if any(_deleted_with(origin, model) for model in (Problem, Lesson, Course)):
+        return
+    Problem.objects.filter(pk=instance.problem_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Notification)
+def count_saved_notification(sender, instance, created, **kwargs):
+    if not instance.in_app:
+        return
+    previous = getattr(instance, '_loaded_is_read', None)
+    if created:
+        delta = 0 if instance.is_read else 1
+    elif previous is not None and previous != instance.is_read:
+        delta = 1 if previous else -1
+    else:
+        delta = 0
+    instance._loaded_is_read = instance.is_read
+    adjust_unread(instance.user_id, delta)
+    # A pushed notification brings the new count with it
+    if delta and not (created and instance.websocket):
+        publish_unread_changed([instance.user_id])
+
+
+@receiver(post_save, sender=Notification)
+def push_created_notification(sender, instance, created, **kwargs):
+    if created:
+        publish_notifications([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def count_deleted_notification(sender, instance, **kwargs):
+    if instance.in_app and not instance.is_read:
+        adjust_unread(instance.user_id, -1)
+        publish_unread_changed([instance.user_id])
@@ -0,0 +1,134 @@
+"""
+Delta sync feed for course content.
+
+Courses, lessons, blocks and problems are read by their indexed updated_at,
+deletions come from ContentTombstone. All five streams are merged in
+(timestamp, stream, id) order, and the last key of a page becomes the
+cursor, so a client can resume exactly where it stopped.
+"""
+import datetime
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from .models import Course, Lesson, LessonContentBlock, Problem, ContentTombstone
+
+SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 2000
+
+# Rows newer than this are held back one round, so a transaction that
+# commits slightly late can't slip in behind a cursor a client already has
+SYNC_SETTLE_SECONDS = 2
+
+_COURSE_FIELDS = [
+    'id', 'category_id', 'title', 'slug', 'description', 'thumbnail', 'is_new',
+    'author_id', 'is_published', 'lesson_count', 'problem_count', 'updated_at'
+]
+_LESSON_FIELDS = [
+    'id', 'course_id', 'title', 'slug', 'lesson_number', 'estimated_time',
+    'is_published', 'problem_count', 'updated_at'
+]
+_BLOCK_FIELDS = ['id', 'lesson_id', 'block_type', 'order', 'content', 'problem_id', 'updated_at']
+_PROBLEM_FIELDS = [
+    'id', 'lesson_id', 'which', 'question_text', 'question_type', 'options',
+    'correct_answer', 'explanation', 'order', 'content', 'diagram_config',
+    'diagrams', 'img', 'xp', 'updated_at'
+]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class _Stream:
+    def __init__(self, rank, name, queryset, fields, course_filter, timestamp='updated_at'):
+        self.rank = rank
+        self.name = name
+        self.queryset = queryset
+        self.fields = fields
+        self.course_filter = course_filter
+        self.timestamp = timestamp
+
+
+STREAMS = [
+    _Stream(0, 'course', Course.objects.all(), _COURSE_FIELDS, 'id'),
+    _Stream(1, 'lesson', Lesson.objects.all(), _LESSON_FIELDS, 'course_id'),
+    _Stream(2, 'problem', Problem.objects.all(), _PROBLEM_FIELDS, 'lesson__course_id'),
+    _Stream(3, 'block', LessonContentBlock.objects.all(), _BLOCK_FIELDS, 'lesson__course_id'),
+    _Stream(4, 'deleted', ContentTombstone.objects.all(),
+            ['id', 'content_type', 'object_id', 'course_id', 'deleted_at'], 'course_id',
+            timestamp='deleted_at'),
+]
+
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(timestamp, rank, pk):
+    # Integer microseconds, so the cursor round-trips without float rounding
+    return f'{(timestamp - _EPOCH) // _MICROSECOND}-{rank}-{pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        micros, rank, pk = (int(part) for part in cursor.split('-'))
+    except (AttributeError, ValueError):
+        raise InvalidCursor('Malformed cursor')
+    return _EPOCH + micros * _MICROSECOND, rank, pk
+
+
+def _after(stream, cursor):
+    """Rows of the stream that sort after the cursor key"""
+    if cursor is None:
+        return Q()
+    timestamp, rank, pk = cursor
+    ts = stream.timestamp
+    if stream.rank > rank:
+        return Q(**{f'{ts}__gte': timestamp})
+    if stream.rank < rank:
+        return Q(**{f'{ts}__gt': timestamp})
+    return Q(**{f'{ts}__gt': timestamp}) | Q(**{ts: timestamp, 'pk__gt': pk})
+
+
+def get_changes(cursor=None, course_id=None, limit=SYNC_PAGE_SIZE):
+    """
+    Return (changes, next_cursor, has_more). Each change is
+    {'type', 'op': 'upsert' | 'delete', 'id', 'data'}.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    horizon = timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+    rows = []
+    for stream in STREAMS:
+        queryset = stream.queryset.filter(
+            _after(stream, position),
+            **{f'{stream.timestamp}__lte': horizon}
+        )
+        if course_id is not None:
+            queryset = queryset.filter(**{stream.course_filter: course_id})
+        # One extra row per stream tells us whether anything is left
+        for row in queryset.order_by(stream.timestamp, 'pk').values(*stream.fields)[:limit + 1]:
+            rows.append((row[stream.timestamp], stream.rank, row['id'], stream, row))
+
+    rows.sort(key=lambda item: item[:3])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for timestamp, rank, pk, stream, row in rows:
+        if stream.name == 'deleted':
+            changes.append({
+                'type': row['content_type'],
+                'op': 'delete',
+                'id': row['object_id'],
+                'data': {'course_id': row['course_id']},
+            })
+        else:
+            changes.append({'type': stream.name, 'op': 'upsert', 'id': pk, 'data': row})
+
+    if rows:
+        timestamp, rank, pk = rows[-1][:3]
+        next_cursor = encode_cursor(timestamp, rank, pk)
+    else:
+        next_cursor = cursor
+    return changes, next_cursor, has_more
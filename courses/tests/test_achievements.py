@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from api.models import Streak
+from courses.achievements import AchievementEngine
+from courses.models import (
+    Achievement, Category, Course, Lesson, UserAchievement, UserLevel, UserProgress
+)
+
+
+class AchievementEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.achievements = {
+            icon: Achievement.objects.create(
+                name=icon, description=icon, icon=icon, achievement_type=achievement_type, level_required=level)
+            for icon, achievement_type, level in (
+                ('perfect-score', 'perfect_score', 1),
+                ('streak-master', 'streak_milestone', 1),
+                ('level-5', 'level_milestone', 5),
+            )
+        }
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        self.lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        self.users = [
+            get_user_model().objects.create(
+                username=f'learner{n}', email=f'learner{n}@example.com', referral_code=f'LEARN{n:03d}')
+            for n in range(3)
+        ]
+
+    def earned(self, user):
+        return set(UserAchievement.objects.filter(user=user).values_list('achievement__icon', flat=True))
+
+    def test_awards_each_qualifying_user_once(self):
+        first, second, third = self.users
+        UserProgress.objects.create(user=first, lesson=self.lesson, status='completed', score=100)
+        Streak.objects.create(user=second, max_streak=7)
+        UserLevel.objects.create(user=second, level=5)
+
+        ids = [user.pk for user in self.users]
+        AchievementEngine.evaluate_users(ids)
+        self.assertEqual(AchievementEngine.evaluate_users(ids), {})
+
+        self.assertEqual(self.earned(first), {'perfect-score'})
+        self.assertEqual(self.earned(second), {'streak-master', 'level-5'})
+        self.assertEqual(self.earned(third), set())
+
+    def test_events_only_check_the_rules_they_affect(self):
+        user = self.users[0]
+        Streak.objects.create(user=user, max_streak=7)
+
+        self.assertEqual(AchievementEngine.evaluate(user, 'challenge_completed'), [])
+        self.assertEqual(
+            AchievementEngine.evaluate(user, 'lesson_completed'), [self.achievements['streak-master'].id])
+
+    def test_stats_are_one_query(self):
+        with self.assertNumQueries(1):
+            stats = AchievementEngine.build_stats([user.pk for user in self.users])
+        self.assertEqual(stats[self.users[0].pk]['level'], 1)
+
+    def test_catalogue_follows_achievement_changes(self):
+        self.assertEqual(len(AchievementEngine.catalogue()), 3)
+        self.achievements['level-5'].delete()
+        self.assertEqual(len(AchievementEngine.catalogue()), 2)
+
+    def test_backfill_walks_users_in_chunks(self):
+        for user in self.users:
+            Streak.objects.create(user=user, max_streak=10)
+
+        self.assertEqual(list(AchievementEngine.backfill(chunk_size=2)), [(2, 2), (1, 1)])
@@ -0,0 +1,47 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.models import Category, Course, Hint, Lesson, Problem
+from courses.views import ProblemViewSet
+
+
+class BatchRetrieveTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        self.problems = [
+            Problem.objects.create(
+                lesson=lesson, question_text=f'{n} + 1?', question_type='fill_blank',
+                correct_answer=[str(n + 1)], order=n)
+            for n in range(3)
+        ]
+        Hint.objects.create(problem=self.problems[0], content='Count', order=1)
+        user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def batch(self, ids):
+        return self.client.get('/api/lms/problems/batch/', {'ids': ids}, secure=True)
+
+    def test_results_and_errors_are_keyed_by_id(self):
+        first, second, _ = self.problems
+        response = self.batch(f'{first.id}, {second.id},{first.id},abc,999999,')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results']), [str(first.id), str(second.id)])
+        self.assertEqual(response.data['errors'], {'abc': 'Invalid id', '999999': 'Not found'})
+        # Nested relations are expanded by default in batch responses
+        self.assertEqual(response.data['results'][str(first.id)]['hints'][0]['content'], 'Count')
+
+    def test_ids_are_required(self):
+        self.assertEqual(self.batch('').status_code, 400)
+
+    def test_cap_counts_every_requested_id(self):
+        pk = self.problems[0].id
+        with mock.patch.object(ProblemViewSet, 'max_batch_ids', 3):
+            self.assertEqual(self.batch(','.join([str(pk)] * 3)).status_code, 200)
+            self.assertEqual(self.batch(','.join([str(pk)] * 4)).status_code, 400)
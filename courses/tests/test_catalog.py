@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.cache import invalidate_catalog_snapshot
+from courses.checks import check_shared_cache
+from courses.models import Category, Course, Lesson
+
+
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=self.category, description='Algebra', author_id='1')
+        self.lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        self.client = APIClient()
+
+    def get(self, **headers):
+        return self.client.get('/api/lms/categories/catalog/', secure=True, **headers)
+
+    def get_since(self, last_modified):
+        return self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_unchanged_catalog_is_not_modified(self):
+        last_modified = self.get()['Last-Modified']
+        invalidate_catalog_snapshot()
+
+        self.assertEqual(self.get_since(last_modified).status_code, 304)
+
+    def test_category_edit_moves_last_modified(self):
+        last_modified = self.get()['Last-Modified']
+        self.category.title = 'Mathematics'
+        self.category.save()
+
+        response = self.get_since(last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_since(response['Last-Modified']).status_code, 304)
+
+    def test_lesson_delete_moves_last_modified(self):
+        last_modified = self.get()['Last-Modified']
+        self.lesson.delete()
+
+        self.assertEqual(self.get_since(last_modified).status_code, 200)
+
+    def test_each_encoding_has_its_own_etag(self):
+        identity = self.get()
+        gzipped = self.get(HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotEqual(identity['ETag'], gzipped['ETag'])
+        self.assertIn('Accept-Encoding', gzipped['Vary'])
+        self.assertEqual(self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzipped['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=identity['ETag']).status_code, 200)
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_per_process_cache_is_flagged(self):
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['courses.W001'])
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertEqual(check_shared_cache(None), [])
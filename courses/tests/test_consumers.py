@@ -0,0 +1,90 @@
+from unittest import mock
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import Notification
+from courses import consumers
+from courses.inbox import adjust_unread
+from courses.push import publish_unread_changed
+from garaad.asgi import application
+
+
+class NotificationConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        patcher = mock.patch.object(consumers, 'NOTIFICATION_PUSH_WINDOW', 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            application, f'/ws/notifications/?token={AccessToken.for_user(self.user)}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    @database_sync_to_async
+    def notify(self, count, websocket=True, rollback=False):
+        try:
+            with transaction.atomic():
+                for n in range(count):
+                    Notification.objects.create(
+                        user=self.user, type='system', title=f'Note {n}', message='Hello', websocket=websocket)
+                if rollback:
+                    raise RuntimeError()
+        except RuntimeError:
+            pass
+
+    @database_sync_to_async
+    def mark_all_read(self):
+        marked = Notification.objects.filter(user=self.user, is_read=False).update(is_read=True)
+        adjust_unread(self.user.pk, -marked)
+        publish_unread_changed([self.user.pk])
+
+    async def test_anonymous_connections_are_refused(self):
+        communicator = WebsocketCommunicator(application, '/ws/notifications/')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_notifications_are_pushed_together(self):
+        communicator = await self.connect()
+        self.assertEqual(await communicator.receive_json_from(), {
+            'type': 'notifications', 'notifications': [], 'unread_count': 0})
+
+        await self.notify(3)
+        message = await communicator.receive_json_from(timeout=2)
+        self.assertEqual([item['title'] for item in message['notifications']], ['Note 0', 'Note 1', 'Note 2'])
+        self.assertEqual(message['unread_count'], 3)
+        self.assertTrue(await communicator.receive_nothing(timeout=0.2))
+
+        await communicator.disconnect()
+
+    async def test_rolled_back_notifications_are_not_pushed(self):
+        communicator = await self.connect()
+        await communicator.receive_json_from()
+
+        await self.notify(2, rollback=True)
+        self.assertTrue(await communicator.receive_nothing(timeout=0.2))
+
+        await communicator.disconnect()
+
+    async def test_count_changes_are_pushed(self):
+        communicator = await self.connect()
+        await communicator.receive_json_from()
+
+        await self.notify(2, websocket=False)
+        message = await communicator.receive_json_from(timeout=2)
+        self.assertEqual((message['notifications'], message['unread_count']), ([], 2))
+
+        await self.mark_all_read()
+        self.assertEqual((await communicator.receive_json_from(timeout=2))['unread_count'], 0)
+
+        await communicator.send_json_to({'type': 'unread_count'})
+        self.assertEqual((await communicator.receive_json_from())['unread_count'], 0)
+
+        await communicator.disconnect()
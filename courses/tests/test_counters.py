@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.models import Category, Course, Lesson, Problem
+
+
+class CounterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(id='math', title='Math', description='Math')
+
+    def make_course(self, slug, category=None):
+        return Course.objects.create(
+            title=slug, slug=slug, category=category or self.category, description=slug, author_id='1')
+
+    def make_lesson(self, course, number=1):
+        return Lesson.objects.create(
+            title=f'Lesson {number}', slug=f'lesson-{number}', course=course, lesson_number=number)
+
+    def make_problem(self, lesson, order):
+        return Problem.objects.create(
+            lesson=lesson, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'], order=order)
+
+    def counts(self, *rows):
+        for row in rows:
+            row.refresh_from_db()
+        return [(row.lesson_count, row.problem_count) if isinstance(row, Course) else row.problem_count
+                for row in rows]
+
+
+class CatalogQueryTests(CounterTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            category = Category.objects.create(id=f'topic-{index}', title=f'Topic {index}', description='Topic')
+            for number in range(3):
+                course = self.make_course(f'course-{index}-{number}', category)
+                lesson = self.make_lesson(course)
+                self.make_problem(lesson, 1)
+                self.make_problem(lesson, 2)
+        self.client = APIClient()
+
+    def test_course_list_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/lms/courses/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({course['lesson_count'] for course in response.data}, {1})
+
+    def test_category_list_does_not_grow_with_categories(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/lms/categories/', secure=True)
+        self.assertEqual(response.status_code, 200)
+
+
+class ContentCounterTests(CounterTestCase):
+    def test_create_move_and_delete(self):
+        first = self.make_course('first')
+        second = self.make_course('second')
+        lesson = self.make_lesson(first)
+        other_lesson = self.make_lesson(second)
+        problem = self.make_problem(lesson, 1)
+        self.make_problem(lesson, 2)
+        self.assertEqual(self.counts(first, second, lesson), [(1, 2), (1, 0), 2])
+
+        problem.lesson = other_lesson
+        problem.save()
+        self.assertEqual(self.counts(first, second, lesson, other_lesson), [(1, 1), (1, 1), 1, 1])
+
+        lesson.course = second
+        lesson.save()
+        self.assertEqual(self.counts(first, second), [(0, 0), (2, 2)])
+
+        problem.delete()
+        lesson.delete()
+        self.assertEqual(self.counts(first, second, other_lesson), [(0, 0), (1, 0), 0])
+
+    def test_saving_deferred_rows_is_not_a_move(self):
+        course = self.make_course('course')
+        lesson = self.make_lesson(course)
+        self.make_problem(lesson, 1)
+
+        deferred_lesson = Lesson.objects.only('id', 'title').get(pk=lesson.pk)
+        deferred_problem = Problem.objects.only('id', 'question_text').get(lesson=lesson)
+        for _ in range(3):
+            deferred_lesson.save()
+            deferred_problem.save()
+
+        self.assertEqual(self.counts(course, lesson), [(1, 1), 1])
+
+    def test_saving_stale_rows_keeps_counters(self):
+        course = self.make_course('course')
+        lesson = self.make_lesson(course)
+        stale_course = Course.objects.get(pk=course.pk)
+        stale_lesson = Lesson.objects.get(pk=lesson.pk)
+
+        self.make_lesson(course, number=2)
+        self.make_problem(lesson, 1)
+        stale_course.title = 'Renamed'
+        stale_course.save()
+        stale_lesson.title = 'Renamed'
+        stale_lesson.save()
+
+        self.assertEqual(self.counts(course, lesson), [(2, 1), 1])
+        self.assertEqual(course.title, 'Renamed')
+        self.assertEqual(lesson.title, 'Renamed')
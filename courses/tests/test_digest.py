@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from accounts.models import OutboundEmail
+from api.models import Notification
+from courses import digest
+from courses.digest import buffer_notification, flush_digests, merge_events
+from courses.inbox import get_unread_count
+from courses.models import NotificationEvent
+
+
+class MergeEventsTests(SimpleTestCase):
+    def event(self, type, key=None, title=''):
+        return NotificationEvent(type=type, key=key or type, title=title)
+
+    def test_duplicates_follow_their_rule(self):
+        merged = merge_events([
+            self.event('lesson_completion', 'lesson-1', 'first'),
+            self.event('lesson_completion', 'lesson-1', 'second'),
+            self.event('achievement', 'badge', 'old'),
+            self.event('achievement', 'badge', 'new'),
+        ])
+
+        self.assertEqual([event.title for event in merged], ['first', 'new'])
+
+    def test_priority_then_arrival(self):
+        merged = merge_events([
+            self.event('energy_full'),
+            self.event('custom', title='a'),
+            self.event('streak'),
+            self.event('league'),
+            self.event('other', title='b'),
+        ])
+
+        self.assertEqual(
+            [event.type for event in merged], ['league', 'streak', 'energy_full', 'custom', 'other'])
+
+
+class DigestDeliveryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        # Sets up the user's unread counter
+        get_unread_count(self.user.pk)
+
+    def buffer(self, channel, type, title, key=None):
+        return buffer_notification(self.user, channel, type, title, f'{title} message', key=key)
+
+    def test_in_app_events_become_one_notification(self):
+        self.buffer('in_app', 'streak', 'Streak 3')
+        self.buffer('in_app', 'achievement', 'Badge', key='badge-1')
+        self.buffer('in_app', 'streak', 'Streak 4')
+        self.assertEqual(list(flush_digests()), [])
+
+        self.assertEqual(sum(flush_digests(now=timezone.now() + timedelta(hours=1))), 1)
+
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.title, 'Badge')
+        self.assertEqual([item['title'] for item in notification.data['digest']], ['Badge', 'Streak 4'])
+        self.assertEqual(get_unread_count(self.user.pk), 1)
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_email_events_become_one_email(self):
+        self.buffer('email', 'daily_reminder', 'Keep going')
+        self.buffer('email', 'lesson_completion', 'Lesson done', key='lesson-1')
+        self.buffer('in_app', 'streak', 'Streak 3')
+        later = timezone.now() + timedelta(hours=2)
+
+        self.assertEqual(sum(flush_digests(now=later)), 2)
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.subject, 'Lesson done (+1)')
+        self.assertIn('Keep going message', email.html)
+
+    def test_only_closed_windows_are_flushed(self):
+        self.buffer('email', 'daily_reminder', 'Keep going')
+        self.buffer('in_app', 'streak', 'Streak 3')
+
+        self.assertEqual(sum(flush_digests(now=timezone.now() + timedelta(minutes=30))), 1)
+        self.assertEqual(list(NotificationEvent.objects.values_list('channel', flat=True)), ['email'])
+
+    def test_zero_window_delivers_immediately(self):
+        with mock.patch.dict(digest.NOTIFICATION_DIGEST_WINDOWS, {'in_app': 0}):
+            self.buffer('in_app', 'league', 'Promoted')
+
+        self.assertEqual(Notification.objects.get(user=self.user).title, 'Promoted')
+        self.assertFalse(NotificationEvent.objects.exists())
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.models import Notification
+from courses.counters import reconcile_counters
+from courses.inbox import get_unread_count
+from courses.models import NotificationCounter
+
+
+class InboxTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, title='Hello', **fields):
+        fields.setdefault('websocket', False)
+        return Notification.objects.create(user=self.user, type='system', title=title, message=title, **fields)
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread_count/', secure=True).data['unread_count']
+
+
+class UnreadCounterTests(InboxTestCase):
+    def test_counter_starts_from_a_real_count(self):
+        self.notify()
+        self.notify(is_read=True)
+        self.notify(in_app=False, email=True)
+
+        self.assertEqual(get_unread_count(self.user.pk), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_unread_count(self.user.pk), 1)
+
+    def test_counter_follows_every_change(self):
+        self.assertEqual(self.unread(), 0)
+        notifications = [self.notify(f'Note {n}') for n in range(5)]
+        self.assertEqual(self.unread(), 5)
+
+        self.client.post(f'/api/notifications/{notifications[0].pk}/mark_read/', secure=True)
+        self.assertEqual(self.unread(), 4)
+
+        response = self.client.post(
+            '/api/notifications/mark_read_bulk/',
+            {'ids': [notifications[0].pk, notifications[1].pk, notifications[2].pk]}, format='json', secure=True)
+        self.assertEqual((response.data['marked_read'], response.data['unread_count']), (2, 2))
+
+        notifications[3].delete()
+        self.assertEqual(self.unread(), 1)
+
+        self.client.post('/api/notifications/mark_all_read/', secure=True)
+        self.assertEqual(self.unread(), 0)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    def test_bulk_read_validates_ids(self):
+        for ids in ([], ['abc'], list(range(1000)), 'x'):
+            with self.subTest(ids=ids):
+                response = self.client.post(
+                    '/api/notifications/mark_read_bulk/', {'ids': ids}, format='json', secure=True)
+                self.assertEqual(response.status_code, 400)
+
+    def test_reconcile_repairs_drift(self):
+        self.notify()
+        get_unread_count(self.user.pk)
+        NotificationCounter.objects.filter(pk=self.user.pk).update(notification_unread=7)
+
+        self.assertEqual(reconcile_counters()['NotificationCounter.notification_unread'], 1)
+        self.assertEqual(get_unread_count(self.user.pk), 1)
+
+
+class InboxPaginationTests(InboxTestCase):
+    def test_pages_are_newest_first(self):
+        notifications = [self.notify(f'Note {n}') for n in range(5)]
+        other = get_user_model().objects.create(
+            username='other', email='other@example.com', referral_code='LEARN002')
+        Notification.objects.create(user=other, type='system', title='Theirs', message='Theirs')
+
+        first = self.client.get('/api/notifications/', {'page_size': 3}, secure=True)
+        second = self.client.get(first.data['next'], secure=True)
+
+        ids = [item['id'] for item in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, [notification.pk for notification in reversed(notifications)])
+        self.assertIsNone(second.data['next'])
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from courses.item_stats import record_submissions, recompute_item_stats
+from courses.models import Category, Course, Lesson, Problem, ProblemStats, UserProblem
+
+STAT_FIELDS = [
+    'attempt_count', 'correct_count', 'learner_count', 'solver_count', 'solve_rate',
+    'attempts_mean', 'attempts_m2', 'time_count', 'time_mean', 'time_m2',
+]
+
+
+class ItemStatsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        self.problem = Problem.objects.create(
+            lesson=lesson, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'])
+        self.users = [
+            get_user_model().objects.create(
+                username=f'learner{n}', email=f'learner{n}@example.com', referral_code=f'LEARN{n:03d}')
+            for n in range(4)
+        ]
+
+    def stats(self):
+        row = ProblemStats.objects.get(pk=self.problem.pk)
+        return {field: getattr(row, field) for field in STAT_FIELDS}
+
+    def test_running_stats_match_a_recompute(self):
+        pk = self.problem.pk
+        # Solved first time in 30s, on the third attempt in 90s, never, and with an abandoned tab
+        record_submissions(self.users[0].pk, [(pk, True, 30)])
+        record_submissions(self.users[1].pk, [(pk, False, 10), (pk, False, 20)])
+        record_submissions(self.users[1].pk, [(pk, True, 90), (pk, True, 5)])
+        record_submissions(self.users[2].pk, [(pk, False, None)])
+        record_submissions(self.users[3].pk, [(pk, True, 999999)])
+
+        running = self.stats()
+        self.assertEqual(
+            [running[field] for field in ('attempt_count', 'correct_count', 'learner_count', 'solver_count')],
+            [7, 4, 4, 3])
+        self.assertAlmostEqual(running['solve_rate'], 0.75)
+        self.assertAlmostEqual(running['attempts_mean'], 5 / 3)
+        self.assertEqual(running['time_count'], 2)
+        self.assertAlmostEqual(running['time_mean'], 60)
+
+        ProblemStats.objects.all().delete()
+        self.assertEqual(list(recompute_item_stats()), [1])
+        for field, value in self.stats().items():
+            self.assertAlmostEqual(running[field], value, msg=field)
+
+    def test_first_solve_is_kept(self):
+        record_submissions(self.users[0].pk, [(self.problem.pk, False, 10), (self.problem.pk, True, 40)])
+        record_submissions(self.users[0].pk, [(self.problem.pk, True, 5)])
+
+        row = UserProblem.objects.get(user=self.users[0], problem=self.problem)
+        self.assertEqual((row.attempts, row.correct_attempts, row.attempts_to_solve, row.time_to_solve),
+                         (3, 2, 2, 40))
+        self.assertEqual(self.stats()['solver_count'], 1)
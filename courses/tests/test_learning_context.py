@@ -0,0 +1,70 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from courses.models import Category, Course, CourseEnrollment, Lesson, UserProgress
+from courses.services import get_user_learning_context, get_user_learning_contexts
+
+
+class LearningContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        self.courses = [
+            Course.objects.create(
+                title=title, slug=title.lower(), category=category, description=title, author_id='1')
+            for title in ('Algebra', 'Geometry')
+        ]
+        self.lessons = {
+            course.pk: [
+                Lesson.objects.create(title=f'{course.title} {n}', slug=f'lesson-{n}', course=course, lesson_number=n)
+                for n in (1, 2)
+            ]
+            for course in self.courses
+        }
+        self.users = [
+            get_user_model().objects.create(
+                username=f'learner{n}', email=f'learner{n}@example.com', referral_code=f'LEARN{n:03d}')
+            for n in range(3)
+        ]
+
+    def enroll(self, user, course, days_ago=0):
+        enrollment = CourseEnrollment.objects.create(user=user, course=course)
+        CourseEnrollment.objects.filter(pk=enrollment.pk).update(
+            enrolled_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_contexts_follow_the_latest_enrollment(self):
+        algebra, geometry = self.courses
+        first, second, _ = self.users
+        self.enroll(first, algebra, days_ago=5)
+        self.enroll(first, geometry, days_ago=1)
+        self.enroll(second, algebra)
+        UserProgress.objects.create(user=second, lesson=self.lessons[algebra.pk][0], status='completed')
+
+        contexts = get_user_learning_contexts([user.pk for user in self.users])
+
+        self.assertEqual(set(contexts), {first.pk, second.pk})
+        self.assertEqual(
+            (contexts[first.pk]['course_name'], contexts[first.pk]['next_lesson_title']), ('Geometry', 'Geometry 1'))
+        self.assertEqual(contexts[second.pk]['next_lesson_url'], '/courses/algebra/lesson-2/')
+
+    def test_queries_do_not_grow_with_users(self):
+        for user in self.users:
+            self.enroll(user, self.courses[0])
+        get_user_learning_contexts([self.users[0].pk])
+
+        with self.assertNumQueries(2):
+            get_user_learning_contexts([user.pk for user in self.users])
+
+    def test_single_context_is_cached_until_progress_changes(self):
+        user = self.users[0]
+        self.assertIsNone(get_user_learning_context(user))
+        self.enroll(user, self.courses[0])
+
+        self.assertEqual(get_user_learning_context(user)['next_lesson_title'], 'Algebra 1')
+        with self.assertNumQueries(0):
+            get_user_learning_context(user)
+
+        UserProgress.objects.create(user=user, lesson=self.lessons[self.courses[0].pk][0], status='completed')
+        self.assertEqual(get_user_learning_context(user)['next_lesson_title'], 'Algebra 2')
@@ -0,0 +1,32 @@
+import time
+from django.test import SimpleTestCase
+from courses.mathexpr import canonical_form, equivalent
+
+
+class CanonicalFormTests(SimpleTestCase):
+    def setUp(self):
+        canonical_form.cache_clear()
+
+    def test_polynomials_compare_by_normal_form(self):
+        self.assertTrue(equivalent(canonical_form('(x+1)^2'), canonical_form('x^2 + 2x + 1')))
+        self.assertFalse(equivalent(canonical_form('(x+1)^2'), canonical_form('x^2 + 1')))
+
+    def test_different_variables_are_not_equivalent(self):
+        for template in ('sqrt({})', 'sin({})', 'ln({})'):
+            for a, b in (('x', 'c'), ('q', 'j'), ('a', 'h'), ('x', 'y')):
+                with self.subTest(template=template, a=a, b=b):
+                    self.assertFalse(equivalent(
+                        canonical_form(template.format(a)), canonical_form(template.format(b))))
+        self.assertTrue(equivalent(canonical_form('sqrt(x)*sqrt(x)'), canonical_form('x')))
+
+    def test_nested_powers_fall_back_quickly(self):
+        started = time.monotonic()
+        form = canonical_form('((a+b+c+d)^12)^4')
+        self.assertLess(time.monotonic() - started, 2)
+
+        # Too big to expand, so only the numeric signature is kept
+        self.assertIsNone(form[1])
+        self.assertTrue(equivalent(form, canonical_form('(a+b+c+d)^48')))
+
+    def test_overlong_answers_are_not_parsed(self):
+        self.assertIsNone(canonical_form('+'.join(['x'] * 1000)))
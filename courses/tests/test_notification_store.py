@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.models import Notification
+from courses.models import Achievement
+
+
+class NotificationStoreTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        achievement = Achievement.objects.create(
+            name='First steps', description='Finish a lesson', icon='first', achievement_type='course_completion')
+        self.in_app = Notification.create_achievement_notification(self.user, achievement)
+        self.email_only = Notification.objects.create(
+            user=self.user, type='daily_goal', title='Daily goal', message='Daily goal',
+            in_app=False, email=True, websocket=False)
+
+    def get(self, path, **params):
+        return self.client.get(path, params, secure=True)
+
+    def test_both_endpoints_read_the_same_inbox(self):
+        current = self.get('/api/notifications/').data['results']
+        legacy = self.get('/api/lms/notifications/').data['results']
+
+        self.assertEqual([item['id'] for item in current], [self.in_app.pk])
+        self.assertEqual([item['id'] for item in legacy], [self.in_app.pk])
+        self.assertEqual(current[0]['type'], 'achievement_earned')
+        self.assertEqual(legacy[0]['notification_type'], 'achievement_earned')
+
+    def test_email_only_rows_stay_out_of_the_inbox(self):
+        self.assertEqual(self.get('/api/lms/notifications/unread_count/').data['unread_count'], 1)
+        response = self.client.post(f'/api/notifications/{self.email_only.pk}/mark_read/', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_reads_are_shared(self):
+        self.client.post(f'/api/lms/notifications/{self.in_app.pk}/mark_read/', secure=True)
+
+        self.assertEqual(self.get('/api/notifications/unread_count/').data['unread_count'], 0)
+        self.assertTrue(self.get('/api/notifications/').data['results'][0]['is_read'])
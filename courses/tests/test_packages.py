@@ -0,0 +1,114 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from courses import packages
+from courses.models import Category, Course, Lesson, Problem
+from courses.packages import UnsatisfiableRange, build_course_package, parse_byte_range
+
+
+class PackageTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        patcher = mock.patch.object(packages, 'PACKAGE_ROOT', root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        self.course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        self.first = Lesson.objects.create(title='Intro', slug='intro', course=self.course, lesson_number=1)
+        self.second = Lesson.objects.create(title='Sums', slug='sums', course=self.course, lesson_number=2)
+        self.problem = Problem.objects.create(
+            lesson=self.first, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'])
+
+
+class BuildPackageTests(PackageTestCase):
+    def test_unchanged_course_is_not_rebuilt(self):
+        package, rebuilt, written = build_course_package(self.course)
+        self.assertEqual((rebuilt, written), (2, True))
+
+        self.assertEqual(build_course_package(self.course), (package, 0, False))
+
+    def test_only_changed_lessons_are_rebuilt(self):
+        old, _, _ = build_course_package(self.course)
+        self.problem.question_text = '2 + 2?'
+        self.problem.save()
+
+        package, rebuilt, written = build_course_package(self.course)
+        self.assertEqual((rebuilt, written), (1, True))
+        self.assertNotEqual(package.version, old.version)
+
+        with zipfile.ZipFile(packages.package_path(package)) as bundle:
+            manifest = json.loads(bundle.read('manifest.json'))
+            lesson = json.loads(bundle.read(f'lessons/{self.first.id}.json'))
+        self.assertEqual([entry['id'] for entry in manifest['lessons']], [self.first.id, self.second.id])
+        self.assertEqual(lesson['problems'][0]['question_text'], '2 + 2?')
+
+
+class PackageDownloadTests(PackageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, pk=None, **headers):
+        return self.client.get(f'/api/lms/courses/{pk or self.course.pk}/package/', secure=True, **headers)
+
+    def test_missing_package_is_not_found(self):
+        self.assertEqual(self.download().status_code, 404)
+
+    def test_non_numeric_course_is_not_found(self):
+        self.assertEqual(self.download(pk='abc').status_code, 404)
+        response = self.client.get('/api/lms/courses/abc/progress_matrix/', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_resumed_download(self):
+        build_course_package(self.course)
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        self.assertTrue(zipfile.is_zipfile(io.BytesIO(body)))
+
+        partial = self.download(HTTP_RANGE='bytes=10-', HTTP_IF_RANGE=response['ETag'])
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 10-{len(body) - 1}/{len(body)}')
+        self.assertEqual(b''.join(partial.streaming_content), body[10:])
+
+    def test_stale_if_range_sends_the_whole_package(self):
+        build_course_package(self.course)
+        response = self.download(HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"package-old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_range_past_the_end_is_unsatisfiable(self):
+        package, _, _ = build_course_package(self.course)
+        response = self.download(HTTP_RANGE=f'bytes={package.size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{package.size}')
+
+
+class ParseByteRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_byte_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_byte_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_byte_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_byte_range('bytes=990-2000', 1000), (990, 999))
+
+    def test_ignored_ranges_send_the_whole_file(self):
+        for header in (None, 'items=0-1', 'bytes=0-1,5-6', 'bytes=5-1', 'bytes=x-'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_byte_range(header, 1000))
+
+    def test_range_outside_the_file(self):
+        with self.assertRaises(UnsatisfiableRange):
+            parse_byte_range('bytes=1000-', 1000)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from courses.item_stats import record_submissions
+from courses.models import Category, Course, Lesson, PracticeQueue, Problem, UserProblem
+from courses.practice import MAX_REVIEW_INTERVAL
+
+
+class PracticeScheduleTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        self.problem = Problem.objects.create(
+            lesson=lesson, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'])
+
+    def test_long_correct_streak_keeps_recording(self):
+        for _ in range(40):
+            record_submissions(self.user.id, [(self.problem.id, True, None)])
+
+        row = UserProblem.objects.get(user=self.user, problem=self.problem)
+        self.assertEqual(row.review_streak, 40)
+        self.assertLessEqual(row.due_at, timezone.now() + timedelta(days=MAX_REVIEW_INTERVAL, minutes=1))
+
+        queue = PracticeQueue.objects.get(user=self.user)
+        problem_id, due_at = queue.peek()
+        self.assertEqual(problem_id, self.problem.id)
+        self.assertEqual(int(due_at.timestamp()), int(row.due_at.timestamp()))
+
+    def test_far_future_due_dates_are_clamped(self):
+        queue = PracticeQueue(user=self.user)
+        queue.reschedule({self.problem.id: timezone.now().replace(year=2200)})
+
+        self.assertEqual(queue.unpack(), [(PracticeQueue.MAX_DUE, self.problem.id)])
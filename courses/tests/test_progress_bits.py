@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from courses.models import (
+    Category, Course, CourseEnrollment, Lesson, LessonStatusBitset, UserProgress
+)
+
+
+class LessonStatusBitsetTests(SimpleTestCase):
+    def test_statuses_round_trip(self):
+        bitset = LessonStatusBitset()
+        bitset.set_status(0, 'completed')
+        bitset.set_status(5, 'in_progress')
+        bitset.set_status(0, 'in_progress')
+
+        restored = LessonStatusBitset(bitset.to_bytes())
+        self.assertEqual(
+            [restored.status(position) for position in range(7)],
+            ['in_progress', 'not_started', 'not_started', 'not_started', 'not_started',
+             'in_progress', 'not_started'])
+        # Four lessons per byte
+        self.assertEqual(len(bitset.to_bytes()), 2)
+
+
+class EnrollmentProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        self.course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        self.lessons = [
+            Lesson.objects.create(title=f'Lesson {n}', slug=f'lesson-{n}', course=self.course, lesson_number=n)
+            for n in (1, 2, 3)
+        ]
+        self.enrollment = CourseEnrollment.enroll_user(self.user, self.course)
+
+    def statuses(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.get_lesson_statuses()
+
+    def test_progress_rows_update_the_bits(self):
+        first, second, third = self.lessons
+        UserProgress.objects.create(user=self.user, lesson=second, status='in_progress')
+        progress = UserProgress.objects.create(user=self.user, lesson=third, status='in_progress')
+        progress.status = 'completed'
+        progress.save()
+
+        self.assertEqual(
+            self.statuses(),
+            {first.id: 'not_started', second.id: 'in_progress', third.id: 'completed'})
+
+    def test_new_lessons_rebuild_the_layout(self):
+        UserProgress.objects.create(user=self.user, lesson=self.lessons[1], status='in_progress')
+        added = Lesson.objects.create(title='Lesson 0', slug='lesson-0', course=self.course, lesson_number=0)
+
+        UserProgress.objects.create(user=self.user, lesson=added, status='completed')
+
+        statuses = self.statuses()
+        self.assertEqual(list(statuses), [added.id] + [lesson.id for lesson in self.lessons])
+        self.assertEqual(statuses[added.id], 'completed')
+        self.assertEqual(statuses[self.lessons[1].id], 'in_progress')
+
+    def test_progress_matrix_reads_a_current_layout(self):
+        UserProgress.objects.create(user=self.user, lesson=self.lessons[0], status='in_progress')
+        self.lessons[2].delete()
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(f'/api/lms/courses/{self.course.pk}/progress_matrix/', secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lessons'], [
+            {'lesson_id': self.lessons[0].id, 'status': 'in_progress'},
+            {'lesson_id': self.lessons[1].id, 'status': 'not_started'},
+        ])
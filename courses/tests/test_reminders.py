@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import OutboundEmail
+from api.models import Streak
+from courses.models import Category, Course, CourseEnrollment, Lesson
+from courses.reminders import ReminderRun, segment_users
+
+
+class ReminderTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.users = {}
+        for name, last_active, streak in (
+            ('streak_broken', now - timedelta(days=3), 4),
+            ('inactive', now - timedelta(days=3), 0),
+            ('daily', None, 0),
+            ('active', now, 2),
+        ):
+            user = get_user_model().objects.create(
+                username=name, email=f'{name}@example.com', referral_code=name[:8], last_active=last_active)
+            Streak.objects.create(user=user, current_streak=streak)
+            self.users[name] = user
+
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        CourseEnrollment.objects.create(user=self.users['streak_broken'], course=course)
+
+    def test_segments(self):
+        segments = dict(segment_users().values_list('username', 'segment'))
+
+        self.assertEqual(segments, {
+            'streak_broken': 'streak_broken', 'inactive': 'inactive', 'daily': 'daily', 'active': None,
+        })
+
+    def test_legacy_streak_date_is_a_fallback(self):
+        user = self.users['daily']
+        Streak.objects.filter(user=user).update(last_activity_date=timezone.now().date() - timedelta(days=5))
+
+        self.assertEqual(segment_users().get(pk=user.pk).segment, 'inactive')
+
+    @mock.patch('courses.reminders.render_email', return_value='<p>Reminder</p>')
+    def test_run_queues_one_email_per_user_and_day(self, render_email):
+        run = ReminderRun(chunk_size=1)
+        stats = run.run()
+
+        # The inactive user has no course to continue, so is skipped
+        self.assertEqual(
+            (stats['users'], stats['skipped'], stats['queued']), (3, 1, 2))
+        self.assertEqual(
+            set(OutboundEmail.objects.values_list('to_email', flat=True)),
+            {'streak_broken@example.com', 'daily@example.com'})
+        streak_context = next(
+            call.args[1] for call in render_email.call_args_list if call.args[1].get('broke_streak'))
+        self.assertEqual((streak_context['course_name'], streak_context['streak_count']), ('Algebra', 4))
+
+        self.assertEqual(ReminderRun().run()['queued'], 0)
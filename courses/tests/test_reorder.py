@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.models import Category, Course, Lesson, LessonContentBlock
+
+
+class ReorderBlocksTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        self.lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        other_lesson = Lesson.objects.create(title='Sums', slug='sums', course=course, lesson_number=2)
+        self.blocks = [
+            LessonContentBlock.objects.create(
+                lesson=self.lesson, block_type='text', order=n, content={'text': f'Block {n}'})
+            for n in range(3)
+        ]
+        self.foreign = LessonContentBlock.objects.create(
+            lesson=other_lesson, block_type='text', order=0, content={'text': 'Elsewhere'})
+        user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def reorder(self, block_order):
+        return self.client.post(
+            '/api/lms/lesson-content-blocks/reorder/',
+            {'lesson_id': self.lesson.id, 'block_order': block_order},
+            format='json', secure=True)
+
+    def content(self):
+        response = self.client.get(f'/api/lms/lessons/{self.lesson.id}/content/', secure=True)
+        return [item['id'] for item in response.data]
+
+    def test_reorder_updates_cached_content(self):
+        first, second, third = self.blocks
+        self.assertEqual(self.content(), [first.id, second.id, third.id])
+
+        # The cache is invalidated once the reorder commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.reorder([third.id, first.id, second.id])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([block['id'] for block in response.data], [third.id, first.id, second.id])
+        self.assertEqual(self.content(), [third.id, first.id, second.id])
+
+    def test_unchanged_blocks_are_not_touched(self):
+        first, second, third = self.blocks
+        before = LessonContentBlock.objects.get(pk=first.pk).updated_at
+
+        self.reorder([first.id, third.id, second.id])
+
+        self.assertEqual(LessonContentBlock.objects.get(pk=first.pk).updated_at, before)
+        self.assertGreater(LessonContentBlock.objects.get(pk=third.pk).updated_at, before)
+
+    def test_invalid_orders_are_rejected(self):
+        first, second, _ = self.blocks
+        for block_order in ([first.id, first.id], [first.id, 'abc'], [first.id, self.foreign.id]):
+            with self.subTest(block_order=block_order):
+                self.assertEqual(self.reorder(block_order).status_code, 400)
+
+        self.assertEqual(LessonContentBlock.objects.get(pk=first.pk).order, 0)
+        self.assertEqual(LessonContentBlock.objects.get(pk=self.foreign.pk).order, 0)
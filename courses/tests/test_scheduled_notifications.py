@@ -0,0 +1,58 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import OutboundEmail
+from api.models import Notification
+from courses.services import NotificationService
+
+
+def render(template_name, context):
+    if context['notification'].title == 'Broken':
+        raise ValueError('Template error')
+    return f"<p>{context['notification'].title}</p>"
+
+
+@mock.patch('courses.services.render_email', side_effect=render)
+class ScheduledNotificationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        now = timezone.now()
+        self.due = [self.schedule(f'Due {n}', now - timedelta(minutes=n + 1)) for n in range(5)]
+        self.later = self.schedule('Later', now + timedelta(hours=1))
+
+    def schedule(self, title, scheduled_for, **fields):
+        return Notification.objects.create(
+            user=self.user, type='daily_goal', title=title, message=title,
+            email=True, in_app=False, websocket=False, scheduled_for=scheduled_for, **fields)
+
+    def test_due_notifications_are_queued_once(self, render_email):
+        self.assertEqual(NotificationService.process_scheduled_notifications(batch_size=2), 5)
+
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('subject', flat=True)),
+            [notification.title for notification in self.due])
+        self.assertFalse(Notification.objects.get(pk=self.later.pk).is_sent)
+        self.assertEqual(NotificationService.process_scheduled_notifications(batch_size=2), 0)
+
+    def test_queries_do_not_grow_with_the_batch(self, render_email):
+        Notification.objects.update(is_sent=True)
+        now = timezone.now()
+        for size in (1, 20):
+            for n in range(size):
+                self.schedule(f'Batch of {size}', now - timedelta(seconds=n + 1))
+            with self.assertNumQueries(10):
+                self.assertEqual(NotificationService.process_scheduled_notifications(batch_size=50), size)
+
+    def test_failures_stay_unsent_without_stopping_the_batch(self, render_email):
+        broken = self.schedule('Broken', timezone.now() - timedelta(minutes=10))
+
+        self.assertEqual(NotificationService.process_scheduled_notifications(batch_size=2), 5)
+        self.assertFalse(Notification.objects.get(pk=broken.pk).is_sent)
+        self.assertEqual(OutboundEmail.objects.count(), 5)
+
+    def test_limit(self, render_email):
+        self.assertEqual(NotificationService.process_scheduled_notifications(batch_size=2, limit=3), 3)
+        self.assertEqual(Notification.objects.filter(email=True, is_sent=False).count(), 3)
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from courses.models import Category, Course, CourseEnrollment, Lesson, UserProgress
+from courses.sequence import get_lesson_sequence, get_lesson_sequences, next_lessons_for_users
+
+
+class LessonSequenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        self.course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        self.other = Course.objects.create(
+            title='Geometry', slug='geometry', category=category, description='Geometry', author_id='1')
+        self.lessons = [
+            Lesson.objects.create(title=f'Lesson {n}', slug=f'lesson-{n}', course=self.course, lesson_number=n)
+            for n in (1, 2, 4)
+        ]
+
+    def ids(self, course):
+        return [entry.id for entry in get_lesson_sequence(course.id)]
+
+    def test_lookups(self):
+        first, second, third = self.lessons
+        sequence = get_lesson_sequence(self.course.id)
+
+        self.assertEqual(sequence.first().id, first.id)
+        self.assertEqual(sequence.next_after(first.id).id, second.id)
+        self.assertIsNone(sequence.next_after(third.id))
+        self.assertIsNone(sequence.previous_before(first.id))
+        self.assertEqual(sequence.previous_before(third.id).id, second.id)
+        self.assertEqual(sequence.next_after_number(2).id, third.id)
+        self.assertEqual(sequence.next_after_number(3).id, third.id)
+        self.assertEqual(sequence.first_uncompleted({first.id, third.id}).id, second.id)
+
+    def test_sequences_are_cached_until_lessons_change(self):
+        get_lesson_sequence(self.course.id)
+        with self.assertNumQueries(0):
+            get_lesson_sequence(self.course.id)
+
+        lesson = Lesson.objects.create(title='Lesson 3', slug='lesson-3', course=self.course, lesson_number=3)
+        self.assertEqual(self.ids(self.course), [self.lessons[0].id, self.lessons[1].id, lesson.id, self.lessons[2].id])
+
+        lesson.course = self.other
+        lesson.save()
+        self.assertEqual(self.ids(self.course), [entry.id for entry in self.lessons])
+        self.assertEqual(self.ids(self.other), [lesson.id])
+
+    def test_misses_load_in_one_query(self):
+        with self.assertNumQueries(1):
+            sequences = get_lesson_sequences([self.course.id, self.other.id])
+        self.assertEqual(len(sequences[self.course.id]), 3)
+        self.assertEqual(len(sequences[self.other.id]), 0)
+
+    def test_next_lessons_for_users(self):
+        users = [
+            get_user_model().objects.create(
+                username=f'learner{n}', email=f'learner{n}@example.com', referral_code=f'LEARN{n:03d}')
+            for n in range(3)
+        ]
+        first, second, _ = self.lessons
+        for user in users[:2]:
+            CourseEnrollment.objects.create(user=user, course=self.course)
+        UserProgress.objects.create(user=users[1], lesson=second, status='completed')
+        get_lesson_sequence(self.course.id)
+
+        with self.assertNumQueries(2):
+            result = next_lessons_for_users([user.pk for user in users])
+
+        self.assertEqual(result[users[0].pk][1].id, first.id)
+        self.assertEqual(result[users[1].pk][1].id, self.lessons[2].id)
+        self.assertNotIn(users[2].pk, result)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from core.sparse import SparseFieldsMixin
+from courses.models import Category, Course, Hint, Lesson, LessonContentBlock, Problem
+from courses.serializers import (
+    CategorySerializer, CourseSerializer, LessonContentBlockSerializer, ProblemSerializer
+)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(id='math', title='Math', description='Math')
+        self.course = Course.objects.create(
+            title='Algebra', slug='algebra', category=self.category, description='Algebra', author_id='1')
+        self.lesson = Lesson.objects.create(title='Intro', slug='intro', course=self.course, lesson_number=1)
+        self.problem = Problem.objects.create(
+            lesson=self.lesson, question_text='1 + 1?', question_type='fill_blank',
+            correct_answer=['2'], explanation='One and one')
+        Hint.objects.create(problem=self.problem, content='Count', order=1)
+        self.block = LessonContentBlock.objects.create(
+            lesson=self.lesson, block_type='text', order=1, content={'text': 'Hello'})
+        user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def get(self, path, **params):
+        return self.client.get(path, params, secure=True)
+
+    def test_plain_dicts_match_drf(self):
+        for serializer_class, instance in (
+            (CategorySerializer, self.category),
+            (CourseSerializer, self.course),
+            (LessonContentBlockSerializer, self.block),
+            (ProblemSerializer, self.problem),
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                serializer = serializer_class(expand=['hints', 'solution_steps'])
+                self.assertEqual(
+                    SparseFieldsMixin.to_representation(serializer, instance),
+                    serializers.ModelSerializer.to_representation(serializer, instance))
+
+    def test_fields_limit_the_response_and_the_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('/api/lms/problems/', fields='id,question_text')
+
+        self.assertEqual(response.data[0], {'id': self.problem.id, 'question_text': '1 + 1?'})
+        self.assertNotIn('explanation', queries.captured_queries[-1]['sql'])
+
+    def test_expandable_fields_are_opt_in(self):
+        self.assertNotIn('hints', self.get('/api/lms/problems/').data[0])
+
+        expanded = self.get('/api/lms/problems/', expand='hints').data[0]
+        self.assertEqual(expanded['hints'][0]['content'], 'Count')
+        self.assertNotIn('solution_steps', expanded)
+
+    def test_nested_fields(self):
+        response = self.get('/api/lms/lessons/', fields='id,content_blocks.order')
+
+        self.assertEqual(response.data[0], {'id': self.lesson.id, 'content_blocks': [{'order': 1}]})
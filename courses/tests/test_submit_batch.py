@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.models import Category, Course, Lesson, Problem, UserReward
+
+
+class SubmitBatchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        lesson = Lesson.objects.create(title='Intro', slug='intro', course=course, lesson_number=1)
+        self.problem = Problem.objects.create(
+            lesson=lesson, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, answers):
+        return self.client.post(
+            '/api/lms/problems/submit_batch/', {'answers': answers}, format='json', secure=True)
+
+    def test_repeated_problem_is_rejected(self):
+        response = self.submit([{'problem_id': self.problem.id, 'answer': '2'}] * 3)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserReward.objects.filter(user=self.user).exists())
+
+    def test_distinct_problems_are_graded(self):
+        response = self.submit([{'problem_id': self.problem.id, 'answer': '3'}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'problem_id': self.problem.id, 'is_correct': False}])
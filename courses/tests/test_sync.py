@@ -0,0 +1,83 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses import sync
+from courses.models import Category, Course, Hint, Lesson, LessonContentBlock, Problem
+from courses.sync import get_changes
+
+
+class SyncFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(sync, 'SYNC_SETTLE_SECONDS', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        self.course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        self.other = Course.objects.create(
+            title='Geometry', slug='geometry', category=category, description='Geometry', author_id='1')
+        self.lesson = Lesson.objects.create(title='Intro', slug='intro', course=self.course, lesson_number=1)
+        self.other_lesson = Lesson.objects.create(title='Angles', slug='angles', course=self.other, lesson_number=1)
+        self.problem = Problem.objects.create(
+            lesson=self.lesson, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'])
+        self.block = LessonContentBlock.objects.create(
+            lesson=self.lesson, block_type='text', order=1, content={'text': 'Hello'})
+
+    def drain(self, cursor=None, **kwargs):
+        """Follow the feed until has_more is false; returns (changes, cursor)"""
+        changes = []
+        while True:
+            page, cursor, has_more = get_changes(cursor=cursor, **kwargs)
+            changes += page
+            if not has_more:
+                return changes, cursor
+
+    def keys(self, changes):
+        return [(change['type'], change['op'], change['id']) for change in changes]
+
+    def test_paging_returns_every_row_once(self):
+        changes, _ = self.drain(limit=2)
+
+        self.assertEqual(sorted(self.keys(changes)), sorted([
+            ('course', 'upsert', self.course.id), ('course', 'upsert', self.other.id),
+            ('lesson', 'upsert', self.lesson.id), ('lesson', 'upsert', self.other_lesson.id),
+            ('problem', 'upsert', self.problem.id), ('block', 'upsert', self.block.id),
+        ]))
+
+    def test_cursor_resumes_with_later_changes(self):
+        _, cursor = self.drain(course_id=self.course.id)
+        self.assertEqual(get_changes(cursor=cursor)[0], [])
+
+        Hint.objects.create(problem=self.problem, content='Count', order=1)
+        block_id = self.block.id
+        self.block.delete()
+        changes, _ = self.drain(cursor, course_id=self.course.id)
+
+        self.assertEqual(self.keys(changes), [('problem', 'upsert', self.problem.id), ('block', 'delete', block_id)])
+        self.assertEqual(changes[1]['data'], {'course_id': self.course.id})
+
+    def test_course_filter(self):
+        changes, _ = self.drain(course_id=self.other.id)
+
+        self.assertEqual({change['type'] for change in changes}, {'course', 'lesson'})
+        self.assertEqual(len(changes), 2)
+
+    def test_recent_rows_wait_for_the_settle_window(self):
+        with mock.patch.object(sync, 'SYNC_SETTLE_SECONDS', 60):
+            self.assertEqual(get_changes(), ([], None, False))
+
+    def test_endpoint_rejects_bad_input(self):
+        user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for params in ({'cursor': 'nope'}, {'limit': '0'}, {'course': 'abc'}):
+            with self.subTest(params=params):
+                response = client.get('/api/lms/courses/changes/', params, secure=True)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(client.get('/api/lms/courses/changes/', secure=True).data['changes']), 6)
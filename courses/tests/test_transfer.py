@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from courses.models import (
+    Category, Course, CourseEnrollment, Lesson, LessonContentBlock, Problem, Hint
+)
+from courses.transfer import export_course, import_course
+
+
+class ImportReplaceTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(id='math', title='Math', description='Math')
+        self.course = Course.objects.create(
+            title='Algebra', slug='algebra', category=category, description='Algebra', author_id='1')
+        other = Course.objects.create(
+            title='Geometry', slug='geometry', category=category, description='Geometry', author_id='1')
+
+        lesson = Lesson.objects.create(title='Intro', slug='intro', course=self.course, lesson_number=1)
+        problem = Problem.objects.create(
+            lesson=lesson, question_text='1 + 1?', question_type='fill_blank', correct_answer=['2'])
+        Hint.objects.create(problem=problem, content='Count', order=1)
+        LessonContentBlock.objects.create(lesson=lesson, block_type='problem', order=2, problem=problem)
+
+        # A block pointing at another course's problem exports it as a lesson-less problem
+        other_lesson = Lesson.objects.create(title='Angles', slug='angles', course=other, lesson_number=1)
+        shared = Problem.objects.create(
+            lesson=other_lesson, question_text='Right angle?', question_type='fill_blank', correct_answer=['90'])
+        LessonContentBlock.objects.create(lesson=lesson, block_type='problem', order=3, problem=shared)
+
+        self.lines = list(export_course(self.course))
+
+    def counts(self):
+        return {
+            'courses': Course.objects.count(),
+            'lessons': Lesson.objects.count(),
+            'problems': Problem.objects.count(),
+            'blocks': LessonContentBlock.objects.count(),
+            'hints': Hint.objects.count(),
+        }
+
+    def test_repeated_replace_leaves_no_orphans(self):
+        Course.objects.filter(pk=self.course.pk).delete()
+        import_course(self.lines)
+        after_first = self.counts()
+
+        import_course(self.lines, replace=True)
+        import_course(self.lines, replace=True)
+
+        self.assertEqual(self.counts(), after_first)
+        # The other course keeps its own problem
+        self.assertTrue(Problem.objects.filter(lesson__course__slug='geometry').exists())
+
+    def test_replace_keeps_courses_with_learners_unless_forced(self):
+        user = get_user_model().objects.create(
+            username='learner', email='learner@example.com', referral_code='LEARN001')
+        CourseEnrollment.objects.create(user=user, course=self.course)
+
+        with self.assertRaises(ValidationError):
+            import_course(self.lines, replace=True)
+        self.assertTrue(CourseEnrollment.objects.filter(course=self.course).exists())
+
+        course, _ = import_course(self.lines, replace=True, force=True)
+        self.assertNotEqual(course.pk, self.course.pk)
+        self.assertFalse(CourseEnrollment.objects.exists())
@@ -0,0 +1,370 @@
+"""
+Streaming NDJSON export and bulk import of a whole course.
+
+Every line is one JSON object with a "type" key:
+category, course, lesson, problem, block, hint or solution_step.
+Lessons and problems carry a "ref" that later lines point back to.
+"""
+import json
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from .cache import invalidate_lesson_sequence, invalidate_catalog_snapshot
+from .models import (
+    Category, Course, Lesson, LessonContentBlock,
+    Problem, Hint, SolutionStep, CourseEnrollment, UserProgress
+)
+
+CATEGORY_FIELDS = [
+    'id', 'title', 'description', 'image', 'in_progress', 'course_ids',
+    'is_community_enabled', 'community_description'
+]
+COURSE_FIELDS = [
+    'title', 'slug', 'is_new', 'progress', 'description', 'thumbnail',
+    'author_id', 'is_published'
+]
+LESSON_FIELDS = ['title', 'slug', 'lesson_number', 'estimated_time', 'is_published']
+PROBLEM_FIELDS = [
+    'which', 'question_text', 'question_type', 'options', 'correct_answer',
+    'explanation', 'order', 'content', 'diagram_config', 'diagrams', 'img', 'xp'
+]
+BLOCK_FIELDS = ['block_type', 'order', 'content']
+HINT_FIELDS = ['content', 'order']
+SOLUTION_STEP_FIELDS = ['explanation', 'order']
+
+RECORD_TYPES = ['category', 'course', 'lesson', 'problem', 'block', 'hint', 'solution_step']
+
+# Stop collecting validation errors after this many
+MAX_REPORTED_ERRORS = 50
+
+
+def _line(record_type, data):
+    return json.dumps({'type': record_type, **data}, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _pick(record, fields):
+    return {field: record[field] for field in fields if field in record}
+
+
+def export_course(course, chunk_size=2000):
+    """
+    Yield the course as NDJSON lines, one level at a time.
+    """
+    category = Category.objects.filter(pk=course.category_id).values(*CATEGORY_FIELDS).first()
+    yield _line('category', category)
+    yield _line('course', {field: getattr(course, field) for field in COURSE_FIELDS})
+
+    lesson_ids = set()
+    lessons = Lesson.objects.filter(course=course).order_by(
+        'lesson_number', 'id').values('id', *LESSON_FIELDS)
+    for lesson in lessons.iterator(chunk_size=chunk_size):
+        lesson_ids.add(lesson['id'])
+        lesson['ref'] = lesson.pop('id')
+        yield _line('lesson', lesson)
+
+    # Include problems that blocks in this course point at, even if they
+    # live outside the course, so block references always resolve
+    problems = Problem.objects.filter(
+        Q(lesson__course=course) | Q(lessoncontentblock__lesson__course=course)
+    ).distinct().order_by('lesson_id', 'order', 'id').values('id', 'lesson_id', *PROBLEM_FIELDS)
+    problem_ids = []
+    for problem in problems.iterator(chunk_size=chunk_size):
+        problem_ids.append(problem['id'])
+        problem['ref'] = problem.pop('id')
+        lesson_id = problem.pop('lesson_id')
+        problem['lesson'] = lesson_id if lesson_id in lesson_ids else None
+        yield _line('problem', problem)
+
+    blocks = LessonContentBlock.objects.filter(lesson__course=course).order_by(
+        'lesson_id', 'order', 'id').values('lesson_id', 'problem_id', *BLOCK_FIELDS)
+    for block in blocks.iterator(chunk_size=chunk_size):
+        block['lesson'] = block.pop('lesson_id')
+        block['problem'] = block.pop('problem_id')
+        yield _line('block', block)
+
+    for model, record_type, fields in (
+        (Hint, 'hint', HINT_FIELDS),
+        (SolutionStep, 'solution_step', SOLUTION_STEP_FIELDS),
+    ):
+        rows = model.objects.filter(problem_id__in=problem_ids).order_by(
+            'problem_id', 'order').values('problem_id', *fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            row['problem'] = row.pop('problem_id')
+            yield _line(record_type, row)
+
+
+class _ParsedCourse:
+    def __init__(self):
+        self.category = None
+        self.course = None
+        self.lessons = {}
+        self.problems = {}
+        self.blocks = []
+        self.hints = []
+        self.solution_steps = []
+
+
+def _prepare_block(block):
+    """Apply the normalisation LessonContentBlock.save() would do"""
+    if not block.content:
+        block.content = {} if block.block_type == 'problem' else dict(
+            block.default_content.get(block.block_type, {}))
+    elif block.block_type != 'problem':
+        block.validate_content()
+        default = block.default_content.get(block.block_type, {})
+        block.content = {**default, **block.content}
+
+
+def _prepare_problem(problem):
+    """Apply the normalisation Problem.save() would do, minus the order lookup"""
+    if problem.content is None or problem.content == []:
+        problem.content = {}
+    if problem.diagram_config is None:
+        problem.diagram_config = {}
+    problem.clean()
+
+
+def parse_course(lines):
+    """
+    First pass: parse and validate every line without touching the database.
+    Raises ValidationError listing the offending line numbers.
+    """
+    parsed = _ParsedCourse()
+    errors = []
+    hint_orders = set()
+    step_orders = set()
+
+    def error(line_number, message):
+        errors.append(f'Line {line_number}: {message}')
+
+    for line_number, raw in enumerate(lines, start=1):
+        if len(errors) >= MAX_REPORTED_ERRORS:
+            break
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        raw = raw.strip()
+        if not raw:
+            continue
+
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            error(line_number, f'invalid JSON ({e})')
+            continue
+        if not isinstance(record, dict) or record.get('type') not in RECORD_TYPES:
+            error(line_number, f'unknown record type {record.get("type") if isinstance(record, dict) else None!r}')
+            continue
+
+        record_type = record['type']
+        try:
+            if record_type == 'category':
+                if parsed.category is not None:
+                    raise ValidationError('only one category record is allowed')
+                if not record.get('id'):
+                    raise ValidationError('category id is required')
+                parsed.category = _pick(record, CATEGORY_FIELDS)
+
+            elif record_type == 'course':
+                if parsed.course is not None:
+                    raise ValidationError('only one course record is allowed')
+                if not record.get('title'):
+                    raise ValidationError('course title is required')
+                parsed.course = _pick(record, COURSE_FIELDS)
+
+            elif record_type == 'lesson':
+                ref = record.get('ref')
+                if ref is None or ref in parsed.lessons:
+                    raise ValidationError(f'lesson ref {ref!r} is missing or duplicated')
+                if not record.get('title'):
+                    raise ValidationError('lesson title is required')
+                lesson = Lesson(**_pick(record, LESSON_FIELDS))
+                if not lesson.slug:
+                    lesson.slug = slugify(lesson.title)
+                parsed.lessons[ref] = lesson
+
+            elif record_type == 'problem':
+                ref = record.get('ref')
+                if ref is None or ref in parsed.problems:
+                    raise ValidationError(f'problem ref {ref!r} is missing or duplicated')
+                lesson_ref = record.get('lesson')
+                if lesson_ref is not None and lesson_ref not in parsed.lessons:
+                    raise ValidationError(f'unknown lesson ref {lesson_ref!r}')
+                problem = Problem(**_pick(record, PROBLEM_FIELDS))
+                _prepare_problem(problem)
+                parsed.problems[ref] = (lesson_ref, problem)
+
+            elif record_type == 'block':
+                lesson_ref = record.get('lesson')
+                if lesson_ref not in parsed.lessons:
+                    raise ValidationError(f'unknown lesson ref {lesson_ref!r}')
+                problem_ref = record.get('problem')
+                if problem_ref is not None and problem_ref not in parsed.problems:
+                    raise ValidationError(f'unknown problem ref {problem_ref!r}')
+                block = LessonContentBlock(**_pick(record, BLOCK_FIELDS))
+                _prepare_block(block)
+                parsed.blocks.append((lesson_ref, problem_ref, block))
+
+            else:
+                problem_ref = record.get('problem')
+                if problem_ref not in parsed.problems:
+                    raise ValidationError(f'unknown problem ref {problem_ref!r}')
+                if record_type == 'hint':
+                    row, seen = Hint(**_pick(record, HINT_FIELDS)), hint_orders
+                    target = parsed.hints
+                else:
+                    row, seen = SolutionStep(**_pick(record, SOLUTION_STEP_FIELDS)), step_orders
+                    target = parsed.solution_steps
+                if (problem_ref, row.order) in seen:
+                    raise ValidationError(f'duplicate {record_type} order {row.order} for problem {problem_ref!r}')
+                seen.add((problem_ref, row.order))
+                target.append((problem_ref, row))
+
+        except ValidationError as e:
+            for message in e.messages:
+                error(line_number, message)
+        except (TypeError, ValueError) as e:
+            error(line_number, str(e))
+
+    if parsed.category is None and not errors:
+        errors.append('Missing category record')
+    if parsed.course is None and not errors:
+        errors.append('Missing course record')
+    if errors:
+        raise ValidationError(errors)
+    return parsed
+
+
+def _assign_problem_orders(parsed):
+    """
+    Fill in missing problem orders in memory, following Problem.save():
+    next order = max(problem orders, block orders in the lesson) + 1.
+    """
+    last_order = defaultdict(int)
+    for lesson_ref, problem in parsed.problems.values():
+        if lesson_ref is not None and problem.order:
+            last_order[lesson_ref] = max(last_order[lesson_ref], problem.order)
+    for lesson_ref, _, block in parsed.blocks:
+        last_order[lesson_ref] = max(last_order[lesson_ref], block.order or 0)
+
+    for lesson_ref, problem in parsed.problems.values():
+        if lesson_ref is not None and not problem.order:
+            last_order[lesson_ref] += 1
+            problem.order = last_order[lesson_ref]
+
+
+def _delete_course(course):
+    """
+    Delete a course along with the lesson-less problems that only its blocks
+    point at. Importing creates those problems, and the course's cascade
+    doesn't reach them, so each replace would leave the previous copies behind.
+    """
+    shared = LessonContentBlock.objects.exclude(lesson__course=course).filter(
+        problem__isnull=False).values('problem_id')
+    Problem.objects.filter(
+        pk__in=LessonContentBlock.objects.filter(lesson__course=course).values('problem_id'),
+        lesson__isnull=True
+    ).exclude(pk__in=shared).delete()
+    course.delete()
+
+
+def _has_learner_data(courses):
+    return (
+        CourseEnrollment.objects.filter(course__in=courses).exists()
+        or UserProgress.objects.filter(lesson__course__in=courses).exists()
+    )
+
+
+def import_course(lines, replace=False, batch_size=1000, force=False):
+    """
+    Validate the whole stream first, then insert every level with
+    bulk_create inside one transaction. Returns the created course and row counts.
+
+    Replacing deletes the existing course, and with it every enrollment,
+    lesson progress and problem submission that points at it, so a course
+    that learners have started is only replaced when force is set.
+    """
+    parsed = parse_course(lines)
+    _assign_problem_orders(parsed)
+
+    course_data = dict(parsed.course)
+    if not course_data.get('slug'):
+        course_data['slug'] = slugify(course_data['title'])
+
+    with transaction.atomic():
+        existing = Course.objects.filter(slug=course_data['slug'])
+        if existing.exists():
+            if not replace:
+                raise ValidationError(
+                    f"A course with slug '{course_data['slug']}' already exists"
+                )
+            if not force and _has_learner_data(existing):
+                raise ValidationError(
+                    f"The course with slug '{course_data['slug']}' has learners; "
+                    "replacing it would delete their enrollments and progress"
+                )
+            for old_course in existing:
+                _delete_course(old_course)
+
+        category_data = dict(parsed.category)
+        category, _ = Category.objects.get_or_create(
+            id=category_data.pop('id'),
+            defaults=category_data
+        )
+        course = Course.objects.create(category=category, **course_data)
+
+        # bulk_create skips the counter signals, so set the counters up front
+        problems_per_lesson = defaultdict(int)
+        for lesson_ref, _ in parsed.problems.values():
+            problems_per_lesson[lesson_ref] += 1
+
+        lesson_refs = list(parsed.lessons)
+        lessons = [parsed.lessons[ref] for ref in lesson_refs]
+        for ref, lesson in zip(lesson_refs, lessons):
+            lesson.course = course
+            lesson.problem_count = problems_per_lesson[ref]
+        Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+        # bulk_create skips the post_save signals that normally do this
+        transaction.on_commit(lambda: invalidate_lesson_sequence(course.id))
+        transaction.on_commit(invalidate_catalog_snapshot)
+        lesson_map = dict(zip(lesson_refs, lessons))
+
+        problem_refs = list(parsed.problems)
+        problems = []
+        for ref in problem_refs:
+            lesson_ref, problem = parsed.problems[ref]
+            problem.lesson = lesson_map.get(lesson_ref)
+            problems.append(problem)
+        Problem.objects.bulk_create(problems, batch_size=batch_size)
+        problem_map = dict(zip(problem_refs, problems))
+
+        blocks = []
+        for lesson_ref, problem_ref, block in parsed.blocks:
+            block.lesson = lesson_map[lesson_ref]
+            block.problem = problem_map.get(problem_ref)
+            blocks.append(block)
+        LessonContentBlock.objects.bulk_create(blocks, batch_size=batch_size)
+
+        course.lesson_count = len(lessons)
+        course.problem_count = sum(1 for problem in problems if problem.lesson_id)
+        Course.objects.filter(pk=course.pk).update(
+            lesson_count=course.lesson_count,
+            problem_count=course.problem_count
+        )
+
+        for rows, model in ((parsed.hints, Hint), (parsed.solution_steps, SolutionStep)):
+            objs = []
+            for problem_ref, row in rows:
+                row.problem = problem_map[problem_ref]
+                objs.append(row)
+            model.objects.bulk_create(objs, batch_size=batch_size)
+
+    return course, {
+        'lessons': len(lessons),
+        'problems': len(problems),
+        'blocks': len(blocks),
+        'hints': len(parsed.hints),
+        'solution_steps': len(parsed.solution_steps),
+    }
@@ -3,9 +3,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.http import Http404
+from django.http import (
+    Http404, FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
 from django.utils import timezone
 from datetime import timedelta
+import os
 from .models import (
     Category, Course, Lesson, LessonContentBlock,
     Problem, Hint, SolutionStep,
@@ -13,7 +18,7 @@ from .models import (
     DailyChallenge, UserChallengeProgress, UserLevel,
     Achievement, UserAchievement,
     CulturalEvent, UserCulturalProgress, CommunityContribution,
-    UserNotification
+    CoursePackage, ProblemStats
 )
 from leagues.models import UserLeague, League  # Import from leagues app
 from .serializers import (
@@ -27,11 +32,27 @@ from .serializers import (
     DailyChallengeSerializer, UserChallengeProgressSerializer,
     UserLevelSerializer, AchievementSerializer, UserAchievementSerializer,
     CulturalEventSerializer, UserCulturalProgressSerializer, CommunityContributionSerializer,
-    UserLeagueSerializer, LeagueSerializer, UserNotificationSerializer
+    UserLeagueSerializer, LeagueSerializer, UserNotificationSerializer,
+    ProblemStatsSerializer
 )
 from django.core.exceptions import ValidationError
+from core.sparse import SparseFieldsViewSetMixin
+from core.batch import BatchRetrieveMixin
 from .services import LearningProgressService, LeagueService, NotificationService
+from .transfer import export_course, import_course
+from .grading import get_checker, get_checkers
+from .achievements import AchievementEngine
+from .item_stats import record_submissions
+from .practice import next_practice_problem
+from .catalog import get_catalog_snapshot
+from .inbox import NotificationInboxMixin
+from .sync import get_changes, InvalidCursor, SYNC_PAGE_SIZE, MAX_SYNC_PAGE_SIZE
+from .packages import (
+    get_lesson_content, package_path, parse_byte_range, iter_file_range, UnsatisfiableRange
+)
+from .cache import invalidate_lesson_content
 from django.core.cache import cache
+from django.db import transaction
 from django.conf import settings
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
@@ -39,7 +60,7 @@ from django.views.decorators.vary import vary_on_cookie
 from api.models import Streak
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint for categories.
     """
@@ -57,8 +78,40 @@ class CategoryViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(in_progress=in_progress == 'true')
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """
+        The whole catalog (categories, courses and lesson headers) as one
+        pre-rendered document. Supports If-None-Match / If-Modified-Since.
+        """
+        snapshot = get_catalog_snapshot()
+        last_modified = int(snapshot.last_modified.timestamp())
+        gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        etag = snapshot.etag(gzipped)
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(',')]
+        else:
+            since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            not_modified = since is not None and last_modified <= since
+
+        if not_modified:
+            response = HttpResponseNotModified()
+        elif gzipped:
+            response = HttpResponse(snapshot.gzipped, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(snapshot.body, content_type='application/json')
 
-class CourseViewSet(viewsets.ModelViewSet):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'public, no-cache'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class CourseViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint for courses.
     """
@@ -80,6 +133,9 @@ class CourseViewSet(viewsets.ModelViewSet):
         against query parameters in the URL.
         """
         queryset = Course.objects.all()
+        if self.action == 'list':
+            # The list serializer prints the category name
+            queryset = queryset.select_related('category')
         category_id = self.request.query_params.get('category', None)
         if category_id is not None:
             queryset = queryset.filter(category_id=category_id)
@@ -107,13 +163,201 @@ class CourseViewSet(viewsets.ModelViewSet):
         serializer = CourseEnrollmentSerializer(enrollment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'], url_path='export',
+            permission_classes=[IsAuthenticated])
+    def export_ndjson(self, request, pk=None):
+        """
+        Stream the whole course as NDJSON (admin only).
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"detail": "Only staff can export courses"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        course = self.get_object()
+        response = StreamingHttpResponse(
+            export_course(course),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{course.slug}.ndjson"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[IsAuthenticated])
+    def import_ndjson(self, request):
+        """
+        Import a course from NDJSON, sent as the raw body or as a "file" upload (admin only).
+        ?replace=true deletes an existing course with the same slug first; a course
+        with enrollments or progress also needs ?force=true, since they go with it.
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"detail": "Only staff can import courses"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response(
+                    {'error': 'file is required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            lines = upload
+        else:
+            lines = request.body.splitlines()
+
+        replace = request.query_params.get('replace') == 'true'
+        force = request.query_params.get('force') == 'true'
+        try:
+            course, counts = import_course(lines, replace=replace, force=force)
+        except ValidationError as e:
+            return Response(
+                {'error': e.messages},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'id': course.id,
+            'slug': course.slug,
+            'created': counts
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync feed: everything created, updated or deleted after ?cursor=.
+        Omit the cursor for a full initial sync; pass ?course= to follow one course.
+        Keep requesting with the returned cursor while has_more is true.
+        """
+        try:
+            limit = min(
+                int(request.query_params.get('limit', SYNC_PAGE_SIZE)),
+                MAX_SYNC_PAGE_SIZE
+            )
+            course_id = request.query_params.get('course')
+            course_id = int(course_id) if course_id else None
+        except ValueError:
+            return Response(
+                {'error': 'limit and course must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response(
+                {'error': 'limit must be positive'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            changes, cursor, has_more = get_changes(
+                cursor=request.query_params.get('cursor'),
+                course_id=course_id,
+                limit=limit
+            )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'changes': changes,
+            'cursor': cursor,
+            'has_more': has_more
+        })
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def package(self, request, pk=None):
+        """
+        Download the course's offline package (a zip archive).
+        Honours Range and If-Range, so interrupted downloads can resume.
+        """
+        course = self.get_object()
+        package = CoursePackage.objects.filter(course=course).first()
+        try:
+            handle = open(package_path(package), 'rb') if package else None
+        except FileNotFoundError:
+            handle = None
+        if handle is None:
+            return Response(
+                {'error': 'No offline package has been built for this course yet'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        size = os.fstat(handle.fileno()).st_size
+        etag = f'"package-{package.version}"'
+        byte_range = None
+        # A stale If-Range means the package was rebuilt, so send it whole
+        if request.META.get('HTTP_IF_RANGE', etag) == etag:
+            try:
+                byte_range = parse_byte_range(request.META.get('HTTP_RANGE'), size)
+            except UnsatisfiableRange:
+                handle.close()
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range is None:
+            response = FileResponse(handle, content_type='application/zip')
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(handle, start, end - start + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type='application/zip'
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(package.built_at.timestamp())
+        response['Content-Disposition'] = f'attachment; filename="{package.file_name}"'
+        return response
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def progress_matrix(self, request, pk=None):
+        """
+        Get the authenticated user's status for every lesson in the course.
+        Served from the packed progress bits on the enrollment row.
+        """
+        course = self.get_object()
+        enrollment = CourseEnrollment.objects.filter(
+            user=request.user,
+            course=course
+        ).only(
+            'id', 'user_id', 'course_id', 'progress_percent',
+            'progress_bits', 'progress_layout'
+        ).first()
+
+        if enrollment is None:
+            return Response(
+                {'error': 'Not enrolled in this course'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-class LessonViewSet(viewsets.ModelViewSet):
+        enrollment.ensure_current_layout()
+
+        statuses = enrollment.get_lesson_statuses()
+        lessons = [
+            {'lesson_id': lesson_id, 'status': lesson_status}
+            for lesson_id, lesson_status in statuses.items()
+        ]
+        return Response({
+            'course': enrollment.course_id,
+            'progress_percent': enrollment.progress_percent,
+            'completed_count': sum(1 for s in statuses.values() if s == 'completed'),
+            'in_progress_count': sum(1 for s in statuses.values() if s == 'in_progress'),
+            'lessons': lessons
+        })
+
+
+class LessonViewSet(BatchRetrieveMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint for lessons.
     """
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
+    # retrieve checks the course and enrolls the user in it
+    sparse_required_fields = ('course',)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -250,7 +494,7 @@ class LessonViewSet(viewsets.ModelViewSet):
             )
 
             # Check for achievements
-            self._check_lesson_achievements(request.user, lesson)
+            AchievementEngine.evaluate(request.user, 'lesson_completed')
 
             # Send real-time notification
             NotificationService.send_lesson_completion_notification(request.user, lesson)
@@ -272,84 +516,13 @@ class LessonViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _check_lesson_achievements(self, user, lesson):
-        """Check and award achievements for lesson completion."""
-        try:
-            # Check for first lesson completion
-            completed_lessons = UserProgress.objects.filter(
-                user=user,
-                status='completed'
-            ).count()
-            
-            if completed_lessons == 1:
-                # Award first lesson achievement
-                achievement = Achievement.objects.get(
-                    achievement_type='first_lesson'
-                )
-                UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement
-                )
-            
-            # Check for course completion
-            course = lesson.course
-            total_lessons = course.lessons.count()
-            completed_course_lessons = UserProgress.objects.filter(
-                user=user,
-                lesson__course=course,
-                status='completed'
-            ).count()
-            
-            if completed_course_lessons == total_lessons:
-                # Award course completion achievement
-                achievement = Achievement.objects.get(
-                    achievement_type='course_completion'
-                )
-                UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement
-                )
-        except Exception as e:
-            print(f"Error checking achievements: {str(e)}")
-            # Don't raise the exception, just log it
-
     @action(detail=True, methods=['get'])
     def content(self, request, pk=None):
         """
         Get all content (blocks and problems) for a lesson in order.
         """
         lesson = self.get_object()
-        
-        # Get all content blocks and problems
-        blocks = LessonContentBlock.objects.filter(lesson=lesson).order_by('order')
-        problems = Problem.objects.filter(lesson=lesson).order_by('order')
-        
-        # Combine and sort by order
-        content = []
-        for block in blocks:
-            content.append({
-                'type': 'block',
-                'id': block.id,
-                'order': block.order,
-                'block_type': block.block_type,
-                'content': block.content
-            })
-        
-        for problem in problems:
-            content.append({
-                'type': 'problem',
-                'id': problem.id,
-                'order': problem.order,
-                'question_type': problem.question_type,
-                'question_text': problem.question_text,
-                'content': problem.content,
-                'xp_value': problem.content.get('points', problem.xp)  # Add XP value
-            })
-        
-        # Sort by order
-        content.sort(key=lambda x: x['order'])
-        
-        return Response(content)
+        return Response(get_lesson_content(lesson.id))
 
     @action(detail=True, methods=['get'])
     def next_content(self, request, pk=None):
@@ -440,7 +613,7 @@ class LessonViewSet(viewsets.ModelViewSet):
             })
 
 
-class LessonContentBlockViewSet(viewsets.ModelViewSet):
+class LessonContentBlockViewSet(BatchRetrieveMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint for lesson content blocks.
     """
@@ -497,37 +670,65 @@ class LessonContentBlockViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            lesson = Lesson.objects.get(id=lesson_id)
-        except Lesson.DoesNotExist:
+            block_order = [int(block_id) for block_id in block_order]
+        except (TypeError, ValueError):
             return Response(
-                {'error': 'Lesson not found'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'block_order must be a list of block IDs'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Validate that all block IDs exist and belong to this lesson
-        blocks = LessonContentBlock.objects.filter(lesson=lesson)
-        block_ids = set(blocks.values_list('id', flat=True))
-
-        if not all(block_id in block_ids for block_id in block_order):
+        if len(set(block_order)) != len(block_order):
             return Response(
-                {'error': 'One or more block IDs do not belong to this lesson'},
+                {'error': 'block_order contains duplicate block IDs'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Update the order of blocks
-        for index, block_id in enumerate(block_order):
-            block = blocks.get(id=block_id)
-            block.order = index
-            block.save()
+        if not Lesson.objects.filter(id=lesson_id).exists():
+            return Response(
+                {'error': 'Lesson not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        with transaction.atomic():
+            # Validate membership and lock the rows in a single query
+            blocks = {
+                block.id: block
+                for block in LessonContentBlock.objects.select_for_update().filter(
+                    lesson_id=lesson_id,
+                    id__in=block_order
+                ).only('id', 'lesson_id', 'order')
+            }
+
+            if len(blocks) != len(block_order):
+                return Response(
+                    {'error': 'One or more block IDs do not belong to this lesson'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Update the order of blocks. bulk_update skips save(), so content
+            # validation doesn't re-run for blocks whose content is unchanged.
+            changed = []
+            now = timezone.now()
+            for index, block_id in enumerate(block_order):
+                block = blocks[block_id]
+                if block.order != index:
+                    block.order = index
+                    # bulk_update doesn't apply auto_now; the sync feed relies on it
+                    block.updated_at = now
+                    changed.append(block)
+
+            if changed:
+                LessonContentBlock.objects.bulk_update(changed, ['order', 'updated_at'])
+                transaction.on_commit(lambda: invalidate_lesson_content(lesson_id))
 
         updated_blocks = LessonContentBlock.objects.filter(
-            lesson=lesson).order_by('order')
+            lesson_id=lesson_id).order_by('order')
         serializer = LessonContentBlockSerializer(updated_blocks, many=True)
 
         return Response(serializer.data)
 
 
-class ProblemViewSet(viewsets.ModelViewSet):
+class ProblemViewSet(BatchRetrieveMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     """
     API endpoint for problems.
     """
@@ -536,6 +737,11 @@ class ProblemViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['question_text']
     ordering_fields = ['created_at', 'difficulty']
+    batch_expand = ('hints', 'solution_steps')
+
+    CORRECT_ANSWER_XP = 10  # Base XP for correct answer
+    CORRECT_ANSWER_STREAK_POINTS = 5  # Base streak points
+    MAX_BATCH_ANSWERS = getattr(settings, 'MAX_BATCH_ANSWERS', 100)
 
     def create(self, request, *args, **kwargs):
         try:
@@ -663,6 +869,9 @@ class ProblemViewSet(viewsets.ModelViewSet):
 
         # Check if answer is correct
         is_correct = self._check_answer(problem, answer)
+        record_submissions(user.id, [(problem.id, is_correct, request.data.get('time_spent'))])
+        xp_reward = 0
+        streak_reward = 0
         
         # Get or create user progress for the lesson
         if problem.lesson:
@@ -675,12 +884,12 @@ class ProblemViewSet(viewsets.ModelViewSet):
             # Update progress if answer is correct
             if is_correct:
                 # Award XP for correct answer
-                xp_reward = 10  # Base XP for correct answer
+                xp_reward = self.CORRECT_ANSWER_XP
                 user_level = UserLevel.objects.get_or_create(user=user)[0]
                 user_level.add_experience(xp_reward)
 
                 # Award streak points
-                streak_reward = 5  # Base streak points
+                streak_reward = self.CORRECT_ANSWER_STREAK_POINTS
                 UserReward.objects.create(
                     user=user,
                     reward_type='streak',
@@ -693,66 +902,214 @@ class ProblemViewSet(viewsets.ModelViewSet):
                 progress.mark_as_completed()
 
                 # Check for achievements
-                self._check_problem_achievements(user, problem)
+                AchievementEngine.evaluate(user, 'problem_solved')
 
         # Send real-time notification
         NotificationService.send_problem_completion_notification(user, problem)
 
         return Response({
             'is_correct': is_correct,
-            'xp_earned': xp_reward if is_correct else 0,
-            'streak_points': streak_reward if is_correct else 0
+            'xp_earned': xp_reward,
+            'streak_points': streak_reward
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def submit_batch(self, request):
+        """
+        Grade a whole practice set in one call.
+        Expects {"answers": [{"problem_id": 1, "answer": ...}, ...]}.
+        Rewards and progress are written in bulk, once per lesson rather than once per answer.
+        """
+        user = request.user
+        answers = request.data.get('answers')
+        if not isinstance(answers, list) or not answers:
+            return Response(
+                {'error': 'answers must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(answers) > self.MAX_BATCH_ANSWERS:
+            return Response(
+                {'error': f'At most {self.MAX_BATCH_ANSWERS} answers can be submitted at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        problem_ids = []
+        for item in answers:
+            try:
+                problem_ids.append(int(item['problem_id']))
+            except (TypeError, KeyError, ValueError):
+                return Response(
+                    {'error': 'Each answer needs a numeric problem_id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        # Each answer earns rewards and advances the review schedule, so a problem is graded once per call
+        if len(set(problem_ids)) != len(problem_ids):
+            return Response(
+                {'error': 'Each problem_id can only be answered once per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        problems = Problem.objects.select_related('lesson').only(
+            'id', 'question_text', 'question_type', 'correct_answer', 'updated_at',
+            'lesson__id', 'lesson__course_id', 'lesson__title'
+        ).in_bulk(problem_ids)
+        checkers = get_checkers(problems.values())
+
+        results = []
+        graded = []
+        correct_by_lesson = {}
+        touched_lessons = {}
+        last_problem = None
+        for problem_id, item in zip(problem_ids, answers):
+            problem = problems.get(problem_id)
+            if problem is None:
+                results.append({'problem_id': problem_id, 'error': 'Problem not found'})
+                continue
+            answer = item.get('answer')
+            if not answer:
+                results.append({'problem_id': problem_id, 'error': 'Answer is required'})
+                continue
+
+            is_correct = checkers[problem_id].check(answer)
+            results.append({'problem_id': problem_id, 'is_correct': is_correct})
+            graded.append((problem_id, is_correct, item.get('time_spent')))
+            last_problem = problem
+            if problem.lesson_id:
+                touched_lessons[problem.lesson_id] = problem.lesson
+                if is_correct:
+                    correct_by_lesson.setdefault(problem.lesson_id, []).append(problem)
+
+        record_submissions(user.id, graded)
+
+        correct_count = sum(len(solved) for solved in correct_by_lesson.values())
+        xp_reward = correct_count * self.CORRECT_ANSWER_XP
+        streak_reward = correct_count * self.CORRECT_ANSWER_STREAK_POINTS
+
+        if touched_lessons:
+            with transaction.atomic():
+                progress_by_lesson = {
+                    progress.lesson_id: progress
+                    for progress in UserProgress.objects.filter(
+                        user=user, lesson_id__in=touched_lessons
+                    ).select_related('lesson__course')
+                }
+                new_progress = [
+                    UserProgress(user=user, lesson=lesson, status='in_progress')
+                    for lesson_id, lesson in touched_lessons.items()
+                    if lesson_id not in progress_by_lesson
+                ]
+                if new_progress:
+                    UserProgress.objects.bulk_create(new_progress, ignore_conflicts=True)
+                    progress_by_lesson.update({
+                        progress.lesson_id: progress
+                        for progress in UserProgress.objects.filter(
+                            user=user, lesson_id__in=[p.lesson_id for p in new_progress]
+                        ).select_related('lesson__course')
+                    })
+                    # bulk_create skips save(), so record the new statuses on the enrollment bitsets
+                    for progress in new_progress:
+                        if progress.lesson_id not in correct_by_lesson:
+                            CourseEnrollment.record_lesson_status(
+                                user.id, progress.lesson, 'in_progress')
+
+                if correct_count:
+                    user_level = UserLevel.objects.get_or_create(user=user)[0]
+                    user_level.add_experience(xp_reward)
+
+                    UserReward.objects.bulk_create([
+                        UserReward(
+                            user=user,
+                            reward_type='streak',
+                            reward_name='Problem Solved',
+                            value=self.CORRECT_ANSWER_STREAK_POINTS,
+                            lesson_id=lesson_id
+                        )
+                        for lesson_id, solved in correct_by_lesson.items()
+                        for _ in solved
+                    ])
+
+                    for lesson_id in correct_by_lesson:
+                        progress_by_lesson[lesson_id].mark_as_completed()
+                    AchievementEngine.evaluate(user, 'problem_solved')
+
+        if last_problem is not None:
+            NotificationService.send_problem_completion_notification(user, last_problem)
+
+        return Response({
+            'results': results,
+            'correct_count': correct_count,
+            'xp_earned': xp_reward,
+            'streak_points': streak_reward
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def practice(self, request):
+        """
+        Next problem from the user's spaced-repetition queue, with when it is
+        due and how many problems are due now. Answering it reschedules it.
+        """
+        result = next_practice_problem(request.user.id)
+        if result is None:
+            return Response({'problem': None, 'due_at': None, 'due_count': 0})
+
+        problem, due_at, due_count = result
+        return Response({
+            'problem': self.get_serializer(problem).data,
+            'due_at': due_at,
+            'due_count': due_count
         })
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def hardest(self, request):
+        """
+        Staff report of the problems learners struggle with most, per lesson.
+        Filter with ?lesson= or ?course=; ?limit= problems per lesson and
+        ?min_learners= to skip problems too few learners have tried.
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"detail": "Only staff can view item statistics."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        stats = ProblemStats.objects.select_related('problem')
+        try:
+            if request.query_params.get('lesson'):
+                stats = stats.filter(problem__lesson_id=int(request.query_params['lesson']))
+            elif request.query_params.get('course'):
+                stats = stats.filter(problem__lesson__course_id=int(request.query_params['course']))
+            else:
+                return Response(
+                    {'error': 'lesson or course parameter is required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            limit = int(request.query_params.get('limit', 5))
+            min_learners = int(request.query_params.get(
+                'min_learners', getattr(settings, 'ITEM_STATS_MIN_LEARNERS', 5)))
+        except ValueError:
+            return Response(
+                {'error': 'lesson, course, limit and min_learners must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stats = stats.filter(learner_count__gte=min_learners).order_by(
+            'problem__lesson_id', 'solve_rate', '-attempts_mean')
+        lessons = {}
+        for row in stats:
+            hardest = lessons.setdefault(row.problem.lesson_id, [])
+            if len(hardest) < limit:
+                hardest.append(row)
+
+        return Response([
+            {'lesson': lesson_id, 'problems': ProblemStatsSerializer(rows, many=True).data}
+            for lesson_id, rows in lessons.items()
+        ])
+
     def _check_answer(self, problem, answer):
         """
-        Check if the submitted answer is correct.
-        """
-        if problem.question_type == 'multiple_choice':
-            return answer in problem.correct_answer
-        elif problem.question_type == 'single_choice':
-            return answer == problem.correct_answer
-        elif problem.question_type == 'true_false':
-            return answer == problem.correct_answer
-        elif problem.question_type == 'fill_blank':
-            return answer.lower().strip() == problem.correct_answer.lower().strip()
-        elif problem.question_type == 'matching':
-            return set(answer) == set(problem.correct_answer)
-        elif problem.question_type == 'open_ended':
-            # For open-ended questions, you might want to implement more sophisticated checking
-            return answer.lower().strip() in problem.correct_answer.lower().strip()
-        elif problem.question_type == 'math_expression':
-            # For math expressions, you might want to implement math expression comparison
-            return answer == problem.correct_answer
-        elif problem.question_type == 'code':
-            # For code problems, you might want to implement code execution and comparison
-            return answer == problem.correct_answer
-        return False
-
-    def _check_problem_achievements(self, user, problem):
-        """
-        Check and award achievements related to problem solving.
-        """
-        # Check for perfect score achievement
-        if problem.lesson:
-            lesson_problems = Problem.objects.filter(lesson=problem.lesson)
-            solved_problems = UserProgress.objects.filter(
-                user=user,
-                lesson=problem.lesson,
-                status='completed'
-            ).count()
-            
-            if solved_problems == lesson_problems.count():
-                achievement = Achievement.objects.filter(
-                    achievement_type='perfect_score',
-                    level_required__lte=user.level.level
-                ).first()
-                
-                if achievement:
-                    UserAchievement.objects.get_or_create(
-                        user=user,
-                        achievement=achievement
-                    )
+        Check if the submitted answer is correct using the problem's cached checker.
+        """
+        return get_checker(problem).check(answer)
 
 
 class UserProgressViewSet(viewsets.ModelViewSet):
@@ -795,11 +1152,11 @@ class UserProgressViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get all lessons for this course's modules
+        # Get all progress entries for this course's lessons
         lesson_progress = UserProgress.objects.filter(
             user=request.user,
-            lesson__module__course=course
-        )
+            lesson__course=course
+        ).select_related('lesson', 'lesson__course')
 
         serializer = self.get_serializer(lesson_progress, many=True)
         return Response(serializer.data)
@@ -995,39 +1352,14 @@ class DailyChallengeViewSet(viewsets.ModelViewSet):
             UserReward.award_challenge_completion(
                 request.user, challenge, progress.score
             )
-            
-            # Check for achievements
-            self._check_challenge_achievements(request.user)
-        
+
         progress.save()
-        return Response(UserChallengeProgressSerializer(progress).data)
 
-    def _check_challenge_achievements(self, user):
-        """Check and award achievements related to challenges"""
-        completed_challenges = UserChallengeProgress.objects.filter(
-            user=user, completed=True
-        ).count()
-        
-        # Award achievements based on number of completed challenges
-        if completed_challenges == 1:
-            self._award_achievement(user, 'first_challenge')
-        elif completed_challenges == 7:
-            self._award_achievement(user, 'weekly_challenge_master')
-        elif completed_challenges == 30:
-            self._award_achievement(user, 'monthly_challenge_master')
-
-    def _award_achievement(self, user, achievement_type):
-        """Award an achievement to a user"""
-        try:
-            achievement = Achievement.objects.get(
-                achievement_type=achievement_type
-            )
-            UserAchievement.objects.get_or_create(
-                user=user,
-                achievement=achievement
-            )
-        except Achievement.DoesNotExist:
-            pass
+        if is_correct:
+            # Check for achievements once the completion is stored
+            AchievementEngine.evaluate(request.user, 'challenge_completed')
+
+        return Response(UserChallengeProgressSerializer(progress).data)
 
 
 class UserLevelViewSet(viewsets.ReadOnlyModelViewSet):
@@ -1338,27 +1670,10 @@ class UserCulturalProgressViewSet(viewsets.ModelViewSet):
         return UserCulturalProgress.objects.filter(user=self.request.user)
 
 
-class UserNotificationViewSet(viewsets.ModelViewSet):
+class UserNotificationViewSet(NotificationInboxMixin, viewsets.ModelViewSet):
+    """
+    The same inbox as /api/notifications/, in the field names older
+    clients of this endpoint expect.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = UserNotificationSerializer
-    queryset = UserNotification.objects.none()
-
-    def get_queryset(self):
-        return UserNotification.objects.filter(user=self.request.user)
-
-    @action(detail=False, methods=['post'])
-    def mark_all_read(self, request):
-        self.get_queryset().update(is_read=True)
-        return Response({'message': 'All notifications marked as read'})
-
-    @action(detail=True, methods=['post'])
-    def mark_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
-        return Response({'message': 'Notification marked as read'})
-
-    @action(detail=False, methods=['get'])
-    def unread_count(self, request):
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'unread_count': count})
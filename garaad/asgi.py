@@ -2,17 +2,21 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-import community.routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'garaad.settings')
 
 # Initialize Django ASGI application early to ensure AppRegistry is populated
 django_asgi_app = get_asgi_application()
 
+# Routes import models, so they can only load once the apps are ready
+import community.routing  # noqa: E402
+import courses.routing  # noqa: E402
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         URLRouter(
+            courses.routing.websocket_urlpatterns +
             community.routing.websocket_urlpatterns
         )
     ),
@@ -203,11 +203,32 @@ WSGI_APPLICATION = 'garaad.wsgi.application'
 ASGI_APPLICATION = 'garaad.asgi.application'
 
 # Channels Configuration
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# Redis lets cron jobs and other processes push to websocket clients;
+# the in-memory layer only reaches clients of the same process
+if os.getenv('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [os.getenv('REDIS_URL')]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
+# Cached course content (lesson bundles and sequences, the catalog snapshot)
+# is invalidated with cache.delete, which only reaches other processes,
+# management commands included, through a shared cache
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv('REDIS_URL'),
+        }
     }
-}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
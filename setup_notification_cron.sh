@@ -37,6 +37,15 @@ fi
 # Process notifications and log the output
 python manage.py send_notifications >> logs/notifications.log 2>&1
 
+# Merge buffered notifications into digests
+python manage.py flush_notification_digests >> logs/notifications.log 2>&1
+
+# Deliver the queued emails
+python manage.py send_queued_emails >> logs/emails.log 2>&1
+
+# Purge rows past their retention period, a bounded slice per run
+python manage.py purge_expired_data --max-seconds 60 >> logs/retention.log 2>&1
+
 # Clean up old log files (keep last 30 days)
 find logs/ -name "*.log" -mtime +30 -delete
 EOF